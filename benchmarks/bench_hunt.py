@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""Hunt engine benchmarks against simulated OCI and Telegram backends.
+
+Each scenario file (benchmarks/scenarios/*.yaml) runs several VMCreator
+hunts concurrently against the local OCI stand-in (src/oci_standin.py)
+and a Telegram Bot API stub. Both are served from child processes so
+their CPU and memory are not charged to the hunts. Scenario files use the
+stand-in's schema, so the same file also drives oci_standin.py and
+simulator.py; name, hunts, timeout and config (overrides of config.yaml)
+are read by the benchmark only. Reported per scenario:
+
+    attempts_per_min          launch attempts per minute, all hunts
+    api_calls_per_attempt     OCI SDK calls per launch attempt
+    launch_to_running_p50_ms  LaunchInstance accepted -> RUNNING
+    launch_to_running_p99_ms
+    time_to_first_success_s   hunt start -> first VM (capacity windows are scripted)
+    cpu_s_per_hunt            process CPU time divided by the number of hunts
+    rss_mb_per_hunt           peak RSS growth divided by the number of hunts
+
+Results are written as JSON; with --baseline the run is compared against
+an earlier result file and exits with status 1 on a regression beyond
+--tolerance.
+
+Usage: python benchmarks/bench_hunt.py [scenario.yaml ...] --output results.json [--baseline old.json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional, Tuple
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from simulator import merge_config, percentile
+from bench_startup import git_commit
+
+SCENARIO_DIR = Path(__file__).resolve().parent / "scenarios"
+
+# Metric -> which direction is better, for the baseline comparison
+METRICS = {
+    "attempts_per_min": "higher",
+    "api_calls_per_attempt": "lower",
+    "launch_to_running_p50_ms": "lower",
+    "launch_to_running_p99_ms": "lower",
+    "time_to_first_success_s": "lower",
+    "cpu_s_per_hunt": "lower",
+    "rss_mb_per_hunt": "lower"
+}
+
+class TelegramStubHandler(BaseHTTPRequestHandler):
+    """Answers sendMessage/getMe like the Bot API, after a fixed latency"""
+    
+    latency = 0.0
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.reply({"ok": True, "result": {"message_id": 1}})
+    
+    def do_GET(self):
+        self.reply({"ok": True, "result": {"username": "bench_bot"}})
+    
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def reply(self, data: Dict[str, Any]) -> None:
+        """Write a JSON response"""
+        time.sleep(self.latency)
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """Quiet"""
+
+def serve_standin(scenario_path: str) -> None:
+    """Child process: serve a scenario's OCI stand-in until stdin closes"""
+    from oci_standin import StandinServer, Scenario
+    
+    with open(scenario_path, 'r', encoding='utf-8') as file:
+        spec = yaml.safe_load(file)
+    standin = StandinServer(Scenario(spec, seed=spec.get("seed", 1))).start()
+    print(standin.endpoint, flush=True)
+    sys.stdin.read()
+
+def serve_telegram(latency_ms: float) -> None:
+    """Child process: serve the Telegram stub until stdin closes"""
+    handler = type("BoundTelegramStub", (TelegramStubHandler,), {"latency": latency_ms / 1000})
+    telegram = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    telegram.daemon_threads = True
+    threading.Thread(target=telegram.serve_forever, daemon=True).start()
+    print(f"http://127.0.0.1:{telegram.server_address[1]}", flush=True)
+    sys.stdin.read()
+
+def start_backend(*args: str) -> Tuple[subprocess.Popen, str]:
+    """Start a backend child process; returns it and the endpoint it serves"""
+    process = subprocess.Popen([sys.executable, __file__, *args], stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().strip()
+
+def stop_backend(process: subprocess.Popen) -> None:
+    """Let a backend child process exit"""
+    process.stdin.close()
+    process.wait(timeout=10)
+
+def current_rss_mb() -> float:
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/status", 'r') as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def api_call_count() -> float:
+    """OCI SDK calls made by this process so far"""
+    import metrics
+    return metrics.OCI_REQUESTS.total()
+
+def run_scenario(path: Path, workdir: str, index: int) -> Dict[str, Any]:
+    """Run one scenario's hunts and measure them"""
+    from vm_creator import VMCreator
+    
+    with open(path, 'r', encoding='utf-8') as file:
+        spec = yaml.safe_load(file)
+    name = spec.get("name", path.stem)
+    hunts = spec.get("hunts", 4)
+    timeout = spec.get("timeout", 120)
+    logging.info(f"Scenario {name}: {hunts} hunt(s), timeout {timeout}s")
+    
+    standin, os.environ["NOTIVM_OCI_ENDPOINT"] = start_backend("--serve-standin", str(path))
+    try:
+        # A tenancy per scenario keeps rate limiter and cache state apart
+        os.environ["OCI_TENANCY_OCID"] = f"ocid1.tenancy.oc1..bench{index}"
+        
+        with open(ROOT / "config" / "config.yaml", 'r', encoding='utf-8') as file:
+            config = merge_config(yaml.safe_load(file), spec.get("config") or {})
+        config["scheduler_config"] = dict(config.get("scheduler_config") or {},
+                                          stats_path=os.path.join(workdir, "capacity_stats.json"))
+        
+        rss_before = current_rss_mb()
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        calls_before = api_call_count()
+        started = time.monotonic()
+        
+        creators = [VMCreator(config, region=f"bench-{index}-{hunt + 1}") for hunt in range(hunts)]
+        launch_to_running: List[float] = []
+        successes: List[float] = []
+        lock = threading.Lock()
+        
+        def timed_wait(creator: VMCreator):
+            wait = creator.wait_for_instance_running
+            
+            def wrapper(instance_id: str, *args, **kwargs):
+                wait_started = time.monotonic()
+                ready = wait(instance_id, *args, **kwargs)
+                if ready:
+                    with lock:
+                        launch_to_running.append((time.monotonic() - wait_started) * 1000)
+                return ready
+            return wrapper
+        
+        def hunt(creator: VMCreator):
+            if creator.create_vm_with_retry():
+                with lock:
+                    successes.append(time.monotonic() - started)
+        
+        peak_rss = rss_before
+        threads = []
+        for creator in creators:
+            creator.prewarm_lead = 0
+            creator.wait_for_instance_running = timed_wait(creator)
+            thread = threading.Thread(target=hunt, args=(creator,), name=f"hunt-{creator.label}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        
+        deadline = started + timeout
+        while any(thread.is_alive() for thread in threads):
+            peak_rss = max(peak_rss, current_rss_mb())
+            if time.monotonic() > deadline:
+                logging.warning(f"Scenario {name} timed out, stopping its hunts")
+                for creator in creators:
+                    creator.stop_event.set()
+                deadline = float("inf")
+            time.sleep(0.2)
+        
+        elapsed = time.monotonic() - started
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+        attempts = sum(creator.attempt for creator in creators)
+        calls = api_call_count() - calls_before
+        cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+        for creator in creators:
+            creator.end_heartbeat()
+        # Deliver the scenario's notifications while the Telegram stub is still up
+        creators[0].notifier.flush()
+    finally:
+        stop_backend(standin)
+    
+    return {
+        "hunts": hunts,
+        "succeeded": len(successes),
+        "elapsed_s": round(elapsed, 2),
+        "attempts": attempts,
+        "attempts_per_min": round(attempts / (elapsed / 60), 2) if elapsed else None,
+        "api_calls_per_attempt": round(calls / attempts, 2) if attempts else None,
+        "launch_to_running_p50_ms": _round(percentile(launch_to_running, 50)),
+        "launch_to_running_p99_ms": _round(percentile(launch_to_running, 99)),
+        "launch_to_running_samples": len(launch_to_running),
+        "time_to_first_success_s": _round(min(successes) if successes else None),
+        "cpu_s_per_hunt": round(cpu / hunts, 3),
+        "rss_mb_per_hunt": round(max(0.0, peak_rss - rss_before) / hunts, 2)
+    }
+
+def _round(value: Optional[float]) -> Optional[float]:
+    """One decimal place, keeping None"""
+    return round(value, 1) if value is not None else None
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of results against a baseline result file"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric, better in METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if old is None or new is None or old == 0:
+                continue
+            change = (new - old) / abs(old)
+            if (better == "lower" and change > tolerance) or (better == "higher" and change < -tolerance):
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+def prepare_environment(workdir: str) -> None:
+    """Throwaway credentials and state paths so a run never touches /app/data"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    
+    key_path = os.path.join(workdir, "bench_key.pem")
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    with open(key_path, 'wb') as file:
+        file.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                                     serialization.NoEncryption()))
+    
+    os.environ.update({
+        "OCI_USER_OCID": "ocid1.user.oc1..bench",
+        "OCI_FINGERPRINT": ":".join(["00"] * 16),
+        "OCI_PRIVATE_KEY_PATH": key_path,
+        "TELEGRAM_BOT_TOKEN": "bench",
+        "TELEGRAM_CHAT_ID": "1",
+        "NOTIVM_HISTORY_PATH": os.path.join(workdir, "attempts.db"),
+        "NOTIVM_CHECKPOINT_PATH": os.path.join(workdir, "checkpoint.json"),
+        "NOTIVM_CACHE_PATH": os.path.join(workdir, "resource_cache.json"),
+        "NOTIVM_OUTBOX_DIR": os.path.join(workdir, "outbox"),
+        "NOTIVM_TRACE_PATH": os.path.join(workdir, "traces.jsonl")
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hunt engine against simulated backends")
+    parser.add_argument("scenarios", nargs="*", help="Scenario files (default: benchmarks/scenarios/*.yaml)")
+    parser.add_argument("--output", default="benchmark-results.json", help="Result file (JSON)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression (default: 0.25)")
+    parser.add_argument("--telegram-latency-ms", type=float, default=50, help="Telegram stub latency (default: 50)")
+    parser.add_argument("--serve-standin", metavar="SCENARIO", help=argparse.SUPPRESS)
+    parser.add_argument("--serve-telegram", metavar="LATENCY_MS", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--verbose", action="store_true", help="Show the hunts' own logging")
+    args = parser.parse_args()
+    
+    if args.serve_standin:
+        serve_standin(args.serve_standin)
+        return 0
+    if args.serve_telegram is not None:
+        serve_telegram(args.serve_telegram)
+        return 0
+    
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+    logging.getLogger(__name__).setLevel(logging.INFO)
+    paths = [Path(path) for path in args.scenarios] or sorted(SCENARIO_DIR.glob("*.yaml"))
+    
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": {}
+    }
+    # One Telegram stub for the whole run: the process-wide notifier keeps its endpoint
+    telegram, os.environ["NOTIVM_TELEGRAM_ENDPOINT"] = start_backend("--serve-telegram", str(args.telegram_latency_ms))
+    try:
+        with tempfile.TemporaryDirectory(prefix="notivm-bench-") as workdir:
+            prepare_environment(workdir)
+            for index, path in enumerate(paths, start=1):
+                name = (yaml.safe_load(path.read_text(encoding='utf-8')) or {}).get("name", path.stem)
+                results["scenarios"][name] = run_scenario(path, workdir, index)
+                print(f"{name}: {json.dumps(results['scenarios'][name])}")
+    finally:
+        stop_backend(telegram)
+    
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Startup time of src/main.py.
+
+Measures, in fresh interpreters:
+
+    interpreter_ms   python -c pass (the floor everything else sits on)
+    help_ms          python main.py --help
+    main_import_ms   import main, cumulative (python -X importtime)
+    hunt_import_ms   import vm_creator (OCI SDK core/identity, requests), deferred until a hunt starts
+
+and checks that importing main does not load the hunt modules. The run
+fails (exit status 1) when one of them is imported eagerly again, when
+main_import_ms exceeds --max-import-ms, or, with --baseline, when
+help_ms or main_import_ms regress beyond --tolerance. tests/test_startup.py
+asserts the deferred imports and an import time budget on every test run;
+this script adds the timings and the baseline comparison.
+
+Usage: python benchmarks/bench_startup.py [--output startup.json] [--baseline old.json]
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "src"
+
+# Must not be imported by `import main`; they load when a hunt or mode needs them
+DEFERRED_MODULES = ("oci", "requests", "yaml", "dotenv", "vm_creator", "notifier", "job_manager", "async_engine")
+
+# Metrics compared against a baseline (lower is better)
+METRICS = ("help_ms", "main_import_ms")
+
+def run_ms(args: List[str], runs: int) -> Dict[str, float]:
+    """Wall time of a fresh interpreter running args, best and median of several runs"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=SRC, capture_output=True, check=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"min": round(min(timings), 1), "median": round(statistics.median(timings), 1)}
+
+def import_ms(module: str, runs: int) -> float:
+    """Cumulative import time of a module (best of several -X importtime runs)"""
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                cwd=SRC, capture_output=True, text=True, check=True)
+        for line in result.stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                timings.append(int(fields[1]) / 1000)
+    return round(min(timings), 1)
+
+def eagerly_imported() -> List[str]:
+    """Deferred modules that `import main` loads anyway"""
+    check = f"import sys, main; print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", check], cwd=SRC, capture_output=True, text=True, check=True)
+    return [module for module in result.stdout.strip().split(",") if module]
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of results against a baseline result file"""
+    regressions = []
+    for metric in METRICS:
+        old, new = baseline.get(metric), results.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if change > tolerance:
+            regressions.append(f"{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+def git_commit() -> Optional[str]:
+    """Commit the benchmark ran against, if known"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure notivm startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement (default: 5)")
+    parser.add_argument("--max-import-ms", type=float, default=100, help="Budget for import main (default: 100)")
+    parser.add_argument("--output", help="Result file (JSON)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative regression (default: 0.5)")
+    args = parser.parse_args()
+    
+    help_timings = run_ms(["main.py", "--help"], args.runs)
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "interpreter_ms": run_ms(["-c", "pass"], args.runs)["min"],
+        "help_ms": help_timings["min"],
+        "help_median_ms": help_timings["median"],
+        "main_import_ms": import_ms("main", args.runs),
+        "hunt_import_ms": import_ms("vm_creator", args.runs),
+        "eager_imports": eagerly_imported()
+    }
+    for key, value in results.items():
+        print(f"{key:<16} {value}")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    
+    failures = []
+    if results["eager_imports"]:
+        failures.append(f"import main loads {', '.join(results['eager_imports'])} eagerly")
+    if results["main_import_ms"] > args.max_import_ms:
+        failures.append(f"import main takes {results['main_import_ms']} ms (budget {args.max_import_ms} ms)")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            failures += compare(results, json.load(file), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,12 +6,93 @@ PyInstaller를 사용하여 실행 파일을 생성하는 스크립트
 
 import os
 import sys
+import json
+import time
 import shutil
+import zipapp
+import compileall
 import subprocess
 from pathlib import Path
 
-def build_executable():
-    """Build executable using PyInstaller"""
+# notivm이 실제로 불러오는 OCI SDK 하위 패키지를 찾는 스크립트 (빌드 환경의 별도 프로세스에서 실행)
+# 헌트 모듈을 모두 import하고, 로컬 OCI 대역 서버에 헌트가 쓰는 호출(용량 조회, 생성, 상태 조회, 종료)을
+# 실제로 보낸 뒤 로드된 패키지를 출력 (클라이언트 생성만으로는 호출 시점에 로드되는 모듈을 놓침)
+OCI_PROBE = """
+import sys, json, pkgutil, tempfile, os
+sys.path.insert(0, sys.argv[1])
+import main, vm_creator, notifier, job_manager, async_engine, oci_client, oci_profiles
+import oci
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from oci_standin import StandinServer, Scenario
+with tempfile.TemporaryDirectory() as workdir:
+    key_file = os.path.join(workdir, "key.pem")
+    with open(key_file, "wb") as file:
+        file.write(rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL, serialization.NoEncryption()))
+    standin = StandinServer(Scenario({"provisioning_seconds": 0, "capacity": {"default": True}})).start()
+    os.environ.update({
+        "NOTIVM_OCI_ENDPOINT": standin.endpoint, "NOTIVM_CACHE_PATH": os.path.join(workdir, "cache.json"),
+        "OCI_USER_OCID": "ocid1.user.oc1..probe", "OCI_TENANCY_OCID": "ocid1.tenancy.oc1..probe",
+        "OCI_FINGERPRINT": ":".join(["00"] * 16), "OCI_PRIVATE_KEY_PATH": key_file})
+    client = oci_client.OCIClient({}, "ap-seoul-1")
+    client.prewarm_connections()
+    client.probe_capacity()
+    instance_id = client.create_instance("probe", client.get_availability_domains()[0])["instance_id"]
+    client.get_instance_state(instance_id)
+    client.get_instance_details(instance_id)
+    client.terminate_instance(instance_id)
+    standin.stop()
+packages = {module.name for module in pkgutil.iter_modules(oci.__path__) if module.ispkg}
+print(json.dumps(sorted({name.split(".")[1] for name in sys.modules
+                         if name.startswith("oci.") and name.split(".")[1] in packages})))
+"""
+
+# 슬림 빌드에서 제외할 모듈 (python-dotenv의 IPython 확장, pytz의 pkg_resources 등 선택적 import로 딸려오는 패키지)
+EXCLUDED_MODULES = ("IPython", "tkinter", "_tkinter", "pkg_resources")
+
+# zipapp에서 제외되는 네이티브 확장 패키지 (zip 안에서는 로드할 수 없으므로 실행 환경의 Python에 설치 필요)
+NATIVE_PACKAGES = ("cryptography", "cffi", "_cffi_backend")
+
+def find_unused_oci_packages(src_dir: Path) -> list:
+    """OCI SDK subpackages notivm never loads (every service except the ones it calls)"""
+    import pkgutil
+    import oci
+    
+    result = subprocess.run([sys.executable, "-c", OCI_PROBE, str(src_dir)],
+                            capture_output=True, text=True, check=True)
+    used = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    packages = {module.name for module in pkgutil.iter_modules(oci.__path__) if module.ispkg}
+    print(f"🔎 OCI SDK packages in use: {', '.join(sorted(used))}")
+    return sorted(packages - used)
+
+def directory_size(path: Path) -> int:
+    """Total size of a file or directory in bytes"""
+    if path.is_file():
+        return path.stat().st_size
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+def measure_startup(command: list, runs: int = 5) -> tuple:
+    """First (cold) and best wall time of a command in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, capture_output=True, check=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings[0], min(timings)
+
+def print_report(artifact: Path, command: list) -> None:
+    """Size and startup time of the built distribution (--help: CLI only, --self-check: all hunt modules)"""
+    size_mb = directory_size(artifact) / 1024 / 1024
+    print("\n📊 Build report")
+    print(f"   Artifact:     {artifact}")
+    print(f"   Size:         {size_mb:.1f} MB")
+    for flag in ("--help", "--self-check"):
+        cold_ms, warm_ms = measure_startup(command + [flag])
+        print(f"   {flag:<13} {cold_ms:.0f} ms first run, {warm_ms:.0f} ms best of 5")
+
+def build_executable(build_format: str = "onefile"):
+    """Build executable using PyInstaller (onefile: single binary, onedir: slim folder distribution)"""
     
     # 현재 디렉토리 확인
     project_root = Path(__file__).parent.absolute()
@@ -19,21 +100,38 @@ def build_executable():
     dist_dir = project_root / "dist"
     build_dir = project_root / "build"
     
-    print(f"🏗️  Building Oracle VM Hunter executable...")
+    print(f"🏗️  Building Oracle VM Hunter executable ({build_format})...")
     print(f"📁 Project root: {project_root}")
     
     # PyInstaller 명령어 구성
-    pyinstaller_cmd = [
-        "pyinstaller",
-        "--onefile",                    # 단일 실행 파일
-        "--windowed",                   # GUI 모드 (콘솔 창 숨김)
+    if build_format == "onefile":
+        pyinstaller_cmd = [
+            "pyinstaller",
+            "--onefile",                    # 단일 실행 파일
+            "--windowed",                   # GUI 모드 (콘솔 창 숨김)
+            "--hidden-import", "oci",       # OCI SDK
+        ]
+    else:
+        # 실행할 때마다 압축을 풀지 않는 폴더 배포본, 사용하지 않는 OCI 서비스 패키지 제외
+        pyinstaller_cmd = [
+            "pyinstaller",
+            "--onedir",                     # 폴더 배포 (시작 시 압축 해제 없음)
+            "--optimize", "1",              # 최적화된 바이트코드로 미리 컴파일
+            "--hidden-import", "oci.core",  # OCI SDK (사용하는 서비스만)
+            "--hidden-import", "oci.identity",
+        ]
+        excluded = list(EXCLUDED_MODULES) + [f"oci.{package}" for package in find_unused_oci_packages(src_dir)]
+        for module in excluded:
+            pyinstaller_cmd.extend(["--exclude-module", module])
+    pyinstaller_cmd += [
         "--name", "OracleVMHunter",     # 실행 파일 이름
-        "--add-data", f"{project_root}/config;config",  # 설정 파일 포함
-        "--hidden-import", "oci",       # OCI SDK
+        "--add-data", f"{project_root}/config{os.pathsep}config",  # 설정 파일 포함
         "--hidden-import", "yaml",      # PyYAML
         "--hidden-import", "requests",  # Requests
         "--hidden-import", "dotenv",    # python-dotenv
+        "--paths", str(src_dir),        # 지연 import되는 notivm 모듈
         "--clean",                      # 이전 빌드 정리
+        "--noconfirm",
         str(src_dir / "main.py")        # 메인 파일
     ]
     
@@ -54,10 +152,15 @@ def build_executable():
         else:
             exe_name = "OracleVMHunter"
         
-        exe_path = dist_dir / exe_name
+        if build_format == "onefile":
+            exe_path = dist_dir / exe_name
+            artifact = exe_path
+        else:
+            artifact = dist_dir / "OracleVMHunter"
+            exe_path = artifact / exe_name
         if exe_path.exists():
             print(f"📦 Executable created: {exe_path}")
-            print(f"📏 File size: {exe_path.stat().st_size / 1024 / 1024:.1f} MB")
+            print(f"📏 File size: {directory_size(artifact) / 1024 / 1024:.1f} MB")
         
         # 설정 파일 복사
         config_dist = dist_dir / "config"
@@ -92,8 +195,77 @@ def build_executable():
         print("3. Replace license.key.template with your actual license")
         print("4. Run the executable!")
         
+        print_report(artifact, [str(exe_path)])
         return True
+    
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Build failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+
+def build_zipapp():
+    """Build a zipapp: notivm and its pure-Python dependencies as precompiled bytecode in one archive"""
+    project_root = Path(__file__).parent.absolute()
+    src_dir = project_root / "src"
+    dist_dir = project_root / "dist"
+    staging_dir = project_root / "build" / "zipapp"
+    target = dist_dir / "OracleVMHunter.pyz"
+    
+    print("🏗️  Building Oracle VM Hunter zipapp...")
+    try:
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+        staging_dir.mkdir(parents=True)
+        dist_dir.mkdir(exist_ok=True)
+        
+        # 런타임 의존성만 설치 (pyinstaller 제외)
+        requirements = [
+            line.strip() for line in (project_root / "requirements.txt").read_text().splitlines()
+            if line.strip() and not line.startswith("#") and not line.lower().startswith("pyinstaller")
+        ]
+        print("📦 Installing runtime dependencies...")
+        subprocess.run([sys.executable, "-m", "pip", "install", "--quiet", "--no-compile",
+                        "--target", str(staging_dir)] + requirements, check=True)
+        
+        # 사용하지 않는 OCI 서비스 패키지와 zip에서 로드할 수 없는 네이티브 패키지 제거
+        unused = find_unused_oci_packages(src_dir)
+        for package in unused:
+            shutil.rmtree(staging_dir / "oci" / package, ignore_errors=True)
+        print(f"🗑️  Removed {len(unused)} unused OCI SDK packages")
+        for path in staging_dir.iterdir():
+            name = path.name.split("-")[0].split(".")[0]
+            if name in NATIVE_PACKAGES or path.name.endswith(".dist-info") or path.name == "bin":
+                shutil.rmtree(path) if path.is_dir() else path.unlink()
+        for pattern in ("*.so", "*.pyd"):
+            for path in staging_dir.rglob(pattern):
+                path.unlink()
+        
+        for module in src_dir.glob("*.py"):
+            shutil.copy2(module, staging_dir / module.name)
         
+        # zipimport는 바이트코드를 캐시하지 않으므로 미리 컴파일하고 소스는 제외
+        print("⚙️  Precompiling bytecode...")
+        compileall.compile_dir(str(staging_dir), quiet=1, legacy=True, optimize=1)
+        for path in staging_dir.rglob("*.py"):
+            path.unlink()
+        
+        zipapp.create_archive(staging_dir, target, interpreter="/usr/bin/env python3",
+                              main="main:main", compressed=True)
+        print(f"📦 Zipapp created: {target}")
+        print(f"⚠️  Runs on Python {sys.version_info.major}.{sys.version_info.minor} with "
+              f"{', '.join(package for package in NATIVE_PACKAGES if not package.startswith('_'))} installed "
+              f"(e.g. the python3-cryptography package)")
+        
+        config_dist = dist_dir / "config"
+        if not config_dist.exists():
+            shutil.copytree(project_root / "config", config_dist)
+            print("📋 Configuration files copied to dist/config/")
+        
+        print_report(target, [sys.executable, str(target)])
+        return True
+    
     except subprocess.CalledProcessError as e:
         print(f"❌ Build failed: {e}")
         return False
@@ -155,6 +327,8 @@ if __name__ == "__main__":
     parser.add_argument("--install-deps", action="store_true", help="Install build dependencies")
     parser.add_argument("--clean", action="store_true", help="Clean build artifacts")
     parser.add_argument("--build", action="store_true", help="Build executable")
+    parser.add_argument("--format", choices=["onefile", "onedir", "zipapp"], default="onefile",
+                        help="onefile (default), onedir (slim folder, fast start) or zipapp (single .pyz)")
     
     args = parser.parse_args()
     
@@ -167,5 +341,5 @@ if __name__ == "__main__":
     
     if args.build or (not args.clean and not args.install_deps):
         # 기본 동작은 빌드
-        success = build_executable()
+        success = build_zipapp() if args.format == "zipapp" else build_executable(args.format)
         sys.exit(0 if success else 1)
\ No newline at end of file
@@ -26,6 +26,7 @@ echo
 # Create necessary directories
 echo "📁 Creating directories..."
 mkdir -p logs
+mkdir -p data
 mkdir -p docker
 echo "✅ Directories created"
 echo
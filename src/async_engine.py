@@ -0,0 +1,283 @@
+import asyncio
+import functools
+import contextvars
+import logging
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List
+from vm_creator import VMCreator
+
+class AsyncHuntEngine:
+    """Runs many VMCreator hunts as asyncio tasks on one event loop.
+    
+    Blocking SDK calls, AD fan-out launches and disk writes (history,
+    checkpoint, stats) go through one bounded thread pool, notifications
+    are sent from a separate pool without being awaited, and every wait is
+    a cancellable timer, so stopping takes effect immediately. Hunts are
+    identified by their label (profile/region), which must be unique, and
+    hunts that share a stop_event race each other: the first success
+    stops the rest of that group only.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize the engine with the shared executors"""
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        
+        engine_config = config.get("engine_config") or {}
+        self.max_workers = engine_config.get("max_workers", 16)
+        self.notify_workers = engine_config.get("notify_workers", 2)
+        
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="oci-call")
+        self.notify_executor = ThreadPoolExecutor(max_workers=self.notify_workers, thread_name_prefix="notify")
+        
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # One stop event per group of hunts sharing a stop_event (a profile in multi-tenancy mode)
+        self._stops: Dict[int, asyncio.Event] = {}
+        self._creators: List[VMCreator] = []
+        self._tasks: List[asyncio.Task] = []
+        
+        self.logger.info(f"Async hunt engine initialized (max_workers={self.max_workers})")
+    
+    async def call(self, fn, *args) -> Any:
+        """Run a blocking call on the bounded executor, in a copy of the hunt task's context
+        (so SDK call spans find the task's attempt span)"""
+        return await self._loop.run_in_executor(self.executor,
+                                                functools.partial(contextvars.copy_context().run, fn, *args))
+    
+    def notify(self, send, *args) -> None:
+        """Send a notification in the background; the hunt never waits for it"""
+        self.notify_executor.submit(send, *args)
+    
+    def stopped(self, creator: VMCreator) -> bool:
+        """Whether the hunt's group has been stopped"""
+        return self._stops[id(creator.stop_event)].is_set()
+    
+    async def sleep(self, creator: VMCreator, seconds: float) -> bool:
+        """Wait for the given time; returns True as soon as the hunt's group is stopped"""
+        try:
+            await asyncio.wait_for(self._stops[id(creator.stop_event)].wait(), timeout=seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    async def wait_before_next_attempt(self, creator: VMCreator, wait_time: float) -> bool:
+        """Async counterpart of VMCreator.wait_before_next_attempt"""
+        deadline = self._loop.time() + wait_time
+        creator.beat(wait_time)
+        if creator.prewarm_lead and wait_time > creator.prewarm_lead:
+            if await self.sleep(creator, wait_time - creator.prewarm_lead):
+                return True
+            await self.call(creator.prewarm_connections)
+        return await self.sleep(creator, max(0, deadline - self._loop.time()))
+    
+    async def wait_for_capacity(self, creator: VMCreator) -> Optional[List[str]]:
+        """Async counterpart of VMCreator.wait_for_capacity"""
+        while not self.stopped(creator):
+            available = await self.call(creator.probe_capacity)
+            if available is None or available:
+                return available
+            creator.beat(creator.probe_interval)
+            if await self.sleep(creator, creator.probe_interval):
+                break
+        return None
+    
+    async def wait_for_instance_running(self, creator: VMCreator, instance_id: str) -> bool:
+        """Async counterpart of VMCreator.wait_for_instance_running"""
+        self.logger.info(f"Waiting for instance {instance_id} to reach RUNNING state")
+        
+        intervals = creator.readiness_poll_intervals()
+        deadline = self._loop.time() + creator.readiness_timeout
+        while self._loop.time() < deadline:
+            try:
+                ready = await self.call(creator.check_readiness, instance_id)
+                if ready is not None:
+                    if ready:
+                        self.logger.info(f"Instance {instance_id} is now RUNNING")
+                    return ready
+            except Exception as e:
+                self.logger.error(f"Error checking instance status: {e}")
+            
+            interval = next(intervals)
+            creator.beat(interval)
+            if await self.sleep(creator, interval):
+                return False
+        
+        self.logger.warning(f"Instance {instance_id} did not reach RUNNING state within {creator.readiness_timeout} seconds")
+        return False
+    
+    async def launch(self, creator: VMCreator, attempt: int,
+                     availability_domains: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Async counterpart of VMCreator.launch_attempt; fan-out launches run on the bounded executor"""
+        display_name = creator.begin_attempt(attempt)
+        targets = await self.call(creator.launch_plan, availability_domains)
+        if len(targets) == 1:
+            return await self.call(creator.launch_in, display_name, targets[0])
+        
+        self.logger.info(f"Launching {display_name} in {len(targets)} availability domains concurrently")
+        
+        async def launch_in(availability_domain: str):
+            try:
+                return availability_domain, await self.call(creator.launch_in, display_name, availability_domain), None
+            except Exception as e:
+                return availability_domain, None, e
+        
+        outcomes = [await outcome for outcome in asyncio.as_completed([launch_in(ad) for ad in targets])]
+        return await self.call(creator.settle_fanout, outcomes)
+    
+    async def hunt(self, creator: VMCreator) -> Optional[Dict[str, Any]]:
+        """Async counterpart of VMCreator.create_vm_with_retry"""
+        if not await self.call(creator.start_hunt):
+            return None
+        
+        last_error = ""
+        attempt = creator.first_attempt - 1
+        
+        # Instances that were provisioning when the previous run stopped
+        for instance_id in await self.call(creator.pending_instances):
+            if await self.wait_for_instance_running(creator, instance_id):
+                return await self.call(creator.complete_launch, instance_id, attempt)
+            if self.stopped(creator):
+                return None
+            await self.call(creator.discard_instance, instance_id)
+        if creator.resume_wait and await self.wait_before_next_attempt(creator, creator.resume_wait):
+            return None
+        
+        for attempt in range(creator.first_attempt, creator.max_attempts + 1):
+            if self.stopped(creator):
+                return None
+            
+            try:
+                availability_domains = await self.wait_for_capacity(creator) if creator.capacity_check else None
+                if self.stopped(creator):
+                    return None
+                
+                instance_id = (await self.launch(creator, attempt, availability_domains))["instance_id"]
+                
+                if await self.wait_for_instance_running(creator, instance_id):
+                    return await self.call(creator.complete_launch, instance_id, attempt)
+                await self.call(creator.abandon_launch, instance_id)
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                last_error = str(e)
+                wait_time = await self.call(creator.handle_attempt_failure, attempt, e)
+                if wait_time is None:
+                    break
+                
+                if await self.wait_before_next_attempt(creator, wait_time):
+                    return None
+            
+            finally:
+                # Export the span of an attempt cut short by a stop or cancellation
+                creator.end_attempt_span("stopped")
+        
+        await self.call(creator.finish_hunt_failed, last_error, attempt)
+        return None
+    
+    async def hunt_continuous(self, creator: VMCreator) -> Optional[Dict[str, Any]]:
+        """Async counterpart of VMCreator.run_continuous"""
+        self.logger.info(f"Starting continuous VM creation mode for {creator.label}")
+        try:
+            return await self._hunt_continuous(creator)
+        finally:
+            creator.end_heartbeat()
+    
+    async def _hunt_continuous(self, creator: VMCreator) -> Optional[Dict[str, Any]]:
+        """Restart the hunt after failures until success, abort or stop"""
+        while not self.stopped(creator):
+            try:
+                result = await self.hunt(creator)
+                if result:
+                    return result
+                if self.stopped(creator):
+                    break
+                if creator.aborted:
+                    self.logger.error(f"VM creation aborted for {creator.label}, not restarting")
+                    break
+                
+                self.logger.error("VM creation failed after all attempts")
+                self.logger.info("Waiting 300 seconds before restarting the process...")
+                creator.beat(300)
+                await self.sleep(creator, 300)
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Unexpected error in continuous mode: {e}")
+                self.notify(creator.notifier.send_error_notification, f"Unexpected error: {e}")
+                creator.beat(60)
+                await self.sleep(creator, 60)
+        
+        return None
+    
+    def stop(self, creators: Optional[List[VMCreator]] = None) -> None:
+        """Request a graceful stop of the given (default: all) hunts' groups: their pending waits return immediately"""
+        for creator in self._creators if creators is None else creators:
+            if id(creator.stop_event) in self._stops:
+                self._stops[id(creator.stop_event)].set()
+            creator.stop_event.set()
+    
+    def _handle_signal(self) -> None:
+        """Stop on SIGINT/SIGTERM without waiting for in-flight attempts"""
+        self.logger.info("Received shutdown signal, cancelling all hunts...")
+        self.stop()
+        for task in self._tasks:
+            task.cancel()
+    
+    async def run_all(self, creators: List[VMCreator]) -> Dict[str, Dict[str, Any]]:
+        """Run every hunt; the first success among hunts sharing a stop_event stops the others of
+        that group (results keyed by hunt label)"""
+        labels = [creator.label for creator in creators]
+        if len(set(labels)) != len(labels):
+            raise ValueError(f"Hunt labels must be unique: {', '.join(labels)}")
+        
+        self._loop = asyncio.get_running_loop()
+        self._stops = {id(creator.stop_event): asyncio.Event() for creator in creators}
+        self._creators = creators
+        
+        for creator in creators:
+            creator.dispatch = self.notify
+        
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(sig, self._handle_signal)
+            except (NotImplementedError, RuntimeError):
+                # Not supported on this platform or outside the main thread
+                pass
+        
+        tasks = {}
+        for creator in creators:
+            task = asyncio.create_task(self.hunt_continuous(creator), name=f"hunt-{creator.label}")
+            tasks[task] = creator
+        self._tasks = list(tasks)
+        
+        results = {}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    if task.exception() is not None:
+                        self.logger.error(f"Hunt {task.get_name()} crashed: {task.exception()}")
+                        continue
+                    if task.result():
+                        winner = tasks[task]
+                        results[winner.label] = task.result()
+                        self.logger.info(f"VM created for {winner.label}, stopping the hunts it was racing")
+                        self.stop([creator for creator in creators if creator.stop_event is winner.stop_event])
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.notify_executor.shutdown(wait=False)
+        
+        return results
+    
+    def run(self, creators: List[VMCreator]) -> Dict[str, Dict[str, Any]]:
+        """Blocking entry point: run the hunts on a fresh event loop"""
+        return asyncio.run(self.run_all(creators))
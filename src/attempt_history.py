@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional, List
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    tenancy TEXT NOT NULL DEFAULT '',
+    region TEXT NOT NULL,
+    availability_domain TEXT,
+    attempt INTEGER,
+    ocpus REAL,
+    memory_gb REAL,
+    outcome TEXT NOT NULL,
+    action TEXT,
+    status INTEGER,
+    code TEXT,
+    opc_request_id TEXT,
+    duration_ms REAL,
+    api_calls TEXT
+);
+"""
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hourly_rollup (
+    hour_start INTEGER NOT NULL,
+    tenancy TEXT NOT NULL DEFAULT '',
+    region TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    total_duration_ms REAL NOT NULL,
+    PRIMARY KEY (hour_start, tenancy, region, outcome)
+)
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_attempts_ts ON attempts (ts);
+DROP INDEX IF EXISTS idx_attempts_region_ts;
+CREATE INDEX IF NOT EXISTS idx_attempts_region_tenancy_ts ON attempts (region, tenancy, ts);
+"""
+
+# Databases written before attempts were tagged with their tenancy: rows
+# keep an empty tenancy, the rollup is rebuilt with tenancy in its key
+MIGRATIONS = {
+    "attempts": ["ALTER TABLE attempts ADD COLUMN tenancy TEXT NOT NULL DEFAULT ''"],
+    "hourly_rollup": [
+        "ALTER TABLE hourly_rollup RENAME TO hourly_rollup_old",
+        ROLLUP_SCHEMA,
+        "INSERT INTO hourly_rollup (hour_start, region, outcome, attempts, total_duration_ms) "
+        "SELECT hour_start, region, outcome, attempts, total_duration_ms FROM hourly_rollup_old",
+        "DROP TABLE hourly_rollup_old"
+    ]
+}
+
+class AttemptHistory:
+    """Append-only SQLite store of launch attempts.
+    
+    Raw rows are indexed by time and by region and tenancy (several
+    tenancies can hunt into one database). Hourly rollups are kept
+    alongside, so pruning old raw rows does not lose long-run totals.
+    """
+    
+    def __init__(self, path: str, retention_days: Optional[float] = None):
+        """Open (or create) the history database"""
+        self.path = path
+        self.retention_days = retention_days
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(ROLLUP_SCHEMA)
+            self._migrate()
+            self._conn.executescript(INDEXES)
+            self._conn.commit()
+    
+    def _migrate(self) -> None:
+        """Add the tenancy column to tables created by older versions (caller holds the lock)"""
+        for table, statements in MIGRATIONS.items():
+            columns = [row["name"] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+            if "tenancy" in columns:
+                continue
+            self.logger.info(f"Adding tenancy to {table} in {self.path}")
+            for statement in statements:
+                self._conn.execute(statement)
+    
+    def record(self, region: str, outcome: str, availability_domain: Optional[str] = None,
+               attempt: Optional[int] = None, shape_config: Optional[Dict[str, Any]] = None,
+               error: Optional[Dict[str, Any]] = None, duration_ms: Optional[float] = None,
+               api_calls: Optional[List[Dict[str, Any]]] = None, ts: Optional[float] = None,
+               tenancy: Optional[str] = None) -> None:
+        """Append one attempt and update its hourly rollup"""
+        ts = ts if ts is not None else time.time()
+        tenancy = tenancy or ""
+        shape_config = shape_config or {}
+        error = error or {}
+        row = (
+            ts, tenancy, region, availability_domain, attempt,
+            shape_config.get("ocpus"), shape_config.get("memory_gb"),
+            outcome, error.get("action"), error.get("status"), error.get("code"),
+            error.get("opc_request_id"), duration_ms,
+            json.dumps(api_calls) if api_calls else None
+        )
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO attempts (ts, tenancy, region, availability_domain, attempt, ocpus, memory_gb, "
+                    "outcome, action, status, code, opc_request_id, duration_ms, api_calls) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row
+                )
+                self._conn.execute(
+                    "INSERT INTO hourly_rollup (hour_start, tenancy, region, outcome, attempts, total_duration_ms) "
+                    "VALUES (?, ?, ?, ?, 1, ?) "
+                    "ON CONFLICT (hour_start, tenancy, region, outcome) DO UPDATE SET "
+                    "attempts = attempts + 1, total_duration_ms = total_duration_ms + excluded.total_duration_ms",
+                    (int(ts // 3600 * 3600), tenancy, region, outcome, duration_ms or 0)
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Failed to record attempt in {self.path}: {e}")
+    
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              region: Optional[str] = None, limit: Optional[int] = None,
+              tenancy: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Raw attempts in a time range (optionally one region and/or tenancy), oldest first"""
+        sql = "SELECT * FROM attempts WHERE ts >= ? AND ts < ?"
+        params: List[Any] = [start or 0, end or time.time() + 1]
+        if region:
+            sql += " AND region = ?"
+            params.append(region)
+        if tenancy:
+            sql += " AND tenancy = ?"
+            params.append(tenancy)
+        sql += " ORDER BY ts"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+    
+    def rollup(self, start: Optional[float] = None, end: Optional[float] = None,
+               region: Optional[str] = None, tenancy: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Hourly attempt counts per tenancy, region and outcome"""
+        sql = "SELECT * FROM hourly_rollup WHERE hour_start >= ? AND hour_start < ?"
+        params: List[Any] = [start or 0, end or time.time() + 1]
+        if region:
+            sql += " AND region = ?"
+            params.append(region)
+        if tenancy:
+            sql += " AND tenancy = ?"
+            params.append(tenancy)
+        sql += " ORDER BY hour_start"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+    
+    def summary(self, start: Optional[float] = None, end: Optional[float] = None,
+                region: Optional[str] = None, tenancy: Optional[str] = None) -> Dict[str, int]:
+        """Total attempts per outcome over a time range (served from the rollups)"""
+        totals: Dict[str, int] = {}
+        for row in self.rollup(start, end, region, tenancy):
+            totals[row["outcome"]] = totals.get(row["outcome"], 0) + row["attempts"]
+        return totals
+    
+    def prune(self) -> int:
+        """Delete raw attempts older than the retention period; rollups are kept"""
+        if not self.retention_days:
+            return 0
+        cutoff = time.time() - self.retention_days * 86400
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM attempts WHERE ts < ?", (cutoff,)).rowcount
+            self._conn.commit()
+        if deleted:
+            self.logger.info(f"Pruned {deleted} attempts older than {self.retention_days} days from history")
+        return deleted
+
+_histories: Dict[str, AttemptHistory] = {}
+_histories_lock = threading.Lock()
+
+def get_attempt_history(config: Dict[str, Any]) -> Optional[AttemptHistory]:
+    """Return the process-wide history store for history_config (None if disabled)"""
+    history_config = config.get("history_config") or {}
+    if not history_config.get("enabled", True):
+        return None
+    
+    path = os.getenv("NOTIVM_HISTORY_PATH") or history_config.get("path", "/app/data/attempts.db")
+    with _histories_lock:
+        if path not in _histories:
+            try:
+                _histories[path] = AttemptHistory(path, history_config.get("retention_days", 30))
+            except (sqlite3.Error, OSError) as e:
+                logging.getLogger(__name__).warning(f"Attempt history disabled, cannot open {path}: {e}")
+                return None
+        return _histories[path]
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Summarize recorded VM creation attempts")
+    parser.add_argument("path", nargs="?", default="/app/data/attempts.db", help="History database path")
+    parser.add_argument("--days", type=float, default=7, help="Look back this many days (default: 7)")
+    parser.add_argument("--region", help="Only this region")
+    parser.add_argument("--tenancy", help="Only this tenancy OCID")
+    args = parser.parse_args()
+    
+    history = AttemptHistory(args.path)
+    since = time.time() - args.days * 86400
+    print(json.dumps(history.summary(since, region=args.region, tenancy=args.tenancy), indent=2))
@@ -0,0 +1,168 @@
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Tuple
+from state_file import atomic_write_json
+
+HOURS_PER_WEEK = 168
+
+def hour_of_week(when: Optional[datetime] = None) -> int:
+    """Hour index 0..167 (Monday 00:00 UTC = 0)"""
+    when = when or datetime.now(timezone.utc)
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc)
+    return when.weekday() * 24 + when.hour
+
+class CapacityStats:
+    """Success/out-of-capacity counts per region, AD and hour of week, persisted as JSON"""
+    
+    OUTCOMES = ("success", "out_of_capacity")
+    
+    def __init__(self, path: Optional[str]):
+        """Initialize stats backed by a JSON file (None: kept in memory only)"""
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Dict[str, List[int]]]] = self._load()
+    
+    def _load(self) -> Dict[str, Any]:
+        """Load counts, starting empty if the file is missing or corrupt"""
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable capacity stats {self.path}: {e}")
+            return {}
+    
+    def _save(self) -> None:
+        """Persist counts atomically (caller holds the lock)"""
+        if not self.path:
+            return
+        try:
+            atomic_write_json(self.path, self._data)
+        except OSError as e:
+            self.logger.warning(f"Failed to write capacity stats {self.path}: {e}")
+    
+    def record(self, region: str, availability_domain: str, outcome: str, hour: int) -> None:
+        """Count one launch outcome"""
+        self.record_many(region, [(availability_domain, outcome)], hour)
+    
+    def record_many(self, region: str, outcomes: List[Tuple[str, str]], hour: int) -> None:
+        """Count several (availability domain, outcome) observations of one hour with a single write"""
+        outcomes = [(ad, outcome) for ad, outcome in outcomes if outcome in self.OUTCOMES]
+        if not outcomes:
+            return
+        with self._lock:
+            for availability_domain, outcome in outcomes:
+                ad_stats = self._data.setdefault(region, {}).setdefault(availability_domain, {})
+                counts = ad_stats.setdefault(outcome, [0] * HOURS_PER_WEEK)
+                counts[hour] += 1
+            self._save()
+    
+    def copy(self) -> "CapacityStats":
+        """In-memory copy of the counts (changes are not persisted)"""
+        stats = CapacityStats(None)
+        with self._lock:
+            stats._data = json.loads(json.dumps(self._data))
+        return stats
+    
+    def counts(self, region: str, availability_domain: Optional[str] = None) -> Dict[str, List[int]]:
+        """Counts per outcome and hour for one AD, or summed over the region's ADs"""
+        with self._lock:
+            region_stats = self._data.get(region, {})
+            ads = [availability_domain] if availability_domain else list(region_stats)
+            totals = {outcome: [0] * HOURS_PER_WEEK for outcome in self.OUTCOMES}
+            for ad in ads:
+                for outcome in self.OUTCOMES:
+                    for hour, count in enumerate(region_stats.get(ad, {}).get(outcome, [])):
+                        totals[outcome][hour] += count
+            return totals
+
+_stats: Dict[str, CapacityStats] = {}
+_stats_lock = threading.Lock()
+
+def get_capacity_stats(path: str) -> CapacityStats:
+    """Return the process-wide stats store for a path"""
+    with _stats_lock:
+        if path not in _stats:
+            _stats[path] = CapacityStats(path)
+        return _stats[path]
+
+class CapacityScheduler:
+    """Spends a fixed daily launch budget where capacity has historically appeared.
+    
+    Each hour of the week gets a Beta-smoothed success probability learned
+    from past launches and capacity probes. Probes sample every hour at the
+    same steady rate, so they carry most of the signal; launches alone would
+    make the most-tried hours look worst. Outcomes are recorded even while
+    the scheduler is disabled, so it starts with data. The weekly budget is split across hours in
+    proportion to those probabilities, which gives the launch interval for
+    the current hour.
+    """
+    
+    def __init__(self, config: Dict[str, Any], region: str, clock=None):
+        """Initialize scheduler for a region from scheduler_config (clock: time source with time())"""
+        self.region = region
+        self.logger = logging.getLogger(__name__)
+        self.clock = clock or time
+        
+        scheduler_config = config.get("scheduler_config") or {}
+        self.enabled = bool(scheduler_config.get("enabled", False))
+        self.daily_budget = scheduler_config.get("daily_budget", 1440)
+        self.min_interval = scheduler_config.get("min_interval", 20)
+        self.max_interval = scheduler_config.get("max_interval", 900)
+        # Prior: roughly one success in prior_successes + prior_failures launches
+        self.prior_successes = scheduler_config.get("prior_successes", 1)
+        self.prior_failures = scheduler_config.get("prior_failures", 50)
+        # Share of an hour's weight borrowed from its neighbours (smooths sparse data)
+        self.neighbour_weight = scheduler_config.get("neighbour_weight", 0.25)
+        
+        self.stats = get_capacity_stats(scheduler_config.get("stats_path", "/app/data/capacity_stats.json"))
+    
+    def now(self) -> datetime:
+        """Current time of the scheduler's clock (UTC)"""
+        return datetime.fromtimestamp(self.clock.time(), timezone.utc)
+    
+    def record(self, availability_domain: Optional[str], outcome: str, when: Optional[datetime] = None) -> None:
+        """Learn from one launch outcome ("success" or "out_of_capacity")"""
+        self.stats.record(self.region, availability_domain or "*", outcome, hour_of_week(when or self.now()))
+    
+    def record_probe(self, reports: Dict[str, bool], when: Optional[datetime] = None) -> None:
+        """Learn from one capacity probe: per AD, whether it reported room (AVAILABLE)"""
+        self.stats.record_many(self.region, [
+            (availability_domain, "success" if available else "out_of_capacity")
+            for availability_domain, available in reports.items()
+        ], hour_of_week(when or self.now()))
+    
+    def hourly_probabilities(self, availability_domain: Optional[str] = None) -> List[float]:
+        """Smoothed success probability for each hour of the week"""
+        counts = self.stats.counts(self.region, availability_domain)
+        raw = [
+            (successes + self.prior_successes)
+            / (successes + failures + self.prior_successes + self.prior_failures)
+            for successes, failures in zip(counts["success"], counts["out_of_capacity"])
+        ]
+        return [
+            (1 - 2 * self.neighbour_weight) * raw[hour]
+            + self.neighbour_weight * (raw[hour - 1] + raw[(hour + 1) % HOURS_PER_WEEK])
+            for hour in range(HOURS_PER_WEEK)
+        ]
+    
+    def next_wait(self, when: Optional[datetime] = None) -> int:
+        """Seconds until the next launch according to the current hour's share of the budget"""
+        probabilities = self.hourly_probabilities()
+        share = probabilities[hour_of_week(when or self.now())] / sum(probabilities)
+        launches_this_hour = self.daily_budget * 7 * share
+        interval = 3600 / launches_this_hour if launches_this_hour > 0 else self.max_interval
+        return int(min(max(interval, self.min_interval), self.max_interval))
+    
+    def rank_availability_domains(self, availability_domains: List[str], when: Optional[datetime] = None) -> List[str]:
+        """Order ADs by their success probability for the current hour (stable for ties)"""
+        hour = hour_of_week(when or self.now())
+        return sorted(availability_domains, key=lambda ad: -self.hourly_probabilities(ad)[hour])
@@ -0,0 +1,73 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+from state_file import atomic_write_json
+
+class CheckpointStore:
+    """Hunt state per key (region) in one JSON file, rewritten atomically.
+    
+    Every write goes through atomic_write_json, so a crash leaves either
+    the previous or the new checkpoint.
+    """
+    
+    def __init__(self, path: str):
+        """Initialize store backed by a JSON file"""
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = self._load()
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load checkpoints, starting empty if the file is missing or corrupt"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return {}
+    
+    def _save(self) -> None:
+        """Persist checkpoints durably and atomically (caller holds the lock)"""
+        try:
+            atomic_write_json(self.path, self._data)
+        except OSError as e:
+            self.logger.warning(f"Failed to write checkpoint {self.path}: {e}")
+    
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the saved state for a key, if any"""
+        with self._lock:
+            state = self._data.get(key)
+            return dict(state) if state else None
+    
+    def save(self, key: str, state: Dict[str, Any]) -> None:
+        """Replace the saved state for a key"""
+        with self._lock:
+            self._data[key] = dict(state, saved_at=time.time())
+            self._save()
+    
+    def clear(self, key: str) -> None:
+        """Forget the saved state for a key (hunt finished)"""
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._save()
+
+_stores: Dict[str, CheckpointStore] = {}
+_stores_lock = threading.Lock()
+
+def get_checkpoint_store(config: Dict[str, Any]) -> Optional[CheckpointStore]:
+    """Return the process-wide checkpoint store for checkpoint_config (None if disabled)"""
+    checkpoint_config = config.get("checkpoint_config") or {}
+    if not checkpoint_config.get("enabled", True):
+        return None
+    
+    path = os.getenv("NOTIVM_CHECKPOINT_PATH") or checkpoint_config.get("path", "/app/data/checkpoint.json")
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = CheckpointStore(path)
+        return _stores[path]
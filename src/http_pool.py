@@ -0,0 +1,53 @@
+import logging
+import threading
+import requests
+from typing import Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+def build_session(pool_connections: int = 4, pool_maxsize: int = 10, requests_module=requests) -> requests.Session:
+    """Create a keep-alive session with a size-limited connection pool (from the given requests copy)"""
+    session = requests_module.Session()
+    adapter = requests_module.adapters.HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_shared_session(name: str, config: Dict[str, Any], requests_module=requests) -> requests.Session:
+    """Return the process-wide session for a name (e.g. "oci:<tenancy>:us-ashburn-1", "telegram").
+    
+    OCI SDK clients need a session of the SDK's vendored requests
+    (oci._vendor.requests): the SDK only translates, and retries, the
+    connection errors of its own copy.
+    """
+    connection_config = config.get("connection_config") or {}
+    with _sessions_lock:
+        if name not in _sessions:
+            _sessions[name] = build_session(
+                pool_connections=connection_config.get("pool_connections", 4),
+                pool_maxsize=connection_config.get("pool_maxsize", 10),
+                requests_module=requests_module
+            )
+            logger.debug(f"Created shared HTTP session: {name}")
+        return _sessions[name]
+
+def share_session(clients: List[Any], session: requests.Session) -> None:
+    """Make OCI SDK clients send their requests through one pooled session"""
+    for client in clients:
+        client.base_client.session = session
+
+def prewarm(session: requests.Session, urls: List[str], timeout: float = 5) -> int:
+    """Open (or refresh) pooled connections ahead of time; returns how many succeeded"""
+    warmed = 0
+    for url in urls:
+        try:
+            # Any response means the TCP+TLS connection is now in the pool
+            session.head(url, timeout=timeout)
+            warmed += 1
+        except OSError as e:
+            # RequestException of requests and of the SDK's vendored copy are both OSErrors
+            logger.debug(f"Pre-warm of {url} failed: {e}")
+    return warmed
@@ -0,0 +1,127 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Callable, Tuple
+from resource_cache import get_resource_cache
+
+class ImageResolver:
+    """Resolves the newest platform image OCID for an OS/version/shape.
+    
+    Results are kept per region and shape in memory and in the resource
+    cache, and re-resolved once older than image_config.refresh_interval.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize resolver from image_config"""
+        self.logger = logging.getLogger(__name__)
+        
+        image_config = config.get("image_config") or {}
+        self.enabled = image_config.get("enabled", True)
+        self.operating_system = image_config.get("operating_system", "Canonical Ubuntu")
+        self.operating_system_version = str(image_config.get("operating_system_version", "22.04"))
+        self.refresh_interval = image_config.get("refresh_interval", 21600)
+        
+        self.resource_cache = get_resource_cache(config)
+        self._images: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def _cache_scope(self, region: str) -> str:
+        """Images are public per region, so they are cached outside any tenancy scope"""
+        return f"images/{region}"
+    
+    def _cache_name(self, shape: str) -> str:
+        """Cache entry name for an OS/version/shape combination"""
+        return f"{self.operating_system}/{self.operating_system_version}/{shape}"
+    
+    def _lookup(self, region: str, shape: str) -> Optional[Dict[str, Any]]:
+        """Return the remembered image entry for a region/shape, if any"""
+        with self._lock:
+            entry = self._images.get((region, shape))
+        if entry is None and self.resource_cache is not None:
+            entry = self.resource_cache.get(self._cache_scope(region), self._cache_name(shape))
+            if entry:
+                with self._lock:
+                    self._images[(region, shape)] = entry
+        return entry
+    
+    def _remember(self, region: str, shape: str, image_id: str) -> None:
+        """Store a freshly resolved image in memory and on disk"""
+        entry = {"image_id": image_id, "resolved_at": time.time()}
+        with self._lock:
+            self._images[(region, shape)] = entry
+        if self.resource_cache is not None:
+            self.resource_cache.set(self._cache_scope(region), self._cache_name(shape), entry)
+    
+    def resolve(self, list_images: Callable[..., Any], compartment_id: str, region: str, shape: str) -> Optional[str]:
+        """Return the newest matching image, refreshing it when the cached one is old"""
+        if not self.enabled:
+            return None
+        
+        entry = self._lookup(region, shape)
+        if entry and time.time() - entry.get("resolved_at", 0) < self.refresh_interval:
+            return entry["image_id"]
+        
+        try:
+            images = list_images(
+                compartment_id=compartment_id,
+                operating_system=self.operating_system,
+                operating_system_version=self.operating_system_version,
+                shape=shape,
+                lifecycle_state="AVAILABLE",
+                sort_by="TIMECREATED",
+                sort_order="DESC",
+                limit=1
+            ).data
+        except Exception as e:
+            self.logger.warning(f"Image lookup failed in {region}: {e}")
+            # A stale image is still better than none; launch errors will invalidate it
+            return entry["image_id"] if entry else None
+        
+        if not images:
+            self.logger.warning(f"No {self.operating_system} {self.operating_system_version} image for {shape} in {region}")
+            return entry["image_id"] if entry else None
+        
+        image = images[0]
+        if not entry or entry.get("image_id") != image.id:
+            self.logger.info(f"Resolved image for {region}/{shape}: {image.display_name} ({image.id})")
+        self._remember(region, shape, image.id)
+        return image.id
+    
+    def invalidate(self, region: str, shape: str) -> None:
+        """Forget the image for a region/shape so the next launch re-resolves it"""
+        with self._lock:
+            self._images.pop((region, shape), None)
+        if self.resource_cache is not None:
+            self.resource_cache.invalidate(self._cache_scope(region), self._cache_name(shape))
+    
+    def warm(self, regions: List[str], shape: str, compartment_id: str,
+             client_factory: Callable[[str], Any]) -> Dict[str, Optional[str]]:
+        """Resolve images for several regions in parallel (client_factory returns list_images per region)"""
+        if not self.enabled or not regions:
+            return {}
+        
+        def resolve_region(region: str) -> Optional[str]:
+            try:
+                return self.resolve(client_factory(region), compartment_id, region, shape)
+            except Exception as e:
+                self.logger.warning(f"Image warm-up failed for {region}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=len(regions), thread_name_prefix="image-warm") as executor:
+            results = dict(zip(regions, executor.map(resolve_region, regions)))
+        
+        resolved = sum(1 for image_id in results.values() if image_id)
+        self.logger.info(f"Image cache warmed for {resolved}/{len(regions)} regions")
+        return results
+
+_resolver: Optional[ImageResolver] = None
+_resolver_lock = threading.Lock()
+
+def get_image_resolver(config: Dict[str, Any]) -> ImageResolver:
+    """Return the process-wide image resolver"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = ImageResolver(config)
+        return _resolver
@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, List
+from vm_creator import VMCreator
+from notifier import Notifier, get_notifier
+from state_file import atomic_write_json
+
+class HuntJob:
+    """One hunt request (region, shape, retry policy) and its progress"""
+    
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    ABORTED = "aborted"
+    STOPPED = "stopped"
+    ACTIVE = (QUEUED, RUNNING)
+    
+    def __init__(self, job_id: str, spec: Dict[str, Any]):
+        """Initialize a queued job"""
+        self.job_id = job_id
+        self.spec = spec
+        self.status = self.QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stop_event = threading.Event()
+        self.stop_reason: Optional[str] = None
+        self.creator: Optional[VMCreator] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Status view for the job API"""
+        max_attempts = self.creator.max_attempts if self.creator else self.spec.get("maxRetries")
+        attempt = self.creator.attempt if self.creator else 0
+        last_failure = self.creator.last_failure if self.creator else None
+        return {
+            "jobId": self.job_id,
+            "status": self.status,
+            "region": self.spec.get("region"),
+            "shape": self.spec.get("shape"),
+            "currentAttempt": attempt,
+            "maxAttempts": max_attempts,
+            "progress": int(attempt * 100 / max_attempts) if max_attempts else 0,
+            "lastError": last_failure.to_dict() if last_failure else self.error,
+            "stopReason": self.stop_reason,
+            "result": self.result,
+            "createdAt": datetime.fromtimestamp(self.created_at).isoformat(),
+            "startedAt": datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            "finishedAt": datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None
+        }
+
+class JobManager:
+    """Runs many independent hunt jobs on a bounded worker pool.
+    
+    Every job gets its own VMCreator and stop event; jobs beyond
+    max_concurrent_jobs wait in submission order. Running jobs of one
+    tenancy each hold an equal share of its rate limiter's budget, so a job
+    with a short retryInterval (floored at min_retry_interval) only slows
+    itself down. Job specs are persisted, and unfinished jobs resume from
+    their checkpoints after a restart.
+    """
+    
+    def __init__(self, config: Dict[str, Any], notifier: Optional[Notifier] = None):
+        """Initialize the manager from job_config"""
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        
+        job_config = config.get("job_config") or {}
+        self.max_concurrent_jobs = job_config.get("max_concurrent_jobs", 4)
+        self.jobs_path = os.getenv("NOTIVM_JOBS_PATH") or job_config.get("jobs_path", "/app/data/jobs.json")
+        # Finished jobs stay queryable (and in jobs.json) this long
+        self.finished_retention = job_config.get("finished_retention", 86400)
+        self.min_retry_interval = job_config.get("min_retry_interval", 10)
+        
+        self.notifier = notifier or get_notifier(config)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrent_jobs, thread_name_prefix="hunt-job")
+        self._jobs: Dict[str, HuntJob] = {}
+        self._lock = threading.Lock()
+        self._shutting_down = False
+        
+        self.logger.info(f"Job manager initialized (max_concurrent_jobs={self.max_concurrent_jobs})")
+    
+    @staticmethod
+    def validate_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Check a job spec (start_vm_creation parameters) and fill in defaults"""
+        if not isinstance(spec, dict) or not spec.get("region"):
+            raise ValueError("Job spec requires a region")
+        spec = dict(spec)
+        spec.setdefault("shape", os.getenv("VM_SHAPE", "VM.Standard.A1.Flex"))
+        for key in ("ocpus", "memory", "storage", "maxRetries", "retryInterval", "maxWait"):
+            if key in spec and (not isinstance(spec[key], (int, float)) or spec[key] <= 0):
+                raise ValueError(f"{key} must be a positive number")
+        return spec
+    
+    def submit(self, spec: Dict[str, Any], job_id: Optional[str] = None) -> HuntJob:
+        """Queue a hunt job; it starts as soon as a worker is free"""
+        spec = self.validate_spec(spec)
+        job = HuntJob(job_id or f"vm-job-{uuid.uuid4().hex[:12]}", spec)
+        with self._lock:
+            if self._shutting_down:
+                raise RuntimeError("Job manager is shutting down")
+            self._jobs[job.job_id] = job
+            job.future = self.executor.submit(self._run, job)
+            self._prune()
+            self._save()
+        
+        self.logger.info(f"Job {job.job_id} queued: {spec['region']} {spec['shape']}")
+        return job
+    
+    def get(self, job_id: str) -> Optional[HuntJob]:
+        """Look up a job by ID"""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Status of every job, oldest first"""
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda job: job.created_at)
+        return [job.to_dict() for job in jobs]
+    
+    def stop(self, job_id: str, reason: Optional[str] = None) -> bool:
+        """Stop a queued or running job; False if there is no such active job"""
+        job = self.get(job_id)
+        if not job or job.status not in HuntJob.ACTIVE:
+            return False
+        
+        job.stop_reason = reason or "user request"
+        job.stop_event.set()
+        if job.future and job.future.cancel():
+            self._finish(job, HuntJob.STOPPED)
+        self.logger.info(f"Stop requested for job {job_id}: {job.stop_reason}")
+        return True
+    
+    def shutdown(self) -> None:
+        """Stop all workers; active jobs stay persisted and resume after a restart"""
+        with self._lock:
+            self._shutting_down = True
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.stop_event.set()
+            if job.creator:
+                job.creator.stop_upsize()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def resume_saved_jobs(self) -> int:
+        """Resubmit the jobs that were still active when the process last stopped"""
+        try:
+            with open(self.jobs_path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable job list {self.jobs_path}: {e}")
+            return 0
+        
+        resumed = 0
+        for entry in saved:
+            if entry.get("status") in HuntJob.ACTIVE:
+                try:
+                    self.submit(entry["spec"], job_id=entry["jobId"])
+                    resumed += 1
+                except (KeyError, ValueError) as e:
+                    self.logger.warning(f"Skipping saved job {entry.get('jobId')}: {e}")
+        if resumed:
+            self.logger.info(f"Resumed {resumed} job(s) from {self.jobs_path}")
+        return resumed
+    
+    def _prune(self) -> None:
+        """Forget jobs that finished more than finished_retention seconds ago (caller holds the lock)"""
+        cutoff = time.time() - self.finished_retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.status not in HuntJob.ACTIVE and job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if expired:
+            self.logger.info(f"Pruned {len(expired)} finished job(s)")
+    
+    def _save(self) -> None:
+        """Persist job specs and states atomically (caller holds the lock)"""
+        try:
+            atomic_write_json(self.jobs_path, [
+                {"jobId": job.job_id, "spec": job.spec, "status": job.status}
+                for job in self._jobs.values()
+            ])
+        except OSError as e:
+            self.logger.warning(f"Failed to write job list {self.jobs_path}: {e}")
+    
+    def _finish(self, job: HuntJob, status: str) -> None:
+        """Record the final state of a job"""
+        with self._lock:
+            job.status = status
+            job.finished_at = time.time()
+            self._prune()
+            self._save()
+    
+    def build_creator(self, job: HuntJob) -> VMCreator:
+        """Create the VMCreator for a job's region, shape and retry policy"""
+        spec = job.spec
+        creator = VMCreator(self.config, region=spec["region"], notifier=self.notifier,
+                            stop_event=job.stop_event)
+        creator.checkpoint_key = creator.label = f"job:{job.job_id}"
+        creator.oci_client.rate_share = creator.label
+        
+        # An explicit shape replaces the configured shape ladder
+        creator.shape_ladder = []
+        shape_override = {"shape": spec["shape"]}
+        if "ocpus" in spec:
+            shape_override["ocpus"] = spec["ocpus"]
+        if "memory" in spec:
+            shape_override["memory_gb"] = spec["memory"]
+        if "storage" in spec:
+            shape_override["boot_volume_size_gb"] = spec["storage"]
+        creator.oci_client.shape_override = shape_override
+        
+        if "maxRetries" in spec:
+            creator.max_attempts = int(spec["maxRetries"])
+        if "retryInterval" in spec:
+            creator.initial_wait = max(spec["retryInterval"], self.min_retry_interval)
+        if "maxWait" in spec:
+            creator.max_wait = spec["maxWait"]
+        if spec.get("displayName"):
+            creator.display_name_prefix = spec["displayName"]
+        return creator
+    
+    def _run(self, job: HuntJob) -> None:
+        """Worker: run one job's hunt to completion"""
+        if job.stop_event.is_set():
+            self._finish(job, HuntJob.STOPPED)
+            return
+        
+        with self._lock:
+            job.status = HuntJob.RUNNING
+            job.started_at = time.time()
+            self._save()
+        
+        try:
+            job.creator = self.build_creator(job)
+            job.creator.oci_client.rate_limiter.add_share(job.creator.label)
+            try:
+                job.result = job.creator.create_vm_with_retry()
+            finally:
+                job.creator.oci_client.rate_limiter.remove_share(job.creator.label)
+        except Exception as e:
+            self.logger.error(f"Job {job.job_id} crashed: {e}", exc_info=True)
+            job.error = str(e)
+            self._finish(job, HuntJob.FAILED)
+            return
+        finally:
+            if job.creator:
+                job.creator.end_heartbeat()
+        
+        if job.result:
+            self._finish(job, HuntJob.SUCCEEDED)
+            self.logger.info(f"Job {job.job_id} succeeded: {job.result.get('instance_id')}")
+        elif self._shutting_down:
+            # Keep the job active on disk so it resumes after the restart
+            self.logger.info(f"Job {job.job_id} interrupted by shutdown")
+        elif job.stop_event.is_set():
+            job.creator.clear_checkpoint()
+            self._finish(job, HuntJob.STOPPED)
+        else:
+            self._finish(job, HuntJob.ABORTED if job.creator.aborted else HuntJob.FAILED)
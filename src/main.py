@@ -2,35 +2,121 @@
 import os
 import sys
 import logging
-import yaml
 import argparse
+import importlib
 import signal
 from pathlib import Path
-from dotenv import load_dotenv
-from vm_creator import VMCreator
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import metrics
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
 import threading
 import json
 from datetime import datetime
 
+# The hunt modules (OCI SDK, requests, yaml) are imported where they are first
+# used, so --help, argument errors, logging and the health server come up
+# without waiting for them.
+
 class HealthCheckHandler(BaseHTTPRequestHandler):
-    """Simple health check handler for Docker"""
+    """Health check handler for Docker, plus the hunt job API in jobs mode"""
+    
+    # Set by NotivmApp in jobs mode
+    job_manager = None
+    # Seconds a hunt loop may be overdue with its heartbeat before /health fails
+    heartbeat_grace = 300
+    
+    def route(self):
+        """Request path without the query string, plus the job ID for /jobs/<id>"""
+        path = urlsplit(self.path).path
+        if path.startswith('/jobs/'):
+            job_id = path[len('/jobs/'):]
+            if job_id and '/' not in job_id:
+                return '/jobs', job_id
+        return path, None
     
     def do_GET(self):
-        if self.path == '/health':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
+        path, job_id = self.route()
+        if path == '/health':
+            stale = metrics.stale_hunts(self.heartbeat_grace)
             response = {
-                'status': 'healthy',
+                'status': 'unhealthy' if stale else 'healthy',
                 'service': 'notivm',
                 'timestamp': str(datetime.now())
             }
-            self.wfile.write(json.dumps(response).encode())
+            if stale:
+                response['stale_hunts'] = stale
+            self.send_json(503 if stale else 200, response)
+        elif path == '/metrics':
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == '/jobs':
+            if not self.check_job_api():
+                return
+            if not job_id:
+                self.send_json(200, {'jobs': self.job_manager.list_jobs()})
+                return
+            job = self.job_manager.get(job_id)
+            if job:
+                self.send_json(200, job.to_dict())
+            else:
+                self.send_json(404, {'error': f'Unknown job: {job_id}'})
         else:
             self.send_response(404)
             self.end_headers()
     
+    def do_POST(self):
+        """Submit a hunt job (start_vm_creation parameters as JSON)"""
+        if self.route() != ('/jobs', None):
+            self.send_response(404)
+            self.end_headers()
+            return
+        if not self.check_job_api():
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            spec = json.loads(self.rfile.read(length) or b'{}')
+            job = self.job_manager.submit(spec)
+        except (ValueError, RuntimeError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        self.send_json(202, job.to_dict())
+    
+    def do_DELETE(self):
+        """Stop a hunt job"""
+        path, job_id = self.route()
+        if path != '/jobs' or not job_id:
+            self.send_response(404)
+            self.end_headers()
+            return
+        if not self.check_job_api():
+            return
+        if self.job_manager.stop(job_id, self.headers.get('X-Stop-Reason')):
+            self.send_json(200, self.job_manager.get(job_id).to_dict())
+        else:
+            self.send_json(404, {'error': f'No active job: {job_id}'})
+    
+    def check_job_api(self) -> bool:
+        """Answer with an error unless the job API is enabled and the caller is authorized"""
+        if self.job_manager is None:
+            self.send_json(404, {'error': 'Job API is only available in jobs mode'})
+            return False
+        token = os.getenv("NOTIVM_API_TOKEN")
+        if token and self.headers.get('Authorization') != f'Bearer {token}':
+            self.send_json(401, {'error': 'Unauthorized'})
+            return False
+        return True
+    
+    def send_json(self, status: int, body: dict):
+        """Send a JSON response"""
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(body, default=str).encode())
+    
     def log_message(self, format, *args):
         # Suppress default log messages
         pass
@@ -38,10 +124,13 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
 class NotivmApp:
     def __init__(self):
         self.vm_creator = None
+        self.job_manager = None
         self.health_server = None
         self.logger = None
         self.running = True
-        
+        self.stop_event = threading.Event()
+        self.profile_stop_events = []
+    
     def setup_logging(self, log_level: str = "INFO", log_file: str = None):
         """Setup logging configuration"""
         # Create logs directory if it doesn't exist
@@ -69,6 +158,7 @@ class NotivmApp:
     
     def load_config(self, config_path: str) -> dict:
         """Load configuration from YAML file"""
+        import yaml
         try:
             with open(config_path, 'r', encoding='utf-8') as file:
                 config = yaml.safe_load(file)
@@ -81,17 +171,18 @@ class NotivmApp:
             self.logger.error(f"Error parsing configuration file: {e}")
             sys.exit(1)
     
-    def validate_environment(self):
+    def validate_environment(self, mode: str = "continuous"):
         """Validate required environment variables"""
         required_vars = [
             "OCI_USER_OCID",
             "OCI_TENANCY_OCID",
             "OCI_REGION",
             "OCI_FINGERPRINT",
-            "OCI_PRIVATE_KEY_PATH",
-            "TELEGRAM_BOT_TOKEN",
-            "TELEGRAM_CHAT_ID"
+            "OCI_PRIVATE_KEY_PATH"
         ]
+        if mode == "multi-tenancy":
+            # OCI credentials come from config.yaml profiles, validated when they are loaded
+            required_vars = []
         
         missing_vars = []
         for var in required_vars:
@@ -105,17 +196,17 @@ class NotivmApp:
         
         # Check if OCI private key file exists
         key_path = os.getenv("OCI_PRIVATE_KEY_PATH")
-        if not os.path.exists(key_path):
+        if mode != "multi-tenancy" and not os.path.exists(key_path):
             self.logger.error(f"OCI private key file not found: {key_path}")
             sys.exit(1)
         
         self.logger.info("Environment validation passed")
     
     def start_health_server(self, port: int = 8080):
-        """Start health check HTTP server"""
+        """Start health check HTTP server (one thread per request, so a slow /jobs client never delays /health)"""
         try:
             server_address = ('', port)
-            self.health_server = HTTPServer(server_address, HealthCheckHandler)
+            self.health_server = ThreadingHTTPServer(server_address, HealthCheckHandler)
             
             # Start server in a separate thread
             server_thread = threading.Thread(
@@ -124,7 +215,7 @@ class NotivmApp:
             )
             server_thread.start()
             self.logger.info(f"Health check server started on port {port}")
-            
+        
         except Exception as e:
             self.logger.warning(f"Failed to start health check server: {e}")
     
@@ -132,17 +223,175 @@ class NotivmApp:
         """Handle shutdown signals"""
         self.logger.info(f"Received signal {signum}, shutting down gracefully...")
         self.running = False
+        self.stop_event.set()
+        for stop_event in self.profile_stop_events:
+            stop_event.set()
+        if self.vm_creator:
+            self.vm_creator.stop_upsize()
+        if self.job_manager:
+            self.job_manager.shutdown()
         if self.health_server:
             self.health_server.shutdown()
         sys.exit(0)
     
-    def run(self, mode: str = "continuous"):
+    def get_hunt_regions(self, config: dict) -> list:
+        """Regions to hunt in multi-region mode (OCI_HUNT_REGIONS or all region_configs)"""
+        hunt_regions = os.getenv("OCI_HUNT_REGIONS")
+        if hunt_regions:
+            return [region.strip() for region in hunt_regions.split(",") if region.strip()]
+        return list((config.get("region_configs") or {}).keys())
+    
+    def run_multi_region(self, config: dict, engine: str = "threads"):
+        """Hunt every configured region in this process, stopping all on first success"""
+        regions = self.get_hunt_regions(config)
+        if not regions:
+            self.logger.error("No regions configured for multi-region mode")
+            sys.exit(1)
+        
+        self.logger.info(f"Starting multi-region VM creation mode: {', '.join(regions)}")
+        from notifier import get_notifier
+        from vm_creator import VMCreator
+        
+        # One notifier for all workers; each worker owns its region's OCIClient
+        notifier = get_notifier(config)
+        creators = [
+            VMCreator(config, region=region, notifier=notifier, stop_event=self.stop_event)
+            for region in regions
+        ]
+        creators[0].oci_client.warm_image_cache(
+            regions, {creator.region: creator.oci_client.compute_client for creator in creators}
+        )
+        
+        if engine == "asyncio":
+            from async_engine import AsyncHuntEngine
+            results = AsyncHuntEngine(config).run(creators)
+            self.clear_losing_checkpoints(creators, results)
+            self.upsize_winners(creators, results)
+            return results
+        
+        results = {}
+        
+        def worker(creator: VMCreator):
+            result = creator.run_continuous()
+            if result:
+                results[creator.region] = result
+                self.logger.info(f"VM created in {creator.region}, stopping other regions")
+                self.stop_event.set()
+        
+        threads = []
+        for creator in creators:
+            thread = threading.Thread(target=worker, args=(creator,), name=f"hunt-{creator.region}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        
+        for thread in threads:
+            thread.join()
+        
+        self.clear_losing_checkpoints(creators, results)
+        self.upsize_winners(creators, results)
+        return results
+    
+    def run_multi_tenancy(self, config: dict, engine: str = "threads"):
+        """Hunt every credential profile independently; within a profile the first region to succeed stops the rest"""
+        from oci_profiles import load_profiles
+        from notifier import get_notifier
+        from vm_creator import VMCreator
+        try:
+            profiles = load_profiles(config)
+        except Exception as e:
+            self.logger.error(f"Failed to load OCI profiles: {e}")
+            sys.exit(1)
+        if not profiles:
+            self.logger.error("No profiles configured for multi-tenancy mode")
+            sys.exit(1)
+        
+        # One notifier for all hunts; each profile has its own stop event, signer,
+        # rate-limit budget and cache scope (both keyed by tenancy)
+        notifier = get_notifier(config)
+        hunts = {}
+        for profile in profiles:
+            stop_event = threading.Event()
+            self.profile_stop_events.append(stop_event)
+            creators = [
+                VMCreator(config, region=region, notifier=notifier, stop_event=stop_event, profile=profile)
+                for region in profile["regions"]
+            ]
+            creators[0].oci_client.warm_image_cache(
+                profile["regions"], {creator.region: creator.oci_client.compute_client for creator in creators}
+            )
+            hunts[profile["name"]] = creators
+        
+        if engine == "asyncio":
+            # A profile's regions share its stop event, so the engine races them per profile
+            from async_engine import AsyncHuntEngine
+            results = AsyncHuntEngine(config).run([creator for creators in hunts.values() for creator in creators])
+        else:
+            results = {}
+            
+            def worker(creator: VMCreator):
+                result = creator.run_continuous()
+                if result:
+                    results[creator.label] = result
+                    self.logger.info(f"VM created for {creator.label}, stopping the profile's other regions")
+                    creator.stop_event.set()
+            
+            threads = []
+            for creators in hunts.values():
+                for creator in creators:
+                    thread = threading.Thread(target=worker, args=(creator,), name=f"hunt-{creator.label}", daemon=True)
+                    thread.start()
+                    threads.append(thread)
+            
+            for thread in threads:
+                thread.join()
+        
+        for creators in hunts.values():
+            profile_results = {creator.label: results[creator.label] for creator in creators if creator.label in results}
+            self.clear_losing_checkpoints(creators, profile_results)
+        # Each tenancy's winner keeps growing towards the top shape rung independently
+        upsize_threads = [
+            threading.Thread(target=self.upsize_winners, args=(creators, results), daemon=True)
+            for creators in hunts.values()
+        ]
+        for thread in upsize_threads:
+            thread.start()
+        for thread in upsize_threads:
+            thread.join()
+        return results
+    
+    def run_jobs(self, config: dict):
+        """Serve the hunt job API until shutdown (POST/GET /jobs, GET/DELETE /jobs/<id>)"""
+        from job_manager import JobManager
+        self.job_manager = JobManager(config)
+        HealthCheckHandler.job_manager = self.job_manager
+        self.job_manager.resume_saved_jobs()
+        self.logger.info("Job mode ready: submit hunts with POST /jobs on the health server port")
+        self.stop_event.wait()
+    
+    def clear_losing_checkpoints(self, creators: list, results: dict):
+        """Once a region has won, the other regions must not resume their hunts after a restart"""
+        if results:
+            for creator in creators:
+                if creator.label not in results:
+                    creator.clear_checkpoint()
+    
+    def upsize_winners(self, creators: list, results: dict):
+        """Grow VMs that were launched on a lower shape ladder rung, once hunting has stopped"""
+        for creator in creators:
+            if creator.label in results:
+                creator.run_upsize_loop(results[creator.label])
+    
+    def run(self, mode: str = "continuous", engine: str = "threads"):
         """Main application run method"""
         # Setup signal handlers
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
         
+        # Health server first: it answers while the hunt modules are still loading
+        self.start_health_server()
+        
         # Load environment variables
+        from dotenv import load_dotenv
         env_file = os.getenv("ENV_FILE", "/app/config/.env")
         if os.path.exists(env_file):
             load_dotenv(env_file)
@@ -151,22 +400,55 @@ class NotivmApp:
             self.logger.warning(f"Environment file not found: {env_file}, using system environment")
         
         # Validate environment
-        self.validate_environment()
+        self.validate_environment(mode)
         
         # Load configuration
         config_path = "/app/config/config.yaml"
         config = self.load_config(config_path)
         
-        # Start health check server
-        self.start_health_server()
+        # Notification destinations (Telegram chats, webhooks, local files)
+        from notifier import get_notifier
+        try:
+            get_notifier(config)
+        except ValueError as e:
+            self.logger.error(f"Invalid notification settings: {e}")
+            sys.exit(1)
+        
+        health_config = config.get("health_config") or {}
+        HealthCheckHandler.heartbeat_grace = health_config.get("heartbeat_grace", 300)
+        
+        if mode == "multi-tenancy":
+            results = self.run_multi_tenancy(config, engine)
+            if not results:
+                self.logger.error("Multi-tenancy VM creation stopped without success")
+            return
+        
+        if mode == "jobs":
+            self.run_jobs(config)
+            return
+        
+        if mode == "multi-region":
+            results = self.run_multi_region(config, engine)
+            if not results:
+                self.logger.error("Multi-region VM creation stopped without success")
+            return
         
         # Initialize VM Creator
+        from vm_creator import VMCreator
         self.vm_creator = VMCreator(config)
+        self.vm_creator.oci_client.warm_image_cache([self.vm_creator.region])
         
         # Run based on mode
-        if mode == "continuous":
+        if mode == "continuous" and engine == "asyncio":
+            self.logger.info("Starting continuous VM creation mode (asyncio engine)")
+            from async_engine import AsyncHuntEngine
+            results = AsyncHuntEngine(config).run([self.vm_creator])
+            self.upsize_winners([self.vm_creator], results)
+        elif mode == "continuous":
             self.logger.info("Starting continuous VM creation mode")
-            self.vm_creator.run_continuous()
+            result = self.vm_creator.run_continuous()
+            if result:
+                self.vm_creator.run_upsize_loop(result)
         elif mode == "single":
             self.logger.info("Creating single VM")
             result = self.vm_creator.create_single_vm()
@@ -183,9 +465,16 @@ def main():
     parser = argparse.ArgumentParser(description="Oracle Cloud VM Auto Creator")
     parser.add_argument(
         "--mode", 
-        choices=["continuous", "single"], 
+        choices=["continuous", "single", "multi-region", "multi-tenancy", "jobs"], 
         default="continuous",
-        help="Execution mode: continuous (default) or single VM creation"
+        help="Execution mode: continuous (default), single VM creation, multi-region hunting, "
+             "multi-tenancy hunting (config.yaml profiles) or job API server"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["threads", "asyncio"],
+        default="threads",
+        help="Hunt engine for continuous, multi-region and multi-tenancy modes (default: threads)"
     )
     parser.add_argument(
         "--log-level",
@@ -198,15 +487,27 @@ def main():
         default="/app/logs/notivm.log",
         help="Log file path (default: /app/logs/notivm.log)"
     )
+    parser.add_argument(
+        "--self-check",
+        action="store_true",
+        help="Import every module the hunt modes need and exit (verifies a packaged build)"
+    )
     
     args = parser.parse_args()
+    if args.engine == "asyncio" and args.mode in ("single", "jobs"):
+        parser.error(f"--engine asyncio is not supported in {args.mode} mode")
+    if args.self_check:
+        for module in ("yaml", "dotenv", "vm_creator", "notifier", "job_manager", "async_engine", "oci_profiles"):
+            importlib.import_module(module)
+        print("notivm self-check passed")
+        return
     
     # Initialize application
     app = NotivmApp()
     app.setup_logging(args.log_level, args.log_file)
     
     try:
-        app.run(args.mode)
+        app.run(args.mode, args.engine)
     except KeyboardInterrupt:
         app.logger.info("Application interrupted by user")
     except Exception as e:
@@ -0,0 +1,162 @@
+import time
+import threading
+from typing import Dict, Any, List, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _escape(value: Any) -> str:
+    """Escape a label value for the text exposition format"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = "") -> str:
+    """Render a label set such as {region="r",endpoint="e"}"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    """Base class for labelled metrics rendered in the Prometheus text format"""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        """Register the metric in the process-wide registry"""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[Any, ...], Any] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+    
+    def _key(self, labels: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Label values in declaration order"""
+        return tuple(labels.get(name, "") for name in self.labelnames)
+    
+    def samples(self) -> List[str]:
+        """Sample lines of this metric"""
+        with self._lock:
+            return [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in self._values.items()]
+    
+    def render(self) -> str:
+        """HELP/TYPE header plus samples"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+    
+    kind = "counter"
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Add to the counter for a label set"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def total(self) -> float:
+        """Sum over all label sets"""
+        with self._lock:
+            return sum(self._values.values())
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+    
+    kind = "gauge"
+    
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge for a label set"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+    
+    def remove(self, **labels) -> None:
+        """Drop a label set (e.g. a finished hunt)"""
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """Initialize histogram with upper bucket bounds"""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation"""
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+    
+    def samples(self) -> List[str]:
+        """Bucket, sum and count lines per label set"""
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {bucket_count}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+REGISTRY: List[Metric] = []
+
+OCI_REQUESTS = Counter("notivm_oci_requests_total", "OCI SDK calls by result status",
+                       ("region", "endpoint", "status"))
+OCI_LATENCY = Histogram("notivm_oci_request_duration_seconds", "OCI SDK call latency",
+                        ("region", "endpoint"))
+ATTEMPTS = Counter("notivm_attempts_total", "Launch attempts by outcome (success or error class)",
+                   ("hunt", "outcome"))
+BACKOFF_STEP = Gauge("notivm_backoff_step", "Current exponential backoff step", ("hunt",))
+NEXT_WAIT = Gauge("notivm_next_attempt_wait_seconds", "Wait before the next launch attempt", ("hunt",))
+TELEGRAM_LATENCY = Histogram("notivm_telegram_send_duration_seconds", "Telegram send latency", ("method",))
+TELEGRAM_FAILURES = Counter("notivm_telegram_send_failures_total", "Failed Telegram sends", ("method",))
+NOTIFICATIONS = Counter("notivm_notifications_total", "Notification deliveries by destination and result",
+                        ("destination", "status"))
+OUTBOX_MESSAGES = Gauge("notivm_outbox_messages", "Messages waiting in a destination's outbox", ("destination",))
+HEARTBEAT_AGE = Gauge("notivm_hunt_heartbeat_age_seconds", "Seconds since the hunt loop last reported progress",
+                      ("hunt",))
+
+# hunt -> (last beat, seconds until the next beat is due)
+_heartbeats: Dict[str, Tuple[float, float]] = {}
+_heartbeats_lock = threading.Lock()
+
+def heartbeat(hunt: str, next_within: float = 0) -> None:
+    """Report that a hunt loop is alive and will report again within next_within seconds"""
+    with _heartbeats_lock:
+        _heartbeats[hunt] = (time.time(), next_within)
+
+def clear_heartbeat(hunt: str) -> None:
+    """Stop watching a hunt that has ended"""
+    with _heartbeats_lock:
+        _heartbeats.pop(hunt, None)
+    HEARTBEAT_AGE.remove(hunt=hunt)
+
+def stale_hunts(grace: float) -> Dict[str, float]:
+    """Hunts whose next heartbeat is more than grace seconds overdue, with their heartbeat age"""
+    now = time.time()
+    with _heartbeats_lock:
+        return {
+            hunt: round(now - beat, 1)
+            for hunt, (beat, next_within) in _heartbeats.items()
+            if now - beat > next_within + grace
+        }
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    now = time.time()
+    with _heartbeats_lock:
+        beats = dict(_heartbeats)
+    for hunt, (beat, _) in beats.items():
+        HEARTBEAT_AGE.set(round(now - beat, 1), hunt=hunt)
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
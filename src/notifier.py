@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+import requests
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+from http_pool import get_shared_session, prewarm
+from outbox import Outbox, RetryLater
+from telegram_bot import TelegramBot, NotificationMessages
+
+# Destination keys that override outbox_config for that destination
+OUTBOX_KEYS = ("concurrency", "min_interval", "max_queue", "digest_interval", "coalesce_kinds", "max_retry_wait")
+
+class TelegramSink:
+    """Telegram chat destination (bot_token/chat_id default to the TELEGRAM_* variables)"""
+    
+    def __init__(self, config: Dict[str, Any], entry: Dict[str, Any]):
+        """Initialize the sink from a destination entry"""
+        self.bot = TelegramBot(config, bot_token=entry.get("bot_token"), chat_id=entry.get("chat_id"))
+    
+    def deliver(self, text: str, parse_mode: str, kind: str) -> bool:
+        """Post one message to the chat"""
+        return self.bot.deliver(text, parse_mode)
+    
+    def prewarm(self) -> None:
+        """Open a pooled connection to the Telegram API"""
+        self.bot.prewarm_connection()
+    
+    def check(self) -> bool:
+        """The bot token works (getMe)"""
+        return self.bot.test_connection()
+
+class WebhookSink:
+    """Generic webhook destination: POSTs {"event", "text", "service", "timestamp"} as JSON"""
+    
+    def __init__(self, config: Dict[str, Any], entry: Dict[str, Any]):
+        """Initialize the sink from a destination entry"""
+        self.logger = logging.getLogger(__name__)
+        if not entry.get("url"):
+            raise ValueError(f"Webhook destination {entry.get('name')} requires a url")
+        self.url = entry["url"]
+        self.headers = entry.get("headers") or {}
+        self.timeout = entry.get("timeout", 10)
+        self.session = get_shared_session("webhook", config)
+    
+    def deliver(self, text: str, parse_mode: str, kind: str) -> bool:
+        """POST one event; 429/5xx and network errors are retried"""
+        payload = {
+            "event": kind,
+            "text": text,
+            "service": "notivm",
+            "timestamp": datetime.now().isoformat()
+        }
+        try:
+            response = self.session.post(self.url, json=payload, headers=self.headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise RetryLater(f"Webhook unreachable: {e}") from e
+        
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = response.headers.get("Retry-After")
+            raise RetryLater(f"Webhook returned {response.status_code}",
+                             float(retry_after) if retry_after and retry_after.isdigit() else None)
+        if not response.ok:
+            self.logger.error(f"Webhook rejected event {kind}: {response.status_code} {response.text[:200]}")
+            return False
+        return True
+    
+    def prewarm(self) -> None:
+        """Open a pooled connection to the webhook host"""
+        prewarm(self.session, [self.url])
+    
+    def check(self) -> bool:
+        """The webhook host accepts connections (no event is posted)"""
+        return prewarm(self.session, [self.url]) == 1
+
+class FileSink:
+    """Local file destination: appends one JSON object per notification"""
+    
+    def __init__(self, config: Dict[str, Any], entry: Dict[str, Any]):
+        """Initialize the sink from a destination entry"""
+        self.path = entry.get("path", "/app/data/notifications.jsonl")
+        self._lock = threading.Lock()
+    
+    def deliver(self, text: str, parse_mode: str, kind: str) -> bool:
+        """Append one event to the file"""
+        record = {"event": kind, "text": text, "timestamp": datetime.now().isoformat()}
+        try:
+            with self._lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as file:
+                    file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            raise RetryLater(f"Cannot write {self.path}: {e}") from e
+        return True
+    
+    def prewarm(self) -> None:
+        """Nothing to open ahead of time for a file"""
+    
+    def check(self) -> bool:
+        """The file's directory exists (or can be created) and is writable"""
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError:
+            return False
+        return os.access(directory, os.W_OK)
+
+SINK_TYPES = {"telegram": TelegramSink, "webhook": WebhookSink, "file": FileSink}
+
+class Notifier(NotificationMessages):
+    """Routes notifications to destinations by event type.
+    
+    Destinations (Telegram chats, webhooks, local files) are configured in
+    notifier_config.destinations; routes map an event type (start,
+    progress, success, error, retry, final_failure, message) to destination
+    names, with "default" covering unlisted events. Each destination has
+    its own outbox, so it gets its own concurrency and rate limit, and a
+    slow or failing destination never delays the others or the hunt. With
+    outbox_config.enabled: false messages are delivered inline instead.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        """Build the destinations and their outboxes from notifier_config"""
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        
+        notifier_config = config.get("notifier_config") or {}
+        outbox_config = config.get("outbox_config") or {}
+        self.use_outbox = outbox_config.get("enabled", True)
+        self.flush_timeout = outbox_config.get("flush_timeout", 10)
+        self._checked = False
+        self._check_lock = threading.Lock()
+        
+        self.sinks: Dict[str, Any] = {}
+        self.outboxes: Dict[str, Outbox] = {}
+        for index, entry in enumerate(notifier_config.get("destinations") or self.default_destinations()):
+            sink_type = entry.get("type", "telegram")
+            if sink_type not in SINK_TYPES:
+                raise ValueError(f"Unknown notification destination type: {sink_type}")
+            name = entry.get("name") or f"{sink_type}-{index + 1}"
+            if name in self.sinks:
+                raise ValueError(f"Notification destination names must be unique: {name}")
+            
+            self.sinks[name] = SINK_TYPES[sink_type](config, entry)
+            if self.use_outbox:
+                settings = dict(outbox_config)
+                settings.update({key: entry[key] for key in OUTBOX_KEYS if key in entry})
+                self.outboxes[name] = Outbox(name, self.sinks[name].deliver, settings)
+        
+        self.routes: Dict[str, List[str]] = notifier_config.get("routes") or {}
+        for event, names in self.routes.items():
+            unknown = [name for name in names if name not in self.sinks]
+            if unknown:
+                raise ValueError(f"Route {event} refers to unknown destinations: {', '.join(unknown)}")
+        
+        atexit.register(self.flush)
+        self.logger.info(f"Notifier initialized: {', '.join(self.sinks)}")
+    
+    def default_destinations(self) -> List[Dict[str, Any]]:
+        """Without configured destinations: the TELEGRAM_* chat, or a local file if it is not set"""
+        if os.getenv("TELEGRAM_BOT_TOKEN") and os.getenv("TELEGRAM_CHAT_ID"):
+            return [{"name": "telegram", "type": "telegram"}]
+        self.logger.warning("Telegram is not configured, writing notifications to /app/data/notifications.jsonl")
+        return [{"name": "file", "type": "file"}]
+    
+    def destinations_for(self, kind: str) -> List[str]:
+        """Destination names an event type is routed to"""
+        return self.routes.get(kind, self.routes.get("default", list(self.sinks)))
+    
+    def check_destinations(self) -> bool:
+        """Check every destination once per process; False if none of them works.
+        
+        Failing destinations are logged, and the check is repeated on the
+        next call until it passes.
+        """
+        with self._check_lock:
+            if self._checked:
+                return True
+            failed = [name for name, sink in self.sinks.items() if not sink.check()]
+            for name in failed:
+                self.logger.warning(f"Notification destination {name} failed its startup check")
+            self._checked = not failed
+            return len(failed) < len(self.sinks)
+    
+    def send_message(self, message: str, parse_mode: str = "Markdown", kind: str = "message") -> bool:
+        """Queue a message for every destination of its event type (never blocks)"""
+        if not self.use_outbox:
+            return self.deliver_inline(message, parse_mode, kind)
+        for name in self.destinations_for(kind):
+            self.outboxes[name].put(message, parse_mode, kind)
+        return True
+    
+    def deliver_inline(self, message: str, parse_mode: str, kind: str) -> bool:
+        """Deliver a message to every destination of its event type now; False if any failed"""
+        delivered = True
+        for name in self.destinations_for(kind):
+            try:
+                delivered = self.sinks[name].deliver(message, parse_mode, kind) and delivered
+            except RetryLater as e:
+                self.logger.error(f"Failed to notify {name}: {e}")
+                delivered = False
+        return delivered
+    
+    def prewarm_connection(self) -> None:
+        """Open pooled connections to every destination ahead of a notification"""
+        for sink in self.sinks.values():
+            sink.prewarm()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every destination has delivered its queued messages; False on timeout"""
+        deadline = time.monotonic() + (self.flush_timeout if timeout is None else timeout)
+        flushed = True
+        for outbox in self.outboxes.values():
+            flushed = outbox.flush(max(0, deadline - time.monotonic())) and flushed
+        return flushed
+
+_notifier: Optional[Notifier] = None
+_notifier_lock = threading.Lock()
+
+def get_notifier(config: Dict[str, Any]) -> Notifier:
+    """Return the process-wide notifier (each destination has one outbox per process)"""
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = Notifier(config)
+        return _notifier
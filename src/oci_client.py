@@ -1,41 +1,151 @@
 import os
-import oci
+import time
 import logging
+import threading
+from collections import deque
 from typing import Optional, Dict, Any, List
+from resource_cache import ResourceCache, get_resource_cache
+from image_resolver import get_image_resolver
+from oci_errors import classify_service_error
+from http_pool import get_shared_session, share_session, prewarm
+from rate_limiter import get_rate_limiter
+from oci_profiles import env_oci_config, get_signer
+from tracing import get_tracer, current_span
+import metrics
+# The service packages notivm calls. The SDK defers the rest, but `import oci` itself still
+# loads ~370 modules (auth pulls in dns, object_storage, work_requests; alloy is eager),
+# which is why main.py imports this module only when a hunt starts
+import oci.core
+import oci.identity
 
 class OCIClient:
-    def __init__(self, config: Dict[str, Any]):
-        """Initialize OCI client with configuration"""
+    def __init__(self, config: Dict[str, Any], region: Optional[str] = None,
+                 profile: Optional[Dict[str, Any]] = None):
+        """Initialize OCI client with configuration (region defaults to OCI_REGION, credentials
+        to the OCI_* environment variables unless a profile from oci_profiles is given)"""
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self.profile_name = profile["name"] if profile else None
         
         # OCI configuration
-        self.region = os.getenv("OCI_REGION", "ap-seoul-1")
-        self.oci_config = {
-            "user": os.getenv("OCI_USER_OCID"),
-            "key_file": os.getenv("OCI_PRIVATE_KEY_PATH"),
-            "fingerprint": os.getenv("OCI_FINGERPRINT"),
-            "tenancy": os.getenv("OCI_TENANCY_OCID"),
-            "region": self.region
-        }
+        if profile:
+            self.region = region or profile["oci_config"]["region"]
+            self.oci_config = dict(profile["oci_config"], region=self.region)
+        else:
+            self.region = region or os.getenv("OCI_REGION", "ap-seoul-1")
+            self.oci_config = env_oci_config(self.region)
+        self.tenancy = self.oci_config["tenancy"]
         
         # 리전별 설정 로드
         self.region_config = self.get_region_config()
         
-        # Initialize clients
-        self.compute_client = oci.core.ComputeClient(self.oci_config)
-        self.virtual_network_client = oci.core.VirtualNetworkClient(self.oci_config)
-        self.identity_client = oci.identity.IdentityClient(self.oci_config)
+        # Initialize clients; all clients of a credential share one signer (key loaded once)
+        oci.config.validate_config(self.oci_config)
+        self.signer = get_signer(self.oci_config)
+        self.client_kwargs = {"signer": self.signer}
+        # Endpoint override, e.g. the local stand-in server (src/oci_standin.py)
+        service_endpoint = os.getenv("NOTIVM_OCI_ENDPOINT") or (config.get("connection_config") or {}).get("oci_endpoint")
+        if service_endpoint:
+            self.client_kwargs["service_endpoint"] = service_endpoint
+            self.logger.warning(f"OCI API calls go to {service_endpoint} instead of Oracle Cloud")
+        self.compute_client = oci.core.ComputeClient(self.oci_config, **self.client_kwargs)
+        self.virtual_network_client = oci.core.VirtualNetworkClient(self.oci_config, **self.client_kwargs)
+        self.identity_client = oci.identity.IdentityClient(self.oci_config, **self.client_kwargs)
+        
+        # All clients of this tenancy and region share one keep-alive connection pool
+        self.session = get_shared_session(f"oci:{self.oci_config['tenancy']}:{self.region}", config,
+                                          requests_module=oci._vendor.requests)
+        share_session([self.compute_client, self.virtual_network_client, self.identity_client], self.session)
+        
+        # Shape ladder rung currently being launched (None: environment values)
+        self.shape_override: Optional[Dict[str, Any]] = None
         
         # Cache for resources
         self._availability_domains = None
         self._default_subnet = None
-        self._compartment_id = os.getenv("VM_COMPARTMENT_OCID") or self.oci_config["tenancy"]
+        if profile:
+            self._compartment_id = profile["compartment"]
+        else:
+            self._compartment_id = os.getenv("VM_COMPARTMENT_OCID") or self.oci_config["tenancy"]
+        
+        # One API budget per tenancy, shared by every client in the process
+        self.rate_limiter = get_rate_limiter(config, self.oci_config["tenancy"] or "default")
+        # Share of the tenancy's rate this client is limited to (set by the job manager)
+        self.rate_share: Optional[str] = None
+        
+        # Persistent cache so restarts skip discovery calls
+        self.resource_cache = get_resource_cache(config)
+        self._cache_scope = ResourceCache.scope_key(self.oci_config["tenancy"], self._compartment_id, self.region)
+        self.image_resolver = get_image_resolver(config)
         
-        self.logger.info(f"OCI Client initialized for region: {self.oci_config['region']}")
+        # Latency of recent SDK calls, drained per attempt into the attempt history
+        self._call_log = deque(maxlen=256)
+        self._call_log_lock = threading.Lock()
+        
+        # SDK calls become child spans of the calling hunt's current attempt span
+        self.tracer = get_tracer(config)
+        
+        self.logger.info(f"OCI Client initialized for region: {self.oci_config['region']}"
+                         + (f" (profile: {self.profile_name})" if profile else ""))
         if self.region_config:
             self.logger.info(f"Region config loaded: {self.region_config['description']}")
     
+    def _call(self, endpoint: str, fn, *args, **kwargs) -> Any:
+        """Issue an SDK call through the shared rate limiter"""
+        return self._call_in(self.region, endpoint, fn, *args, **kwargs)
+    
+    def _call_in(self, region: str, endpoint: str, fn, *args, **kwargs) -> Any:
+        """Issue an SDK call for a region through the shared rate limiter"""
+        span = self.tracer.start_span(f"oci.{endpoint}", current_span(), {"region": region, "endpoint": endpoint})
+        with span:
+            waited = self.rate_limiter.acquire(region, endpoint, self.rate_share)
+            span.set_attributes({"rate_limit_wait_s": round(waited, 3)})
+            started = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except oci.exceptions.ServiceError as e:
+                self._log_call(region, endpoint, started, e.status)
+                span.set_attributes({"http.status_code": e.status, "oci.error_code": e.code,
+                                     "oci.opc_request_id": e.request_id})
+                if e.status == 429:
+                    self.rate_limiter.on_throttled(region, endpoint, classify_service_error(e).retry_after)
+                raise
+            self._log_call(region, endpoint, started, getattr(result, "status", None))
+            span.set_attributes({"http.status_code": getattr(result, "status", None),
+                                 "oci.opc_request_id": getattr(result, "request_id", None)})
+            self.rate_limiter.on_success(region, endpoint)
+            return result
+    
+    def _log_call(self, region: str, endpoint: str, started: float, status: Optional[int]) -> None:
+        """Remember the latency and status of one SDK call and export it as metrics"""
+        elapsed = time.monotonic() - started
+        metrics.OCI_REQUESTS.inc(region=region, endpoint=endpoint, status=status)
+        metrics.OCI_LATENCY.observe(elapsed, region=region, endpoint=endpoint)
+        with self._call_log_lock:
+            self._call_log.append({
+                "endpoint": endpoint,
+                "ms": round(elapsed * 1000, 1),
+                "status": status
+            })
+    
+    def drain_call_log(self) -> List[Dict[str, Any]]:
+        """Return and forget the SDK calls made since the last drain"""
+        with self._call_log_lock:
+            calls = list(self._call_log)
+            self._call_log.clear()
+        return calls
+    
+    def prewarm_connections(self) -> int:
+        """Open pooled connections to the compute and identity endpoints before a launch"""
+        endpoints = {
+            self.compute_client.base_client.endpoint,
+            self.virtual_network_client.base_client.endpoint,
+            self.identity_client.base_client.endpoint
+        }
+        warmed = prewarm(self.session, sorted(endpoints))
+        self.logger.debug(f"Pre-warmed {warmed}/{len(endpoints)} OCI connections")
+        return warmed
+    
     def get_region_config(self) -> Optional[Dict[str, Any]]:
         """Get region-specific configuration"""
         region_configs = self.config.get("region_configs", {})
@@ -48,8 +158,14 @@ class OCIClient:
             self.logger.warning(f"No region-specific config found for {self.region}, using defaults")
             return None
     
-    def get_optimized_image_id(self) -> str:
-        """Get region-optimized image ID"""
+    def get_optimized_image_id(self, shape: Optional[str] = None) -> str:
+        """Get region-optimized image ID (newest matching image first, then configured/default IDs)"""
+        shape = shape or os.getenv("VM_SHAPE", "VM.Standard.A1.Flex")
+        image_id = self.image_resolver.resolve(self._list_images_in(self.region, self.compute_client),
+                                               self._compartment_id, self.region, shape)
+        if image_id:
+            return image_id
+        
         if self.region_config and "image_id" in self.region_config:
             return self.region_config["image_id"]
         
@@ -65,15 +181,56 @@ class OCIClient:
         
         return default_images.get(self.region, default_images["ap-seoul-1"])
     
+    def _cached(self, name: str) -> Optional[Any]:
+        """Read a discovered resource from the persistent cache"""
+        if self.resource_cache is None:
+            return None
+        return self.resource_cache.get(self._cache_scope, name)
+    
+    def _store(self, name: str, value: Any) -> None:
+        """Write a discovered resource to the persistent cache"""
+        if self.resource_cache is not None and value:
+            self.resource_cache.set(self._cache_scope, name, value)
+    
+    def invalidate_discovery(self, availability_domains: bool = True, subnet: bool = True) -> None:
+        """Forget discovered ADs/subnet so the next launch rediscovers them"""
+        if availability_domains:
+            self._availability_domains = None
+            if self.resource_cache is not None:
+                self.resource_cache.invalidate(self._cache_scope, "availability_domains")
+        if subnet:
+            self._default_subnet = None
+            if self.resource_cache is not None:
+                self.resource_cache.invalidate(self._cache_scope, "default_subnet")
+    
+    def _list_images_in(self, region: str, compute_client):
+        """Rate-limited list_images for a region's compute client"""
+        return lambda **kwargs: self._call_in(region, "list_images", compute_client.list_images, **kwargs)
+    
+    def warm_image_cache(self, regions: List[str], compute_clients: Optional[Dict[str, Any]] = None) -> Dict[str, Optional[str]]:
+        """Resolve images for all given regions in parallel before the first launch"""
+        shape = os.getenv("VM_SHAPE", "VM.Standard.A1.Flex")
+        compute_clients = dict(compute_clients or {}, **{self.region: self.compute_client})
+        
+        def client_factory(region: str):
+            client = compute_clients.get(region) or oci.core.ComputeClient(dict(self.oci_config, region=region), **self.client_kwargs)
+            return self._list_images_in(region, client)
+        
+        return self.image_resolver.warm(regions, shape, self._compartment_id, client_factory)
+    
     def get_availability_domains(self) -> List[str]:
         """Get available availability domains"""
+        if self._availability_domains is None:
+            self._availability_domains = self._cached("availability_domains")
         if self._availability_domains is None:
             try:
-                ads = self.identity_client.list_availability_domains(
+                ads = self._call(
+                    "list_availability_domains", self.identity_client.list_availability_domains,
                     compartment_id=self._compartment_id
                 ).data
                 self._availability_domains = [ad.name for ad in ads]
                 self.logger.info(f"Found {len(self._availability_domains)} availability domains")
+                self._store("availability_domains", self._availability_domains)
             except Exception as e:
                 self.logger.error(f"Error fetching availability domains: {e}")
                 raise
@@ -81,10 +238,13 @@ class OCIClient:
     
     def get_default_subnet(self) -> Optional[str]:
         """Get default subnet ID"""
+        if self._default_subnet is None:
+            self._default_subnet = self._cached("default_subnet")
         if self._default_subnet is None:
             try:
                 # List VCNs
-                vcns = self.virtual_network_client.list_vcns(
+                vcns = self._call(
+                    "list_vcns", self.virtual_network_client.list_vcns,
                     compartment_id=self._compartment_id
                 ).data
                 
@@ -97,7 +257,8 @@ class OCIClient:
                 self.logger.info(f"Using VCN: {vcn.display_name}")
                 
                 # List subnets in the VCN
-                subnets = self.virtual_network_client.list_subnets(
+                subnets = self._call(
+                    "list_subnets", self.virtual_network_client.list_subnets,
                     compartment_id=self._compartment_id,
                     vcn_id=vcn.id
                 ).data
@@ -117,36 +278,108 @@ class OCIClient:
                     # If no public subnet, use first available
                     self._default_subnet = subnets[0].id
                     self.logger.info(f"Using first available subnet: {subnets[0].display_name}")
-                    
+                
+                self._store("default_subnet", self._default_subnet)
+            
             except Exception as e:
                 self.logger.error(f"Error fetching default subnet: {e}")
                 raise
         
         return self._default_subnet
     
-    def create_instance(self, display_name: str) -> Dict[str, Any]:
-        """Create a new VM instance"""
+    def get_shape_config(self) -> Dict[str, Any]:
+        """Get the shape and size to launch (environment values, overridden by the shape ladder)"""
+        shape_config = {
+            "shape": os.getenv("VM_SHAPE", "VM.Standard.A1.Flex"),
+            "ocpus": int(os.getenv("VM_OCPUS", "2")),
+            "memory_gb": int(os.getenv("VM_MEMORY_GB", "12")),
+            "boot_volume_size_gb": int(os.getenv("VM_BOOT_VOLUME_SIZE_GB", "50"))
+        }
+        if self.shape_override:
+            shape_config.update(self.shape_override)
+        return shape_config
+    
+    def update_instance_shape(self, instance_id: str, ocpus: float, memory_gb: float) -> Dict[str, Any]:
+        """Resize a flexible-shape instance in place (OCI reboots it to apply the change)"""
         try:
-            # Get configuration
-            shape = os.getenv("VM_SHAPE", "VM.Standard.A1.Flex")
-            ocpus = int(os.getenv("VM_OCPUS", "2"))
-            memory_gb = int(os.getenv("VM_MEMORY_GB", "12"))
-            boot_volume_size = int(os.getenv("VM_BOOT_VOLUME_SIZE_GB", "50"))
+            response = self._call(
+                "update_instance", self.compute_client.update_instance,
+                instance_id,
+                oci.core.models.UpdateInstanceDetails(
+                    shape_config=oci.core.models.UpdateInstanceShapeConfigDetails(
+                        ocpus=ocpus,
+                        memory_in_gbs=memory_gb
+                    )
+                )
+            )
+        except oci.exceptions.ServiceError as e:
+            self.logger.warning(f"Resize of {instance_id} to {ocpus} OCPU/{memory_gb} GB rejected: {e.code} {e.message}")
+            raise classify_service_error(e) from e
+        
+        self.logger.info(f"Resize of {instance_id} to {ocpus} OCPU/{memory_gb} GB accepted")
+        return {"instance_id": instance_id, "lifecycle_state": response.data.lifecycle_state}
+    
+    def probe_capacity(self) -> List[str]:
+        """Ask the compute capacity report which availability domains can fit the shape"""
+        shape_config = self.get_shape_config()
+        available = []
+        
+        for availability_domain in self.get_availability_domains():
+            report = self._call(
+                "create_compute_capacity_report", self.compute_client.create_compute_capacity_report,
+                oci.core.models.CreateComputeCapacityReportDetails(
+                    # Capacity reports must be requested against the root compartment
+                    compartment_id=self.oci_config["tenancy"],
+                    availability_domain=availability_domain,
+                    shape_availabilities=[
+                        oci.core.models.CreateCapacityReportShapeAvailabilityDetails(
+                            instance_shape=shape_config["shape"],
+                            instance_shape_config=oci.core.models.CapacityReportInstanceShapeConfig(
+                                ocpus=shape_config["ocpus"],
+                                memory_in_gbs=shape_config["memory_gb"]
+                            )
+                        )
+                    ]
+                )
+            ).data
             
-            # Get availability domain
+            statuses = [item.availability_status for item in report.shape_availabilities or []]
+            self.logger.debug(f"Capacity in {availability_domain}: {', '.join(statuses) or 'unknown'}")
+            if "AVAILABLE" in statuses:
+                available.append(availability_domain)
+        
+        return available
+    
+    def create_instance(self, display_name: str, availability_domain: Optional[str] = None) -> Dict[str, Any]:
+        """Create a new VM instance (defaults to the first availability domain)"""
+        # Discovery runs outside the launch try: its errors are not launch errors
+        # Get configuration
+        shape_config = self.get_shape_config()
+        shape = shape_config["shape"]
+        ocpus = shape_config["ocpus"]
+        memory_gb = shape_config["memory_gb"]
+        boot_volume_size = shape_config["boot_volume_size_gb"]
+        
+        # Get availability domain
+        if availability_domain is None:
             availability_domains = self.get_availability_domains()
             if not availability_domains:
                 raise Exception("No availability domains found")
-            
-            # Get subnet
-            subnet_id = self.get_default_subnet()
-            if not subnet_id:
-                raise Exception("No suitable subnet found")
-            
+            availability_domain = availability_domains[0]
+        
+        # Get subnet
+        subnet_id = self.get_default_subnet()
+        if not subnet_id:
+            raise Exception("No suitable subnet found")
+        
+        # Get image
+        image_id = self.get_optimized_image_id(shape)
+        
+        try:
             # Create instance details
             instance_details = oci.core.models.LaunchInstanceDetails(
                 compartment_id=self._compartment_id,
-                availability_domain=availability_domains[0],
+                availability_domain=availability_domain,
                 display_name=display_name,
                 shape=shape,
                 shape_config=oci.core.models.LaunchInstanceShapeConfigDetails(
@@ -154,7 +387,7 @@ class OCIClient:
                     memory_in_gbs=memory_gb
                 ),
                 source_details=oci.core.models.InstanceSourceViaImageDetails(
-                    image_id=self.get_optimized_image_id(),
+                    image_id=image_id,
                     boot_volume_size_in_gbs=boot_volume_size
                 ),
                 create_vnic_details=oci.core.models.CreateVnicDetails(
@@ -163,8 +396,8 @@ class OCIClient:
                 )
             )
             
-            self.logger.info(f"Creating instance: {display_name}")
-            response = self.compute_client.launch_instance(instance_details)
+            self.logger.info(f"Creating instance: {display_name} in {availability_domain}")
+            response = self._call("launch_instance", self.compute_client.launch_instance, instance_details)
             
             instance = response.data
             self.logger.info(f"Instance creation initiated: {instance.id}")
@@ -177,22 +410,39 @@ class OCIClient:
                 "shape": instance.shape,
                 "time_created": instance.time_created
             }
-            
+        
         except oci.exceptions.ServiceError as e:
-            self.logger.error(f"OCI Service Error: {e.message}")
-            raise Exception(f"OCI Service Error: {e.message}")
+            self.logger.error(f"OCI Service Error: {e.status} {e.code} {e.message} (opc-request-id: {e.request_id})")
+            self._invalidate_on_launch_error(e)
+            raise classify_service_error(e) from e
         except Exception as e:
             self.logger.error(f"Error creating instance: {e}")
             raise
     
+    def _invalidate_on_launch_error(self, error: "oci.exceptions.ServiceError") -> None:
+        """Drop cached discovery data that a launch error shows to be stale"""
+        if error.status not in (400, 404):
+            return
+        message = (error.message or "").lower()
+        if "image" in message:
+            self.logger.warning("Launch rejected the resolved image, re-resolving on next attempt")
+            self.image_resolver.invalidate(self.region, self.get_shape_config()["shape"])
+        if "subnet" in message:
+            self.logger.warning("Launch rejected the cached subnet, rediscovering on next attempt")
+            self.invalidate_discovery(availability_domains=False, subnet=True)
+        if "availability domain" in message or "availabilitydomain" in message:
+            self.logger.warning("Launch rejected the cached availability domain, rediscovering on next attempt")
+            self.invalidate_discovery(availability_domains=True, subnet=False)
+    
     def get_instance_details(self, instance_id: str) -> Dict[str, Any]:
         """Get instance details"""
         try:
-            response = self.compute_client.get_instance(instance_id)
+            response = self._call("get_instance", self.compute_client.get_instance, instance_id)
             instance = response.data
             
             # Get VNIC details for IP addresses
-            vnic_attachments = self.compute_client.list_vnic_attachments(
+            vnic_attachments = self._call(
+                "list_vnic_attachments", self.compute_client.list_vnic_attachments,
                 compartment_id=self._compartment_id,
                 instance_id=instance_id
             ).data
@@ -202,7 +452,7 @@ class OCIClient:
             
             if vnic_attachments:
                 vnic_id = vnic_attachments[0].vnic_id
-                vnic = self.virtual_network_client.get_vnic(vnic_id).data
+                vnic = self._call("get_vnic", self.virtual_network_client.get_vnic, vnic_id).data
                 public_ip = vnic.public_ip
                 private_ip = vnic.private_ip
             
@@ -212,27 +462,32 @@ class OCIClient:
                 "lifecycle_state": instance.lifecycle_state,
                 "availability_domain": instance.availability_domain,
                 "shape": instance.shape,
+                "ocpus": instance.shape_config.ocpus if instance.shape_config else None,
+                "memory_gb": instance.shape_config.memory_in_gbs if instance.shape_config else None,
                 "time_created": instance.time_created,
                 "public_ip": public_ip,
                 "private_ip": private_ip
             }
-            
+        
         except Exception as e:
             self.logger.error(f"Error getting instance details: {e}")
             raise
     
+    def get_instance_state(self, instance_id: str) -> str:
+        """Get only the lifecycle state of an instance (single API call)"""
+        return self._call("get_instance", self.compute_client.get_instance, instance_id).data.lifecycle_state
+    
     def is_instance_running(self, instance_id: str) -> bool:
         """Check if instance is in running state"""
         try:
-            details = self.get_instance_details(instance_id)
-            return details["lifecycle_state"] == "RUNNING"
+            return self.get_instance_state(instance_id) == "RUNNING"
         except Exception:
             return False
     
     def terminate_instance(self, instance_id: str) -> bool:
         """Terminate an instance"""
         try:
-            self.compute_client.terminate_instance(instance_id)
+            self._call("terminate_instance", self.compute_client.terminate_instance, instance_id)
             self.logger.info(f"Instance termination initiated: {instance_id}")
             return True
         except Exception as e:
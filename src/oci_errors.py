@@ -0,0 +1,110 @@
+from typing import Dict, Any, Optional
+
+class ErrorAction:
+    """What the retry loop should do after a failed attempt"""
+    RETRY_FAST = "retry_fast"   # transient: retry at the base interval
+    BACKOFF = "backoff"         # throttled/conflicting: exponential backoff (honours Retry-After)
+    SWITCH_AD = "switch_ad"     # no capacity in this AD: try the next AD at the base interval
+    ABORT = "abort"             # configuration/permission problem: retrying cannot help
+
+class OCIServiceError(Exception):
+    """OCI service error that keeps status, code and opc-request-id plus its classification"""
+    
+    def __init__(self, message: str, status: Optional[int] = None, code: Optional[str] = None,
+                 opc_request_id: Optional[str] = None, retry_after: Optional[float] = None,
+                 error_class: str = "unknown", action: str = ErrorAction.BACKOFF):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.code = code
+        self.opc_request_id = opc_request_id
+        self.retry_after = retry_after
+        self.error_class = error_class
+        self.action = action
+    
+    def __str__(self) -> str:
+        if self.status is None:
+            return self.message
+        return f"OCI Service Error: {self.message}"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Structured form for logs, history and notifications"""
+        return {
+            "status": self.status,
+            "code": self.code,
+            "message": self.message,
+            "opc_request_id": self.opc_request_id,
+            "error_class": self.error_class,
+            "action": self.action
+        }
+
+# Codes whose meaning does not depend on the message
+_CODE_RULES = {
+    "TooManyRequests": ("throttled", ErrorAction.BACKOFF),
+    "LimitExceeded": ("limit_exceeded", ErrorAction.ABORT),
+    "QuotaExceeded": ("limit_exceeded", ErrorAction.ABORT),
+    "NotAuthenticated": ("not_authorized", ErrorAction.ABORT),
+    "NotAuthorizedOrNotFound": ("not_authorized", ErrorAction.ABORT),
+    "NotAuthorized": ("not_authorized", ErrorAction.ABORT),
+    "Conflict": ("conflict", ErrorAction.BACKOFF),
+    "IncorrectState": ("conflict", ErrorAction.BACKOFF),
+}
+
+# Parameters that are discovered/resolved at runtime and invalidated on error
+_REDISCOVERABLE = ("subnet", "image", "availability domain", "availabilitydomain")
+
+def _parse_retry_after(headers: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Read a Retry-After header in seconds, if present"""
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def classify_service_error(error: Exception) -> OCIServiceError:
+    """Map an oci.exceptions.ServiceError to a classified OCIServiceError"""
+    status = getattr(error, "status", None)
+    code = getattr(error, "code", None)
+    message = getattr(error, "message", None) or str(error)
+    lowered = message.lower()
+    
+    if "out of host capacity" in lowered or "out of capacity" in lowered:
+        error_class, action = "out_of_capacity", ErrorAction.SWITCH_AD
+    elif status in (400, 404) and any(word in lowered for word in _REDISCOVERABLE):
+        # Stale discovery data is invalidated by OCIClient, so the next try can succeed
+        error_class, action = "invalid_parameter", ErrorAction.RETRY_FAST
+    elif status == 429:
+        error_class, action = "throttled", ErrorAction.BACKOFF
+    elif code in _CODE_RULES:
+        error_class, action = _CODE_RULES[code]
+    elif status in (401, 403):
+        error_class, action = "not_authorized", ErrorAction.ABORT
+    elif status == 400 or code in ("InvalidParameter", "MissingParameter", "CannotParseRequest"):
+        error_class, action = "invalid_parameter", ErrorAction.ABORT
+    elif status == 404:
+        error_class, action = "not_found", ErrorAction.ABORT
+    elif status is not None and status >= 500:
+        error_class, action = "service_unavailable", ErrorAction.RETRY_FAST
+    else:
+        error_class, action = "unknown", ErrorAction.BACKOFF
+    
+    return OCIServiceError(
+        message,
+        status=status,
+        code=code,
+        opc_request_id=getattr(error, "request_id", None),
+        retry_after=_parse_retry_after(getattr(error, "headers", None)),
+        error_class=error_class,
+        action=action
+    )
+
+def classify_error(error: Exception) -> OCIServiceError:
+    """Classify any attempt failure; non-service errors are treated as transient"""
+    if isinstance(error, OCIServiceError):
+        return error
+    if hasattr(error, "status") and hasattr(error, "code"):
+        return classify_service_error(error)
+    # Network errors, timeouts and instances that never reached RUNNING
+    return OCIServiceError(str(error), error_class="transient", action=ErrorAction.RETRY_FAST)
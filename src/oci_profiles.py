@@ -0,0 +1,88 @@
+import os
+import oci.config
+import oci.signer
+import logging
+import threading
+from typing import Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_signers: Dict[Tuple[str, str, str, str], oci.signer.Signer] = {}
+_signers_lock = threading.Lock()
+
+def env_oci_config(region: str) -> Dict[str, Any]:
+    """OCI SDK config from the OCI_* environment variables (single-tenancy modes)"""
+    return {
+        "user": os.getenv("OCI_USER_OCID"),
+        "key_file": os.getenv("OCI_PRIVATE_KEY_PATH"),
+        "fingerprint": os.getenv("OCI_FINGERPRINT"),
+        "tenancy": os.getenv("OCI_TENANCY_OCID"),
+        "region": region
+    }
+
+def get_signer(oci_config: Dict[str, Any]) -> oci.signer.Signer:
+    """Return the process-wide request signer for a credential (the key is loaded once)"""
+    key = (oci_config["tenancy"], oci_config["user"], oci_config["fingerprint"], oci_config.get("key_file") or "")
+    with _signers_lock:
+        if key not in _signers:
+            _signers[key] = oci.signer.Signer(
+                tenancy=oci_config["tenancy"],
+                user=oci_config["user"],
+                fingerprint=oci_config["fingerprint"],
+                private_key_file_location=oci_config.get("key_file"),
+                pass_phrase=oci_config.get("pass_phrase"),
+                private_key_content=oci_config.get("key_content")
+            )
+        return _signers[key]
+
+def load_profiles(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Credential profiles for multi-tenancy mode.
+    
+    Each entry of config.yaml's profiles list either names a section of an
+    OCI config file (oci_config_file/oci_profile) or gives the credentials
+    inline (user/tenancy/fingerprint/key_file/region). Returns dicts with
+    name, oci_config, compartment and regions.
+    """
+    profiles = []
+    for index, entry in enumerate(config.get("profiles") or []):
+        name = entry.get("name") or entry.get("oci_profile") or f"profile-{index + 1}"
+        
+        if entry.get("oci_profile"):
+            oci_config = oci.config.from_file(
+                entry.get("oci_config_file", oci.config.DEFAULT_LOCATION), entry["oci_profile"]
+            )
+        else:
+            oci_config = {
+                "user": entry.get("user"),
+                "tenancy": entry.get("tenancy"),
+                "fingerprint": entry.get("fingerprint"),
+                "key_file": os.path.expanduser(entry.get("key_file") or ""),
+                "region": entry.get("region")
+            }
+            if entry.get("pass_phrase"):
+                oci_config["pass_phrase"] = entry["pass_phrase"]
+        if entry.get("region"):
+            oci_config["region"] = entry["region"]
+        
+        try:
+            oci.config.validate_config(oci_config)
+        except oci.exceptions.InvalidConfig as e:
+            raise ValueError(f"Invalid OCI credentials in profile {name}: {e}") from e
+        if not oci_config.get("key_file") and not oci_config.get("key_content"):
+            raise ValueError(f"No private key configured for profile {name}")
+        if oci_config.get("key_file") and not os.path.exists(oci_config["key_file"]):
+            raise ValueError(f"OCI private key file not found for profile {name}: {oci_config['key_file']}")
+        
+        profiles.append({
+            "name": name,
+            "oci_config": oci_config,
+            "compartment": entry.get("compartment") or oci_config["tenancy"],
+            "regions": entry.get("regions") or [oci_config["region"]]
+        })
+    
+    names = [profile["name"] for profile in profiles]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Profile names must be unique: {', '.join(names)}")
+    
+    logger.info(f"Loaded {len(profiles)} OCI profile(s): {', '.join(names)}")
+    return profiles
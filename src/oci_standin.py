@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OCI API endpoints notivm uses.
+
+Serves ListAvailabilityDomains, ListVcns, ListSubnets, ListImages,
+CreateComputeCapacityReport, LaunchInstance, GetInstance,
+ListVnicAttachments, GetVnic and TerminateInstance under /20160918, so
+the real OCI SDK clients can be pointed at it with NOTIVM_OCI_ENDPOINT.
+Requests are signed by the SDK as usual but not verified; any throwaway
+API key works.
+
+The behaviour is scripted by a scenario file (YAML or JSON); times are
+seconds since the server started:
+
+    availability_domains: [AD-1, AD-2, AD-3]
+    provisioning_seconds: 20          # PROVISIONING -> RUNNING
+    capacity:
+      default: false                  # launches fail with "Out of host capacity."
+      windows:                        # ... except inside these windows
+        - {start: 300, end: 360, ads: [AD-2]}
+    latency:                          # milliseconds, per endpoint or default
+      default: {distribution: lognormal, median: 120, p99: 800}
+      launch_instance: {distribution: uniform, min: 500, max: 3000}
+    errors:                           # probability of an injected error per call
+      launch_instance: {InternalError: 0.02, LimitExceeded: 0.001}
+    throttle:
+      rate: 10                        # calls per second per endpoint, then 429
+      burst: 20
+      retry_after: 5
+      storms: [{start: 120, end: 180}]  # every call is throttled
+
+Usage: python oci_standin.py --scenario scenario.yaml --port 9000
+"""
+import re
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import logging
+import argparse
+import threading
+import yaml
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+# Injectable errors: code -> (HTTP status, response code, message)
+ERRORS = {
+    "OutOfHostCapacity": (500, "InternalError", "Out of host capacity."),
+    "InternalError": (500, "InternalError", "Internal error occurred"),
+    "ServiceUnavailable": (503, "ServiceUnavailable", "Service is temporarily unavailable"),
+    "TooManyRequests": (429, "TooManyRequests", "Too many requests for the user"),
+    "LimitExceeded": (400, "LimitExceeded", "The following service limits were exceeded: standard-a1-core-count"),
+    "NotAuthenticated": (401, "NotAuthenticated", "The required information to complete authentication was not provided"),
+    "NotFound": (404, "NotAuthorizedOrNotFound", "Authorization failed or requested resource not found")
+}
+
+class Scenario:
+    """Capacity windows, latency distributions, error mix and throttling of a stand-in run"""
+    
+    def __init__(self, spec: Optional[Dict[str, Any]] = None, seed: Optional[int] = None):
+        """Initialize from a scenario dict (see the module docstring)"""
+        spec = spec or {}
+        self.availability_domains = spec.get("availability_domains", ["AD-1", "AD-2", "AD-3"])
+        self.provisioning_seconds = spec.get("provisioning_seconds", 20)
+        capacity = spec.get("capacity") or {}
+        self.capacity_default = capacity.get("default", False)
+        self.capacity_windows = capacity.get("windows") or []
+        self.latency = spec.get("latency") or {}
+        self.errors = spec.get("errors") or {}
+        throttle = spec.get("throttle") or {}
+        self.rate = throttle.get("rate")
+        self.burst = throttle.get("burst", self.rate)
+        self.retry_after = throttle.get("retry_after", 5)
+        self.storms = throttle.get("storms") or []
+        
+        self.random = random.Random(seed)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def load(cls, path: str, seed: Optional[int] = None) -> "Scenario":
+        """Read a scenario from a YAML or JSON file"""
+        with open(path, 'r', encoding='utf-8') as file:
+            return cls(yaml.safe_load(file), seed)
+    
+    def has_capacity(self, availability_domain: str, elapsed: float) -> bool:
+        """Whether a launch in this AD succeeds at this point of the run"""
+        for window in self.capacity_windows:
+            if window.get("start", 0) <= elapsed < window.get("end", math.inf):
+                ads = window.get("ads")
+                if not ads or availability_domain in ads:
+                    return window.get("available", True)
+        return self.capacity_default
+    
+    def delay(self, endpoint: str) -> float:
+        """Seconds to wait before answering a call"""
+        spec = self.latency.get(endpoint, self.latency.get("default"))
+        if not spec:
+            return 0.0
+        distribution = spec.get("distribution", "fixed")
+        if distribution == "uniform":
+            millis = self.random.uniform(spec.get("min", 0), spec.get("max", 0))
+        elif distribution == "lognormal":
+            median = spec.get("median", 100)
+            # p99 = median * exp(2.326 * sigma)
+            sigma = math.log(max(spec.get("p99", median), median) / median) / 2.326 if median else 0
+            millis = self.random.lognormvariate(math.log(median), sigma) if median else 0
+        else:
+            millis = spec.get("ms", 0)
+        return millis / 1000
+    
+    def injected_error(self, endpoint: str) -> Optional[str]:
+        """Error code to answer with instead of a normal response, if any"""
+        roll = self.random.random()
+        for code, probability in (self.errors.get(endpoint) or {}).items():
+            if roll < probability:
+                return code
+            roll -= probability
+        return None
+    
+    def throttled(self, endpoint: str, elapsed: float) -> bool:
+        """Whether this call exceeds the throttle (token bucket per endpoint, or a storm)"""
+        if any(storm.get("start", 0) <= elapsed < storm.get("end", math.inf) for storm in self.storms):
+            return True
+        if not self.rate:
+            return False
+        with self._lock:
+            tokens, updated = self._buckets.get(endpoint, (self.burst, elapsed))
+            tokens = min(self.burst, tokens + (elapsed - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[endpoint] = (tokens, elapsed)
+                return True
+            self._buckets[endpoint] = (tokens - 1, elapsed)
+            return False
+
+class StandinState:
+    """Instances launched against the stand-in, plus call counters"""
+    
+    def __init__(self, scenario: Scenario):
+        """Initialize an empty tenancy"""
+        self.scenario = scenario
+        self.started = time.monotonic()
+        self.instances: Dict[str, Dict[str, Any]] = {}
+        self.calls: Dict[str, int] = {}
+        self.lock = threading.Lock()
+    
+    def elapsed(self) -> float:
+        """Seconds since the server started"""
+        return time.monotonic() - self.started
+    
+    def count(self, endpoint: str, status: int) -> None:
+        """Count one answered call"""
+        with self.lock:
+            key = f"{endpoint}:{status}"
+            self.calls[key] = self.calls.get(key, 0) + 1
+    
+    def instance_view(self, instance_id: str) -> Optional[Dict[str, Any]]:
+        """An instance as GetInstance returns it, with its lifecycle state advanced"""
+        with self.lock:
+            instance = self.instances.get(instance_id)
+            if not instance:
+                return None
+            if instance["lifecycleState"] == "PROVISIONING" and \
+                    self.elapsed() - instance["_launched"] >= self.scenario.provisioning_seconds:
+                instance["lifecycleState"] = "RUNNING"
+            return {key: value for key, value in instance.items() if not key.startswith("_")}
+
+def _ocid(kind: str) -> str:
+    """A fake OCID"""
+    return f"ocid1.{kind}.oc1..standin{uuid.uuid4().hex[:20]}"
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Routes SDK requests to the stand-in endpoints"""
+    
+    state: StandinState = None
+    
+    # (method, path pattern) -> (endpoint name, handler method)
+    ROUTES = [
+        ("GET", r"/20160918/availabilityDomains", "list_availability_domains"),
+        ("GET", r"/20160918/vcns", "list_vcns"),
+        ("GET", r"/20160918/subnets", "list_subnets"),
+        ("GET", r"/20160918/images", "list_images"),
+        ("POST", r"/20160918/computeCapacityReports", "create_compute_capacity_report"),
+        ("POST", r"/20160918/instances", "launch_instance"),
+        ("GET", r"/20160918/instances/(?P<id>[^/]+)", "get_instance"),
+        ("DELETE", r"/20160918/instances/(?P<id>[^/]+)", "terminate_instance"),
+        ("GET", r"/20160918/vnicAttachments", "list_vnic_attachments"),
+        ("GET", r"/20160918/vnics/(?P<id>[^/]+)", "get_vnic")
+    ]
+    
+    def do_GET(self):
+        self.dispatch("GET")
+    
+    def do_POST(self):
+        self.dispatch("POST")
+    
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+    
+    def do_HEAD(self):
+        # Connection pre-warming
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        """Keep load runs quiet (calls are counted instead)"""
+    
+    def dispatch(self, method: str) -> None:
+        """Apply latency, throttling and injected errors, then run the endpoint"""
+        url = urlparse(self.path)
+        for route_method, pattern, endpoint in self.ROUTES:
+            match = re.fullmatch(pattern, url.path)
+            if route_method == method and match:
+                break
+        else:
+            self.send_error_response("unknown", "NotFound")
+            return
+        
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        scenario = self.state.scenario
+        
+        time.sleep(scenario.delay(endpoint))
+        if scenario.throttled(endpoint, self.state.elapsed()):
+            self.send_error_response(endpoint, "TooManyRequests", {"Retry-After": str(scenario.retry_after)})
+            return
+        error = scenario.injected_error(endpoint)
+        if error:
+            self.send_error_response(endpoint, error)
+            return
+        
+        result = getattr(self, endpoint)(match.groupdict().get("id"), query, body)
+        if isinstance(result, str):
+            self.send_error_response(endpoint, result)
+        else:
+            self.send_json(endpoint, 204 if result is None else 200, result)
+    
+    def send_json(self, endpoint: str, status: int, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        """Write a JSON response with an opc-request-id"""
+        payload = json.dumps(data).encode() if data is not None else b""
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('opc-request-id', uuid.uuid4().hex.upper())
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        self.state.count(endpoint, status)
+    
+    def send_error_response(self, endpoint: str, error: str, headers: Optional[Dict[str, str]] = None) -> None:
+        """Write an OCI error body ({"code", "message"})"""
+        status, code, message = ERRORS[error]
+        self.send_json(endpoint, status, {"code": code, "message": message}, headers)
+    
+    def list_availability_domains(self, resource_id, query, body):
+        """ListAvailabilityDomains: the scenario's ADs"""
+        compartment = query.get("compartmentId")
+        return [{"name": name, "compartmentId": compartment, "id": _ocid("availabilitydomain")}
+                for name in self.state.scenario.availability_domains]
+    
+    def list_vcns(self, resource_id, query, body):
+        """ListVcns: one VCN"""
+        return [{"id": "ocid1.vcn.oc1..standin", "displayName": "standin-vcn",
+                 "compartmentId": query.get("compartmentId"), "lifecycleState": "AVAILABLE",
+                 "cidrBlock": "10.0.0.0/16"}]
+    
+    def list_subnets(self, resource_id, query, body):
+        """ListSubnets: one public subnet"""
+        return [{"id": "ocid1.subnet.oc1..standin", "displayName": "standin-public-subnet",
+                 "compartmentId": query.get("compartmentId"), "vcnId": query.get("vcnId"),
+                 "lifecycleState": "AVAILABLE", "cidrBlock": "10.0.0.0/24", "prohibitPublicIpOnVnic": False}]
+    
+    def list_images(self, resource_id, query, body):
+        """ListImages: one platform image"""
+        return [{"id": "ocid1.image.oc1..standin", "displayName": "Canonical-Ubuntu-22.04-aarch64-standin",
+                 "operatingSystem": query.get("operatingSystem", "Canonical Ubuntu"),
+                 "operatingSystemVersion": query.get("operatingSystemVersion", "22.04"),
+                 "lifecycleState": "AVAILABLE", "timeCreated": _now()}]
+    
+    def create_compute_capacity_report(self, resource_id, query, body):
+        """CreateComputeCapacityReport: availability from the capacity windows"""
+        availability_domain = body.get("availabilityDomain")
+        available = self.state.scenario.has_capacity(availability_domain, self.state.elapsed())
+        return {
+            "compartmentId": body.get("compartmentId"),
+            "availabilityDomain": availability_domain,
+            "timeCreated": _now(),
+            "shapeAvailabilities": [
+                dict(item, availabilityStatus="AVAILABLE" if available else "OUT_OF_HOST_CAPACITY")
+                for item in body.get("shapeAvailabilities") or []
+            ]
+        }
+    
+    def launch_instance(self, resource_id, query, body):
+        """LaunchInstance: succeeds only inside a capacity window"""
+        availability_domain = body.get("availabilityDomain")
+        if availability_domain not in self.state.scenario.availability_domains:
+            return "NotFound"
+        if not self.state.scenario.has_capacity(availability_domain, self.state.elapsed()):
+            return "OutOfHostCapacity"
+        
+        shape_config = body.get("shapeConfig") or {}
+        instance = {
+            "id": _ocid("instance"),
+            "displayName": body.get("displayName"),
+            "compartmentId": body.get("compartmentId"),
+            "availabilityDomain": availability_domain,
+            "shape": body.get("shape"),
+            "shapeConfig": {"ocpus": shape_config.get("ocpus"), "memoryInGBs": shape_config.get("memoryInGBs")},
+            "imageId": (body.get("sourceDetails") or {}).get("imageId"),
+            "region": "standin",
+            "lifecycleState": "PROVISIONING",
+            "timeCreated": _now(),
+            "_launched": self.state.elapsed(),
+            "_vnic": _ocid("vnic")
+        }
+        with self.state.lock:
+            self.state.instances[instance["id"]] = instance
+        return self.state.instance_view(instance["id"])
+    
+    def get_instance(self, resource_id, query, body):
+        """GetInstance"""
+        return self.state.instance_view(resource_id) or "NotFound"
+    
+    def terminate_instance(self, resource_id, query, body):
+        """TerminateInstance"""
+        with self.state.lock:
+            instance = self.state.instances.get(resource_id)
+            if not instance:
+                return "NotFound"
+            instance["lifecycleState"] = "TERMINATED"
+        return None
+    
+    def list_vnic_attachments(self, resource_id, query, body):
+        """ListVnicAttachments: the instance's primary VNIC"""
+        with self.state.lock:
+            instance = self.state.instances.get(query.get("instanceId"))
+            if not instance:
+                return []
+            return [{"id": _ocid("vnicattachment"), "instanceId": instance["id"], "vnicId": instance["_vnic"],
+                     "availabilityDomain": instance["availabilityDomain"], "compartmentId": instance["compartmentId"],
+                     "lifecycleState": "ATTACHED"}]
+    
+    def get_vnic(self, resource_id, query, body):
+        """GetVnic: addresses derived from the VNIC ID"""
+        octet = sum(resource_id.encode()) % 250 + 2
+        return {"id": resource_id, "lifecycleState": "AVAILABLE", "isPrimary": True,
+                "privateIp": f"10.0.0.{octet}", "publicIp": f"203.0.113.{octet}"}
+
+def _now() -> str:
+    """Current time in the RFC 3339 form OCI uses"""
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+class StandinServer:
+    """The stand-in HTTP server, runnable in a background thread for tests and benchmarks"""
+    
+    def __init__(self, scenario: Optional[Scenario] = None, host: str = "127.0.0.1", port: int = 0):
+        """Bind the server (port 0 picks a free port)"""
+        self.state = StandinState(scenario or Scenario())
+        handler = type("BoundStandinHandler", (StandinHandler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+    
+    @property
+    def endpoint(self) -> str:
+        """Base URL to use as NOTIVM_OCI_ENDPOINT"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> "StandinServer":
+        """Serve from a daemon thread"""
+        threading.Thread(target=self.httpd.serve_forever, name="oci-standin", daemon=True).start()
+        return self
+    
+    def stop(self) -> None:
+        """Shut the server down"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OCI API stand-in for offline tests and load runs")
+    parser.add_argument("--scenario", help="Scenario file (YAML or JSON); default: never any capacity")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--seed", type=int, help="Random seed for latency and error injection")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    scenario = Scenario.load(args.scenario, args.seed) if args.scenario else Scenario(seed=args.seed)
+    server = StandinServer(scenario, args.host, args.port)
+    logging.info(f"OCI stand-in listening; run notivm with NOTIVM_OCI_ENDPOINT={server.endpoint}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logging.info(f"Calls answered: {json.dumps(server.state.calls, sort_keys=True)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
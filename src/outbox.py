@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, List, Callable
+import metrics
+from state_file import atomic_write_json
+
+DIGEST_LABELS = {"progress": "진행 알림", "retry": "재시도 알림"}
+
+class RetryLater(Exception):
+    """Raised by a deliver callable when a message should be sent again later"""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        """retry_after: seconds requested by the server (None: use the outbox backoff)"""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class Outbox:
+    """Queues notifications for one destination and delivers them from background threads.
+    
+    Senders only append to the in-memory queue, so the hunt loop never
+    waits on a destination or on disk. Sender threads start messages in
+    queue order, at most one per min_interval; with the default single
+    sender they are also delivered in that order, with concurrency > 1 a
+    slow delivery can be overtaken. retry_after on a 429 response (or a
+    backoff while the destination is unreachable) pauses every sender.
+    Messages of a coalesced kind (progress and retry updates) are folded
+    into one digest every digest_interval seconds. A writer thread
+    persists the queue and the pending digest after changes (several
+    changes made during one write are saved together), so messages that
+    were not delivered before a restart are sent afterwards.
+    """
+    
+    def __init__(self, name: str, deliver: Callable[[str, str, str], bool], settings: Dict[str, Any]):
+        """Start the senders; deliver(text, parse_mode, kind) posts one message, settings come from outbox_config"""
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.deliver = deliver
+        
+        directory = os.getenv("NOTIVM_OUTBOX_DIR") or settings.get("dir", "/app/data/outbox")
+        self.path = os.path.join(directory, f"{name}.json")
+        self.concurrency = max(1, settings.get("concurrency", 1))
+        self.max_queue = settings.get("max_queue", 500)
+        self.min_interval = settings.get("min_interval", 1.0)
+        self.digest_interval = settings.get("digest_interval", 300)
+        self.coalesce_kinds = set(settings.get("coalesce_kinds", ["progress", "retry"]))
+        self.max_retry_wait = settings.get("max_retry_wait", 300)
+        
+        self._queue: deque = deque()
+        self._in_flight: List[Dict[str, Any]] = []
+        # kind -> {"count", "last", "last_text"} of coalesced messages not yet sent
+        self._digest: Dict[str, Dict[str, Any]] = {}
+        self._digest_started: Optional[float] = None
+        self._condition = threading.Condition()
+        self._next_slot = 0.0
+        self._failures = 0
+        self._dropped = 0
+        # Set when the persisted state is out of date; the writer thread saves it
+        self._dirty = threading.Event()
+        self._write_lock = threading.Lock()
+        
+        self._load()
+        for index in range(self.concurrency):
+            threading.Thread(target=self._send_loop, name=f"outbox-{name}-{index}", daemon=True).start()
+        threading.Thread(target=self._write_loop, name=f"outbox-{name}-writer", daemon=True).start()
+        self.logger.info(f"Outbox {name} started ({len(self._queue)} pending message(s))")
+    
+    def put(self, text: str, parse_mode: str = "Markdown", kind: str = "message") -> None:
+        """Queue a message; coalesced kinds are added to the next digest instead"""
+        with self._condition:
+            if kind in self.coalesce_kinds and self.digest_interval > 0:
+                entry = self._digest.setdefault(kind, {"count": 0, "last": 0, "last_text": ""})
+                entry["count"] += 1
+                entry["last"] = time.time()
+                entry["last_text"] = text
+                if self._digest_started is None:
+                    self._digest_started = time.time()
+            else:
+                self._append({"text": text, "parse_mode": parse_mode, "kind": kind, "created": time.time()})
+            self._condition.notify()
+        self._dirty.set()
+    
+    def pending(self) -> int:
+        """Messages not yet delivered (a pending digest counts as one)"""
+        with self._condition:
+            return len(self._queue) + len(self._in_flight) + (1 if self._digest else 0)
+    
+    def flush(self, timeout: float) -> bool:
+        """Send the digest now and wait until every message is delivered; False on timeout.
+        
+        What is left is saved before returning (the writer thread may not outlive an exit).
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            with self._condition:
+                self._fold_digest()
+                self._condition.notify_all()
+                while self._queue or self._in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        left = len(self._queue) + len(self._in_flight)
+                        self.logger.warning(f"{left} message(s) left in outbox {self.name} for the next start")
+                        return False
+                    self._condition.wait(remaining)
+            return True
+        finally:
+            self._save()
+    
+    def _append(self, message: Dict[str, Any]) -> None:
+        """Add to the queue, dropping the oldest message when full (caller holds the lock)"""
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self._dropped += 1
+            metrics.NOTIFICATIONS.inc(destination=self.name, status="dropped")
+            self.logger.warning(f"Outbox {self.name} full, dropped the oldest message ({self._dropped} so far)")
+        self._queue.append(message)
+        metrics.OUTBOX_MESSAGES.set(len(self._queue), destination=self.name)
+    
+    def _fold_digest(self) -> None:
+        """Turn the coalesced messages into one queued digest message (caller holds the lock)"""
+        if not self._digest:
+            return
+        
+        minutes = max(1, round((time.time() - self._digest_started) / 60))
+        lines = [f"📋 **최근 {minutes}분 알림 요약**", ""]
+        for kind, entry in self._digest.items():
+            lines.append(f"• {DIGEST_LABELS.get(kind, kind)}: {entry['count']}건")
+        latest = max(self._digest.values(), key=lambda entry: entry["last"])
+        lines += ["", "마지막 알림:", latest["last_text"].strip()]
+        self._append({"text": "\n".join(lines), "parse_mode": "Markdown", "kind": "digest", "created": time.time()})
+        self._digest = {}
+        self._digest_started = None
+    
+    def _next_message(self) -> Dict[str, Any]:
+        """Wait for a message and a send slot; the message stays persisted until delivered"""
+        with self._condition:
+            while True:
+                now = time.time()
+                if self._digest and now - self._digest_started >= self.digest_interval:
+                    self._fold_digest()
+                    self._dirty.set()
+                if self._queue:
+                    message = self._queue.popleft()
+                    self._in_flight.append(message)
+                    slot = max(time.monotonic(), self._next_slot)
+                    self._next_slot = slot + self.min_interval
+                    break
+                timeout = self._digest_started + self.digest_interval - now if self._digest else None
+                self._condition.wait(timeout)
+        
+        time.sleep(max(0, slot - time.monotonic()))
+        return message
+    
+    def _send_loop(self) -> None:
+        """Sender thread: deliver queued messages"""
+        while True:
+            message = self._next_message()
+            
+            retry_wait = None
+            status = "sent"
+            try:
+                if not self.deliver(message["text"], message["parse_mode"], message["kind"]):
+                    status = "rejected"
+                    self.logger.error(f"{self.name} rejected a {message['kind']} message, dropping it")
+            except RetryLater as e:
+                status = "deferred"
+                with self._condition:
+                    self._failures += 1
+                    failures = self._failures
+                retry_wait = e.retry_after if e.retry_after is not None else min(2 ** failures, self.max_retry_wait)
+                self.logger.warning(f"Delivery to {self.name} deferred for {retry_wait}s: {e}")
+            except Exception as e:
+                status = "rejected"
+                self.logger.error(f"Unexpected error delivering to {self.name}, dropping the message: {e}")
+            metrics.NOTIFICATIONS.inc(destination=self.name, status=status)
+            
+            with self._condition:
+                self._in_flight.remove(message)
+                if retry_wait is None:
+                    self._failures = 0
+                else:
+                    # Back at the head of the queue; every sender pauses until the retry time
+                    self._queue.appendleft(message)
+                    self._next_slot = max(self._next_slot, time.monotonic() + retry_wait)
+                metrics.OUTBOX_MESSAGES.set(len(self._queue), destination=self.name)
+                self._condition.notify_all()
+            self._dirty.set()
+    
+    def _write_loop(self) -> None:
+        """Writer thread: persist the outbox whenever it changed since the last write"""
+        while True:
+            self._dirty.wait()
+            self._save()
+    
+    def _load(self) -> None:
+        """Restore messages left undelivered by the previous run"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable outbox {self.path}: {e}")
+            return
+        
+        for message in saved.get("queue", [])[-self.max_queue:]:
+            self._queue.append(message)
+        self._digest = saved.get("digest") or {}
+        self._digest_started = saved.get("digest_started") if self._digest else None
+        metrics.OUTBOX_MESSAGES.set(len(self._queue), destination=self.name)
+    
+    def _save(self) -> None:
+        """Persist undelivered messages and the pending digest atomically (writes happen outside the queue lock)"""
+        with self._write_lock:
+            # Changes made from here on mark the state dirty again and get their own write
+            self._dirty.clear()
+            with self._condition:
+                state = {
+                    "queue": self._in_flight + list(self._queue),
+                    "digest": {kind: dict(entry) for kind, entry in self._digest.items()},
+                    "digest_started": self._digest_started
+                }
+            self._write(state)
+    
+    def _write(self, state: Dict[str, Any]) -> None:
+        """Write a snapshot of the outbox"""
+        try:
+            atomic_write_json(self.path, state, ensure_ascii=False)
+        except OSError as e:
+            self.logger.warning(f"Failed to write outbox {self.path}: {e}")
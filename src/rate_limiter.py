@@ -0,0 +1,162 @@
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate can be changed at runtime"""
+    
+    def __init__(self, rate: float, capacity: float):
+        """Initialize a full bucket refilling at rate tokens per second"""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.blocked_until = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float) -> None:
+        """Add tokens for the time elapsed since the last refill (caller holds the lock)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+    
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.blocked_until - now)
+    
+    def acquire(self) -> float:
+        """Block until a token is available; returns the time spent waiting"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    def set_rate(self, adjust) -> float:
+        """Change the rate to adjust(current rate) atomically; returns the new rate"""
+        with self._lock:
+            # Tokens earned so far are credited at the old rate
+            self._refill(time.monotonic())
+            self.rate = adjust(self.rate)
+            return self.rate
+    
+    def block_for(self, seconds: float) -> None:
+        """Refuse to hand out tokens for the given time (Retry-After)"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class RateLimiter:
+    """Per-endpoint token buckets that back off on 429 and recover gradually.
+    
+    Buckets are keyed by (region, endpoint) because OCI throttles each
+    tenancy per region and per API. Callers that registered a share (hunt
+    jobs) also draw from a sub-bucket holding an equal part of that rate,
+    so a job that calls more often only waits longer itself.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize limiter from rate_limit_config"""
+        self.logger = logging.getLogger(__name__)
+        
+        rate_config = config.get("rate_limit_config") or {}
+        self.enabled = rate_config.get("enabled", True)
+        self.default_rate = float(rate_config.get("default_rate", 2.0))
+        self.burst = float(rate_config.get("burst", 5))
+        self.endpoint_rates = {name: float(rate) for name, rate in (rate_config.get("endpoints") or {}).items()}
+        # Throttled buckets drop to this fraction of their rate and recover per success
+        self.decrease_factor = float(rate_config.get("decrease_factor", 0.5))
+        self.recovery_step = float(rate_config.get("recovery_step", 0.05))
+        self.min_rate_fraction = float(rate_config.get("min_rate_fraction", 0.1))
+        
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._shares: Dict[str, int] = {}
+        self._share_buckets: Dict[Tuple[str, str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    def configured_rate(self, endpoint: str) -> float:
+        """Steady-state rate for an endpoint"""
+        return self.endpoint_rates.get(endpoint, self.default_rate)
+    
+    def _bucket(self, region: str, endpoint: str) -> TokenBucket:
+        """Get or create the bucket for a region/endpoint"""
+        key = (region, endpoint)
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(self.configured_rate(endpoint), self.burst)
+            return self._buckets[key]
+    
+    def add_share(self, share: str) -> None:
+        """Start splitting the rate with another share holder"""
+        with self._lock:
+            self._shares[share] = self._shares.get(share, 0) + 1
+    
+    def remove_share(self, share: str) -> None:
+        """Return a share; the others split the rate again"""
+        with self._lock:
+            self._shares[share] -= 1
+            if self._shares[share] <= 0:
+                del self._shares[share]
+                for key in [key for key in self._share_buckets if key[2] == share]:
+                    del self._share_buckets[key]
+    
+    def _share_bucket(self, region: str, endpoint: str, share: str) -> TokenBucket:
+        """Get the share's sub-bucket, set to its part of the region/endpoint bucket's current rate"""
+        bucket = self._bucket(region, endpoint)
+        key = (region, endpoint, share)
+        with self._lock:
+            holders = max(1, len(self._shares))
+            if key not in self._share_buckets:
+                self._share_buckets[key] = TokenBucket(bucket.rate / holders, max(1.0, self.burst / holders))
+            share_bucket = self._share_buckets[key]
+        share_bucket.set_rate(lambda rate: bucket.rate / holders)
+        return share_bucket
+    
+    def acquire(self, region: str, endpoint: str, share: Optional[str] = None) -> float:
+        """Wait for permission to call an endpoint (within share's part, if given); returns the time spent waiting"""
+        if not self.enabled:
+            return 0.0
+        waited = self._share_bucket(region, endpoint, share).acquire() if share is not None else 0.0
+        waited += self._bucket(region, endpoint).acquire()
+        if waited > 1:
+            self.logger.debug(f"Rate limiter delayed {endpoint} in {region} by {waited:.1f}s")
+        return waited
+    
+    def on_success(self, region: str, endpoint: str) -> None:
+        """Additively restore a throttled bucket towards its configured rate"""
+        if not self.enabled:
+            return
+        bucket = self._bucket(region, endpoint)
+        target = self.configured_rate(endpoint)
+        if bucket.rate < target:
+            bucket.set_rate(lambda rate: min(target, rate + target * self.recovery_step))
+    
+    def on_throttled(self, region: str, endpoint: str, retry_after: Optional[float] = None) -> None:
+        """Multiplicatively cut the rate after a 429 and honour Retry-After"""
+        if not self.enabled:
+            return
+        bucket = self._bucket(region, endpoint)
+        floor = self.configured_rate(endpoint) * self.min_rate_fraction
+        rate = bucket.set_rate(lambda rate: max(floor, rate * self.decrease_factor))
+        if retry_after:
+            bucket.block_for(retry_after)
+        self.logger.warning(f"Throttled on {endpoint} in {region}, rate now {rate:.2f}/s"
+                            + (f", paused {retry_after:.1f}s" if retry_after else ""))
+    
+    def snapshot(self) -> Dict[str, float]:
+        """Current rate per region/endpoint"""
+        with self._lock:
+            return {f"{region}/{endpoint}": bucket.rate for (region, endpoint), bucket in self._buckets.items()}
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(config: Dict[str, Any], key: str = "default") -> RateLimiter:
+    """Return the process-wide limiter for a key (one API budget per key)"""
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter(config)
+        return _limiters[key]
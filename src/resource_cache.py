@@ -0,0 +1,91 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+from state_file import atomic_write_json
+
+class ResourceCache:
+    """TTL-based on-disk cache for discovered OCI resources.
+    
+    Entries are grouped by scope (tenancy/compartment/region) so several
+    clients can share one file. Writes are atomic (temp file + rename).
+    """
+    
+    def __init__(self, path: str, ttl: int = 86400):
+        """Initialize cache backed by a JSON file"""
+        self.path = path
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = self._load()
+    
+    @staticmethod
+    def scope_key(tenancy: str, compartment: str, region: str) -> str:
+        """Build the cache scope for a tenancy/compartment/region"""
+        return f"{tenancy}/{compartment}/{region}"
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load cache contents, starting empty if the file is missing or corrupt"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            self.logger.info(f"Resource cache loaded from {self.path}")
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable resource cache {self.path}: {e}")
+            return {}
+    
+    def _save(self) -> None:
+        """Persist cache contents atomically (caller holds the lock)"""
+        try:
+            atomic_write_json(self.path, self._data)
+        except OSError as e:
+            self.logger.warning(f"Failed to write resource cache {self.path}: {e}")
+    
+    def get(self, scope: str, name: str) -> Optional[Any]:
+        """Return a cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(scope, {}).get(name)
+        if not entry:
+            return None
+        if time.time() - entry.get("stored_at", 0) > self.ttl:
+            self.logger.debug(f"Resource cache entry expired: {scope} {name}")
+            return None
+        return entry.get("value")
+    
+    def set(self, scope: str, name: str, value: Any) -> None:
+        """Store a value and persist the cache"""
+        with self._lock:
+            self._data.setdefault(scope, {})[name] = {"value": value, "stored_at": time.time()}
+            self._save()
+    
+    def invalidate(self, scope: str, name: Optional[str] = None) -> None:
+        """Drop one entry (or a whole scope) and persist the cache"""
+        with self._lock:
+            if name is None:
+                removed = self._data.pop(scope, None) is not None
+            else:
+                removed = self._data.get(scope, {}).pop(name, None) is not None
+            if removed:
+                self._save()
+        if removed:
+            self.logger.info(f"Resource cache invalidated: {scope} {name or '*'}")
+
+_caches: Dict[str, ResourceCache] = {}
+_caches_lock = threading.Lock()
+
+def get_resource_cache(config: Dict[str, Any]) -> Optional[ResourceCache]:
+    """Return the process-wide cache for cache_config (None if disabled)"""
+    cache_config = config.get("cache_config") or {}
+    if not cache_config.get("enabled", True):
+        return None
+    
+    path = os.getenv("NOTIVM_CACHE_PATH") or cache_config.get("path", "/app/data/resource_cache.json")
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ResourceCache(path, ttl=cache_config.get("ttl", 86400))
+        return _caches[path]
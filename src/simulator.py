@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""Virtual-clock simulation of the VMCreator retry loop.
+
+Runs the real VMCreator.run_continuous loop (backoff, AD rotation, shape
+ladder, capacity scheduler, readiness polling) against a simulated OCI
+client on a virtual clock: every wait advances the clock instead of
+sleeping, so a multi-week hunt of thousands of attempts finishes in
+seconds. Capacity, latency, injected errors and throttling come from an
+oci_standin scenario (see src/oci_standin.py), with times in seconds
+since the start of the timeline. Two optional keys are read by the
+simulator only:
+
+    origin: "2026-10-05T00:00:00+00:00"   # wall time of second 0 (hour-of-week for the scheduler)
+    period: 604800                        # replay the timeline in a loop of this many seconds
+
+A timeline can also be reconstructed from the attempt history
+(attempts.db): success and out-of-capacity outcomes mark when each AD had
+room, throttled outcomes mark 429 storms; the state switches halfway
+between two observations that disagree.
+
+Each strategy is config.yaml plus an override file; every run starts the
+hunt at a different offset into the timeline, and the report compares
+time-to-VM and API calls.
+
+Usage:
+    python simulator.py --scenario scenario.yaml --strategy fast=fast.yaml --runs 20
+    python simulator.py --replay /app/data/attempts.db --region ap-seoul-1 --days 30
+"""
+import os
+import sys
+import copy
+import json
+import math
+import time
+import random
+import logging
+import argparse
+import threading
+import yaml
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Tuple
+from oci_errors import classify_service_error
+from oci_standin import Scenario, ERRORS
+from attempt_history import AttemptHistory
+from capacity_scheduler import CapacityStats, get_capacity_stats
+from telegram_bot import NotificationMessages
+from vm_creator import VMCreator
+
+class VirtualClock:
+    """Time source for VMCreator whose sleep() advances the clock instantly"""
+    
+    def __init__(self, start: float):
+        """Start the clock at the given epoch seconds"""
+        self.now = start
+        self._lock = threading.Lock()
+    
+    def time(self) -> float:
+        """Current virtual epoch seconds"""
+        return self.now
+    
+    def sleep(self, seconds: float) -> None:
+        """Advance the clock"""
+        with self._lock:
+            self.now += max(0, seconds)
+
+class VirtualStopEvent:
+    """Stop event whose wait() advances the virtual clock; set once the horizon is reached"""
+    
+    def __init__(self, clock: VirtualClock, deadline: float):
+        """Stop the hunt when the clock reaches deadline (epoch seconds)"""
+        self.clock = clock
+        self.deadline = deadline
+        self._set = False
+    
+    def is_set(self) -> bool:
+        """Whether the hunt should stop"""
+        return self._set or self.clock.time() >= self.deadline
+    
+    def set(self) -> None:
+        """Stop the hunt"""
+        self._set = True
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Advance the clock by timeout (at most to the deadline); True if the hunt should stop"""
+        if self.is_set():
+            return True
+        remaining = self.deadline - self.clock.time()
+        if timeout is None or timeout >= remaining:
+            self.clock.sleep(remaining)
+            return True
+        self.clock.sleep(timeout)
+        return False
+
+class SimulatedServiceError(Exception):
+    """Stand-in for oci.exceptions.ServiceError with the attributes classify_service_error reads"""
+    
+    def __init__(self, status: int, code: str, message: str, headers: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.headers = headers or {}
+        self.request_id = None
+
+class SimulatedOCIClient:
+    """The parts of OCIClient the retry loop uses, answered from a scenario on the virtual clock.
+    
+    Calls take the scenario's latency in virtual time and are counted per
+    endpoint; calls made concurrently (AD fan-out) are serialized.
+    """
+    
+    def __init__(self, scenario: Scenario, clock: VirtualClock, origin: float, period: Optional[float] = None):
+        """origin: epoch seconds of second 0 of the scenario; period: loop the timeline"""
+        self.scenario = scenario
+        self.clock = clock
+        self.origin = origin
+        self.period = period
+        self.calls: Dict[str, int] = {}
+        self.shape_override: Optional[Dict[str, Any]] = None
+        self.tenancy = None
+        self._instances: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def elapsed(self) -> float:
+        """Seconds into the scenario timeline"""
+        elapsed = self.clock.time() - self.origin
+        return elapsed % self.period if self.period else elapsed
+    
+    def _call(self, endpoint: str) -> None:
+        """Count a call, spend its latency and raise the scenario's throttling or injected error"""
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            self.clock.sleep(self.scenario.delay(endpoint))
+            if self.scenario.throttled(endpoint, self.elapsed()):
+                status, code, message = ERRORS["TooManyRequests"]
+                raise classify_service_error(SimulatedServiceError(
+                    status, code, message, {"retry-after": str(self.scenario.retry_after)}))
+            error = self.scenario.injected_error(endpoint)
+            if error:
+                raise classify_service_error(SimulatedServiceError(*ERRORS[error]))
+    
+    def drain_call_log(self) -> List[Dict[str, Any]]:
+        """No per-call latency log in the simulation"""
+        return []
+    
+    def prewarm_connections(self) -> int:
+        """Nothing to pre-warm"""
+        return 0
+    
+    def get_shape_config(self) -> Dict[str, Any]:
+        """Environment shape, overridden by the shape ladder"""
+        shape_config = {
+            "shape": os.getenv("VM_SHAPE", "VM.Standard.A1.Flex"),
+            "ocpus": int(os.getenv("VM_OCPUS", "2")),
+            "memory_gb": int(os.getenv("VM_MEMORY_GB", "12"))
+        }
+        if self.shape_override:
+            shape_config.update(self.shape_override)
+        return shape_config
+    
+    def get_availability_domains(self) -> List[str]:
+        """The scenario's ADs (cached by the real client, so no call is counted)"""
+        return list(self.scenario.availability_domains)
+    
+    def probe_capacity(self) -> List[str]:
+        """ADs with capacity according to the scenario, one capacity report call per AD"""
+        available = []
+        for availability_domain in self.scenario.availability_domains:
+            self._call("create_compute_capacity_report")
+            if self.scenario.has_capacity(availability_domain, self.elapsed()):
+                available.append(availability_domain)
+        return available
+    
+    def create_instance(self, display_name: str, availability_domain: Optional[str] = None) -> Dict[str, Any]:
+        """Launch if the AD has capacity at this point of the timeline"""
+        availability_domain = availability_domain or self.scenario.availability_domains[0]
+        self._call("launch_instance")
+        if not self.scenario.has_capacity(availability_domain, self.elapsed()):
+            raise classify_service_error(SimulatedServiceError(*ERRORS["OutOfHostCapacity"]))
+        
+        instance_id = f"ocid1.instance.sim.{len(self._instances) + 1}"
+        self._instances[instance_id] = {
+            "instance_id": instance_id,
+            "display_name": display_name,
+            "availability_domain": availability_domain,
+            "shape": self.get_shape_config()["shape"],
+            "launched": self.clock.time()
+        }
+        return {
+            "instance_id": instance_id,
+            "display_name": display_name,
+            "lifecycle_state": "PROVISIONING",
+            "availability_domain": availability_domain,
+            "shape": self._instances[instance_id]["shape"],
+            "time_created": datetime.fromtimestamp(self.clock.time(), timezone.utc)
+        }
+    
+    def get_instance_state(self, instance_id: str) -> str:
+        """PROVISIONING until the scenario's provisioning time has passed, then RUNNING"""
+        self._call("get_instance")
+        instance = self._instances[instance_id]
+        if instance.get("terminated"):
+            return "TERMINATED"
+        if self.clock.time() - instance["launched"] >= self.scenario.provisioning_seconds:
+            return "RUNNING"
+        return "PROVISIONING"
+    
+    def get_instance_details(self, instance_id: str) -> Dict[str, Any]:
+        """Final details (get_instance, list_vnic_attachments and get_vnic, as the real client)"""
+        state = self.get_instance_state(instance_id)
+        self._call("list_vnic_attachments")
+        self._call("get_vnic")
+        instance = self._instances[instance_id]
+        shape_config = self.get_shape_config()
+        return {
+            "instance_id": instance_id,
+            "display_name": instance["display_name"],
+            "lifecycle_state": state,
+            "availability_domain": instance["availability_domain"],
+            "shape": instance["shape"],
+            "ocpus": shape_config["ocpus"],
+            "memory_gb": shape_config["memory_gb"],
+            "time_created": datetime.fromtimestamp(instance["launched"], timezone.utc),
+            "public_ip": "203.0.113.10",
+            "private_ip": "10.0.0.10"
+        }
+    
+    def terminate_instance(self, instance_id: str) -> bool:
+        """Mark an instance terminated"""
+        self._call("terminate_instance")
+        self._instances[instance_id]["terminated"] = True
+        return True
+
+class SimulatedNotifier(NotificationMessages):
+    """Counts notifications per event type instead of sending them"""
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.sent: Dict[str, int] = {}
+    
+    def send_message(self, message: str, parse_mode: str = "Markdown", kind: str = "message") -> bool:
+        """Count one notification"""
+        self.sent[kind] = self.sent.get(kind, 0) + 1
+        return True
+    
+    def prewarm_connection(self) -> None:
+        """Nothing to pre-warm"""
+
+def merge_config(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Config with override applied section by section (nested dicts are merged)"""
+    merged = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+def parse_origin(value: Any) -> Optional[float]:
+    """Epoch seconds from a number or an ISO timestamp (None if unset)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    when = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+def _windows(observations: List[Tuple[float, bool]], hold: float) -> List[List[float]]:
+    """Intervals where the observed state is True, switching halfway between disagreeing observations"""
+    windows: List[List[float]] = []
+    for index, (ts, state) in enumerate(observations):
+        if not state:
+            continue
+        start = (observations[index - 1][0] + ts) / 2 if index > 0 else ts
+        end = (ts + observations[index + 1][0]) / 2 if index + 1 < len(observations) else ts + hold
+        start, end = max(start, ts - hold), min(end, ts + hold)
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], end)
+        else:
+            windows.append([start, end])
+    return windows
+
+def replay_scenario(history: AttemptHistory, region: str, start: Optional[float] = None,
+                    end: Optional[float] = None, hold: float = 600,
+                    tenancy: Optional[str] = None) -> Dict[str, Any]:
+    """Scenario whose capacity windows and throttle storms follow the recorded attempts of a region
+    (optionally of one tenancy).
+    
+    hold caps how far a single observation reaches into an unobserved gap.
+    """
+    rows = history.query(start, end, region, tenancy=tenancy)
+    if not rows:
+        raise ValueError(f"No recorded attempts for {region} in the selected period")
+    origin = rows[0]["ts"]
+    availability_domains = sorted({row["availability_domain"] for row in rows if row["availability_domain"]})
+    if not availability_domains:
+        raise ValueError(f"Recorded attempts for {region} have no availability domains")
+    
+    # Launches without an AD (fan-out failures) tell us about every AD
+    observations: Dict[str, List[Tuple[float, bool]]] = {ad: [] for ad in availability_domains}
+    throttling: List[Tuple[float, bool]] = []
+    for row in rows:
+        ts = row["ts"] - origin
+        throttling.append((ts, row["outcome"] == "throttled"))
+        if row["outcome"] in ("success", "out_of_capacity"):
+            for ad in [row["availability_domain"]] if row["availability_domain"] else availability_domains:
+                observations[ad].append((ts, row["outcome"] == "success"))
+    
+    windows = [
+        {"start": round(window_start, 1), "end": round(window_end, 1), "ads": [ad]}
+        for ad, ad_observations in observations.items()
+        for window_start, window_end in _windows(ad_observations, hold)
+    ]
+    storms = [{"start": round(storm_start, 1), "end": round(storm_end, 1)}
+              for storm_start, storm_end in _windows(throttling, hold)]
+    return {
+        "origin": datetime.fromtimestamp(origin, timezone.utc).isoformat(),
+        "period": round(rows[-1]["ts"] - origin + hold, 1),
+        "availability_domains": availability_domains,
+        "capacity": {"default": False, "windows": sorted(windows, key=lambda window: window["start"])},
+        "throttle": {"storms": storms}
+    }
+
+def simulate_hunt(config: Dict[str, Any], spec: Dict[str, Any], region: str, offset: float = 0,
+                  horizon: float = 14 * 86400, seed: Optional[int] = None,
+                  stats: Optional[CapacityStats] = None) -> Dict[str, Any]:
+    """Run one continuous hunt starting offset seconds into the scenario timeline
+    (stats: capacity stats the scheduler starts from, changed by the run)"""
+    rng = random.Random(seed)
+    scenario = Scenario(spec, seed)
+    origin = parse_origin(spec.get("origin")) or time.time()
+    clock = VirtualClock(origin + offset)
+    client = SimulatedOCIClient(scenario, clock, origin, spec.get("period"))
+    notifier = SimulatedNotifier(config)
+    stop_event = VirtualStopEvent(clock, clock.time() + horizon)
+    creator = VMCreator(config, region=region, notifier=notifier, stop_event=stop_event,
+                        oci_client=client, clock=clock, rng=rng)
+    creator.scheduler.stats = stats or CapacityStats(None)
+    
+    attempts = 0
+    launch_attempt = creator.launch_attempt
+    
+    def counted_launch_attempt(*args):
+        nonlocal attempts
+        attempts += 1
+        return launch_attempt(*args)
+    
+    creator.launch_attempt = counted_launch_attempt
+    started = clock.time()
+    try:
+        result = creator.run_continuous()
+    finally:
+        creator.end_heartbeat()
+    
+    return {
+        "offset_s": offset,
+        "success": result is not None,
+        "time_to_vm_s": round(clock.time() - started, 1) if result else None,
+        "availability_domain": result.get("availability_domain") if result else None,
+        "attempts": attempts,
+        "api_calls": sum(client.calls.values()),
+        "launch_calls": client.calls.get("launch_instance", 0),
+        "calls": dict(client.calls),
+        "notifications": sum(notifier.sent.values())
+    }
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (None for no values)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def simulate(config: Dict[str, Any], spec: Dict[str, Any], region: str, runs: int = 10,
+             horizon: float = 14 * 86400, seed: int = 0) -> Dict[str, Any]:
+    """Run a strategy from evenly spread start offsets and summarize time-to-VM and API cost"""
+    config = merge_config(config, {
+        "history_config": {"enabled": False},
+        "checkpoint_config": {"enabled": False},
+        "tracing_config": {"enabled": False}
+    })
+    span = spec.get("period") or max(
+        [window.get("end", window.get("start", 0)) for window in (spec.get("capacity") or {}).get("windows") or []] or [0])
+    # The scheduler starts every run from the recorded stats and learns in memory
+    scheduler_config = config.get("scheduler_config") or {}
+    recorded = get_capacity_stats(scheduler_config.get("stats_path", "/app/data/capacity_stats.json"))
+    
+    results = []
+    for run in range(runs):
+        offset = span * run / runs if span else 0
+        results.append(simulate_hunt(config, spec, region, offset, horizon, seed + run, recorded.copy()))
+    
+    times = [result["time_to_vm_s"] for result in results if result["success"]]
+    
+    def mean(key: str) -> float:
+        return round(sum(result[key] for result in results) / len(results), 1)
+    
+    return {
+        "runs": runs,
+        "succeeded": len(times),
+        "time_to_vm_p50_s": percentile(times, 50),
+        "time_to_vm_p90_s": percentile(times, 90),
+        "time_to_vm_mean_s": round(sum(times) / len(times), 1) if times else None,
+        "attempts_mean": mean("attempts"),
+        "api_calls_mean": mean("api_calls"),
+        "launch_calls_mean": mean("launch_calls"),
+        "notifications_mean": mean("notifications"),
+        "hunts": results
+    }
+
+def _hours(seconds: Optional[float]) -> str:
+    """Seconds as hours for the report"""
+    return f"{seconds / 3600:.1f}h" if seconds is not None else "-"
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the retry loop on a virtual clock and compare strategies")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--scenario", help="Scenario file (oci_standin format, YAML or JSON)")
+    source.add_argument("--replay", metavar="ATTEMPTS_DB", help="Reconstruct the timeline from an attempt history")
+    parser.add_argument("--config", default="config/config.yaml", help="Base configuration")
+    parser.add_argument("--strategy", action="append", default=[], metavar="NAME=FILE",
+                        help="Config overrides to compare (repeatable; the base config always runs as 'config')")
+    parser.add_argument("--region", default=os.getenv("OCI_REGION", "ap-seoul-1"), help="Region (selects region_configs)")
+    parser.add_argument("--tenancy", help="Replay: only attempts of this tenancy OCID")
+    parser.add_argument("--days", type=float, default=30, help="Replay: recorded days to use (default: 30)")
+    parser.add_argument("--hold", type=float, default=600, help="Replay: seconds one observation reaches (default: 600)")
+    parser.add_argument("--export-scenario", metavar="FILE", help="Replay: also write the reconstructed scenario")
+    parser.add_argument("--runs", type=int, default=10, help="Hunts per strategy, at spread start offsets (default: 10)")
+    parser.add_argument("--horizon-days", type=float, default=14, help="Give up a hunt after this long (default: 14)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", help="Write the full results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the retry loop's own logging")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL,
+                        format="%(levelname)s - %(message)s")
+    with open(args.config, 'r', encoding='utf-8') as file:
+        config = yaml.safe_load(file)
+    
+    if args.replay:
+        history = AttemptHistory(args.replay)
+        spec = replay_scenario(history, args.region, time.time() - args.days * 86400, hold=args.hold,
+                               tenancy=args.tenancy)
+        windows = spec["capacity"]["windows"]
+        print(f"Replaying {spec['period'] / 86400:.1f} days of {args.region}: {len(windows)} capacity window(s), "
+              f"{len(spec['throttle']['storms'])} throttle storm(s)")
+        if args.export_scenario:
+            with open(args.export_scenario, 'w', encoding='utf-8') as file:
+                yaml.safe_dump(spec, file, sort_keys=False)
+    else:
+        with open(args.scenario, 'r', encoding='utf-8') as file:
+            spec = yaml.safe_load(file) or {}
+    
+    strategies = {"config": config}
+    for entry in args.strategy:
+        name, _, path = entry.partition("=")
+        if not path:
+            parser.error(f"--strategy expects NAME=FILE, got {entry}")
+        with open(path, 'r', encoding='utf-8') as file:
+            strategies[name] = merge_config(config, yaml.safe_load(file) or {})
+    
+    results = {}
+    print(f"{'strategy':<16} {'success':>9} {'p50':>8} {'p90':>8} {'mean':>8} {'attempts':>9} {'api calls':>10} {'launches':>9}")
+    for name, strategy_config in strategies.items():
+        started = time.monotonic()
+        summary = simulate(strategy_config, spec, args.region, args.runs, args.horizon_days * 86400, args.seed)
+        summary["wall_s"] = round(time.monotonic() - started, 2)
+        results[name] = summary
+        print(f"{name:<16} {summary['succeeded']:>4}/{summary['runs']:<4} "
+              f"{_hours(summary['time_to_vm_p50_s']):>8} {_hours(summary['time_to_vm_p90_s']):>8} "
+              f"{_hours(summary['time_to_vm_mean_s']):>8} {summary['attempts_mean']:>9} "
+              f"{summary['api_calls_mean']:>10} {summary['launch_calls_mean']:>9}   ({summary['wall_s']}s)")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import os
+import json
+from typing import Any
+
+def atomic_write_json(path: str, data: Any, **dump_kwargs) -> None:
+    """Write data as JSON durably and atomically; raises OSError.
+    
+    The data goes to a temp file that is fsynced and renamed over the old
+    file, and the rename is fsynced where the platform allows it, so a
+    crash leaves either the previous or the new contents.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, **dump_kwargs)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+    
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory or ".", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -1,46 +1,23 @@
 import os
+import time
 import requests
 import logging
 from typing import Dict, Any, Optional
 from datetime import datetime
+from http_pool import get_shared_session, prewarm
+from outbox import RetryLater
+import metrics
 
-class TelegramBot:
-    def __init__(self, config: Dict[str, Any]):
-        """Initialize Telegram bot"""
-        self.config = config
-        self.logger = logging.getLogger(__name__)
-        
-        self.bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
-        self.chat_id = os.getenv("TELEGRAM_CHAT_ID")
-        
-        if not self.bot_token or not self.chat_id:
-            raise ValueError("Telegram bot token and chat ID must be provided")
-        
-        self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
-        self.logger.info("Telegram bot initialized")
+class NotificationMessages:
+    """Notification texts; subclasses provide config and send_message(message, parse_mode, kind).
     
-    def send_message(self, message: str, parse_mode: str = "Markdown") -> bool:
-        """Send a message to the configured chat"""
-        try:
-            url = f"{self.base_url}/sendMessage"
-            payload = {
-                "chat_id": self.chat_id,
-                "text": message,
-                "parse_mode": parse_mode
-            }
-            
-            response = requests.post(url, json=payload, timeout=30)
-            response.raise_for_status()
-            
-            self.logger.info("Message sent successfully")
-            return True
-            
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Failed to send message: {e}")
-            return False
-        except Exception as e:
-            self.logger.error(f"Unexpected error sending message: {e}")
-            return False
+    kind is the event type notifications are routed by: start, progress,
+    success, error, retry, final_failure or message.
+    """
+    
+    def check_destinations(self) -> bool:
+        """Whether notifications can be delivered; checked before a hunt starts"""
+        return True
     
     def send_progress_notification(self, attempt: int, max_attempts: int) -> bool:
         """Send progress notification"""
@@ -48,7 +25,7 @@ class TelegramBot:
             attempt=attempt,
             max_attempts=max_attempts
         )
-        return self.send_message(message)
+        return self.send_message(message, kind="progress")
     
     def send_success_notification(self, instance_details: Dict[str, Any]) -> bool:
         """Send success notification with instance details"""
@@ -86,8 +63,8 @@ class TelegramBot:
 
 🎉 **VM이 성공적으로 생성되었습니다!**
 """
-        
-        return self.send_message(details)
+
+        return self.send_message(details, kind="success")
     
     def send_error_notification(self, error_message: str, attempt: Optional[int] = None) -> bool:
         """Send error notification"""
@@ -97,7 +74,7 @@ class TelegramBot:
             message = self.config["notification_config"]["error_message"].format(
                 error_message=error_message
             )
-        return self.send_message(message)
+        return self.send_message(message, kind="error")
     
     def send_start_notification(self) -> bool:
         """Send notification when VM creation process starts"""
@@ -111,7 +88,7 @@ class TelegramBot:
 
 ⏳ VM 생성을 시도합니다...
 """
-        return self.send_message(message)
+        return self.send_message(message, kind="start")
     
     def send_retry_notification(self, attempt: int, max_attempts: int, next_retry_in: int) -> bool:
         """Send retry notification with wait time"""
@@ -121,7 +98,7 @@ class TelegramBot:
 다음 시도까지: {next_retry_in}초
 계속해서 VM 생성을 시도합니다...
 """
-        return self.send_message(message)
+        return self.send_message(message, kind="retry")
     
     def send_final_failure_notification(self, max_attempts: int, last_error: str) -> bool:
         """Send final failure notification when all attempts are exhausted"""
@@ -133,13 +110,88 @@ class TelegramBot:
 
 VM 생성에 실패했습니다. 설정을 확인하고 다시 시도해주세요.
 """
-        return self.send_message(message)
+        return self.send_message(message, kind="final_failure")
+
+class TelegramBot(NotificationMessages):
+    def __init__(self, config: Dict[str, Any], bot_token: Optional[str] = None, chat_id: Optional[str] = None):
+        """Initialize Telegram bot (token and chat default to TELEGRAM_BOT_TOKEN/TELEGRAM_CHAT_ID)"""
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        
+        self.bot_token = bot_token or os.getenv("TELEGRAM_BOT_TOKEN")
+        self.chat_id = chat_id or os.getenv("TELEGRAM_CHAT_ID")
+        
+        if not self.bot_token or not self.chat_id:
+            raise ValueError("Telegram bot token and chat ID must be provided")
+        
+        # NOTIVM_TELEGRAM_ENDPOINT points the bot at a stand-in (benchmarks, offline tests)
+        self.api_url = os.getenv("NOTIVM_TELEGRAM_ENDPOINT", "https://api.telegram.org")
+        self.base_url = f"{self.api_url}/bot{self.bot_token}"
+        
+        # Keep-alive session shared by every bot in the process
+        self.session = get_shared_session("telegram", config)
+        self.logger.info("Telegram bot initialized")
+    
+    def send_message(self, message: str, parse_mode: str = "Markdown", kind: str = "message") -> bool:
+        """Send a message to the configured chat and wait for the result"""
+        try:
+            return self.deliver(message, parse_mode)
+        except RetryLater as e:
+            self.logger.error(f"Failed to send message: {e}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Unexpected error sending message: {e}")
+            metrics.TELEGRAM_FAILURES.inc(method="sendMessage")
+            return False
+    
+    def deliver(self, message: str, parse_mode: str = "Markdown") -> bool:
+        """Post one message; False if Telegram rejected it, RetryLater if it should be sent again"""
+        started = time.monotonic()
+        try:
+            url = f"{self.base_url}/sendMessage"
+            payload = {
+                "chat_id": self.chat_id,
+                "text": message,
+                "parse_mode": parse_mode
+            }
+            
+            response = self.session.post(url, json=payload, timeout=30)
+        except requests.exceptions.RequestException as e:
+            metrics.TELEGRAM_FAILURES.inc(method="sendMessage")
+            raise RetryLater(f"Telegram API unreachable: {e}") from e
+        finally:
+            metrics.TELEGRAM_LATENCY.observe(time.monotonic() - started, method="sendMessage")
+        
+        if response.status_code == 429 or response.status_code >= 500:
+            metrics.TELEGRAM_FAILURES.inc(method="sendMessage")
+            retry_after = None
+            try:
+                retry_after = response.json().get("parameters", {}).get("retry_after")
+            except ValueError:
+                pass
+            raise RetryLater(f"Telegram API returned {response.status_code}", retry_after)
+        
+        if not response.ok:
+            metrics.TELEGRAM_FAILURES.inc(method="sendMessage")
+            self.logger.error(f"Failed to send message: {response.status_code} {response.text[:200]}")
+            return False
+        
+        self.logger.info("Message sent successfully")
+        return True
+    
+    def prewarm_connection(self) -> bool:
+        """Open a pooled connection to the Telegram API ahead of a notification"""
+        return prewarm(self.session, [self.api_url]) == 1
+    
+    def check_destinations(self) -> bool:
+        """The bot token works (getMe)"""
+        return self.test_connection()
     
     def test_connection(self) -> bool:
         """Test Telegram bot connection"""
         try:
             url = f"{self.base_url}/getMe"
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -150,7 +202,7 @@ VM 생성에 실패했습니다. 설정을 확인하고 다시 시도해주세
             else:
                 self.logger.error("Bot connection test failed")
                 return False
-                
+        
         except Exception as e:
             self.logger.error(f"Bot connection test error: {e}")
             return False
\ No newline at end of file
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from typing import Dict, Any, Optional, List
+from http_pool import get_shared_session
+
+class Span:
+    """A timed operation with attributes; children share the trace ID"""
+    
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        """Start a span (as a child of parent, or a new trace)"""
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = {key: value for key, value in (attributes or {}).items() if value is not None}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+    
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        """Add attributes (None values are skipped)"""
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+    
+    def set_error(self, message: str) -> None:
+        """Mark the span as failed"""
+        self.error = message
+    
+    def end(self) -> None:
+        """Finish the span and hand it to the exporter (once)"""
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer.export(self)
+    
+    def __enter__(self) -> "Span":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.set_error(str(exc))
+        self.end()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Flat form written by the file exporter"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 2),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+    
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON span"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+class _NoopSpan:
+    """Span returned while tracing is disabled"""
+    
+    trace_id = span_id = parent_id = None
+    
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+    
+    def set_error(self, message: str) -> None:
+        pass
+    
+    def end(self) -> None:
+        pass
+    
+    def __enter__(self) -> "_NoopSpan":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+# Parent of the spans started by SDK calls, per thread and asyncio task
+# (executors copy the submitting context, see VMCreator and AsyncHuntEngine)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("notivm_current_span", default=None)
+
+def set_current_span(span) -> None:
+    """Make span the parent of child spans started in this context (None: no parent)"""
+    _current_span.set(span)
+
+def current_span():
+    """The active span of this context, unless it has already ended"""
+    span = _current_span.get()
+    if span is None or getattr(span, "end_ns", None) is not None:
+        return None
+    return span
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    """Encode one attribute as an OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+class Tracer:
+    """Creates spans and exports finished ones from a background thread.
+    
+    Exporters: "file" appends one JSON object per span to a local JSONL
+    file, "otlp" posts OTLP/JSON batches to a collector's /v1/traces.
+    Exporting never blocks the hunt: a full queue drops spans.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize tracer from tracing_config"""
+        self.logger = logging.getLogger(__name__)
+        
+        tracing_config = config.get("tracing_config") or {}
+        self.enabled = bool(tracing_config.get("enabled", False))
+        self.exporter = tracing_config.get("exporter", "file")
+        self.path = os.getenv("NOTIVM_TRACE_PATH") or tracing_config.get("path", "/app/data/traces.jsonl")
+        self.otlp_endpoint = tracing_config.get("otlp_endpoint", "http://localhost:4318/v1/traces")
+        self.service_name = tracing_config.get("service_name", "notivm")
+        self.batch_size = tracing_config.get("batch_size", 100)
+        self.flush_interval = tracing_config.get("flush_interval", 2)
+        
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=tracing_config.get("max_queue", 10000))
+        self._dropped = 0
+        if self.enabled:
+            if self.exporter == "otlp":
+                self.session = get_shared_session("otlp", config)
+            threading.Thread(target=self._export_loop, name="trace-export", daemon=True).start()
+            atexit.register(self.flush)
+            self.logger.info(f"Tracing enabled ({self.exporter} exporter)")
+    
+    def start_span(self, name: str, parent: Optional[Span] = None,
+                   attributes: Optional[Dict[str, Any]] = None):
+        """Start a span; a no-op span while tracing is disabled"""
+        if not self.enabled or parent is NOOP_SPAN:
+            return NOOP_SPAN
+        return Span(self, name, parent, attributes)
+    
+    def export(self, span: Span) -> None:
+        """Queue a finished span for export"""
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self._dropped += 1
+            if self._dropped == 1:
+                self.logger.warning("Trace export queue is full, dropping spans")
+    
+    def _drain(self, limit: int) -> List[Span]:
+        """Take up to limit queued spans"""
+        spans = []
+        while len(spans) < limit:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return spans
+    
+    def _export_loop(self) -> None:
+        """Exporter thread: write batches every flush_interval seconds"""
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+    
+    def flush(self) -> None:
+        """Export everything queued so far"""
+        while True:
+            spans = self._drain(self.batch_size)
+            if not spans:
+                return
+            try:
+                if self.exporter == "otlp":
+                    self._export_otlp(spans)
+                else:
+                    self._export_file(spans)
+            except Exception as e:
+                self.logger.debug(f"Dropped {len(spans)} spans, export failed: {e}")
+    
+    def _export_file(self, spans: List[Span]) -> None:
+        """Append spans to the JSONL trace file"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as file:
+            for span in spans:
+                file.write(json.dumps(span.to_dict(), default=str) + "\n")
+    
+    def _export_otlp(self, spans: List[Span]) -> None:
+        """Post spans to an OTLP/HTTP collector (JSON encoding)"""
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": "notivm"}, "spans": [span.to_otlp() for span in spans]}]
+            }]
+        }
+        response = self.session.post(self.otlp_endpoint, json=payload, timeout=10)
+        response.raise_for_status()
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+def get_tracer(config: Dict[str, Any]) -> Tracer:
+    """Return the process-wide tracer"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(config)
+        return _tracer
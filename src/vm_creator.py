@@ -1,24 +1,57 @@
 import os
 import time
 import logging
+import threading
 import random
-from typing import Dict, Any, Optional
+import contextvars
+from typing import Dict, Any, Optional, List
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from oci_client import OCIClient
-from telegram_bot import TelegramBot
+from oci_errors import ErrorAction, classify_error
+from capacity_scheduler import CapacityScheduler
+from attempt_history import get_attempt_history
+from checkpoint import get_checkpoint_store
+from tracing import get_tracer, set_current_span
+import metrics
+from notifier import Notifier, get_notifier
 
 class VMCreator:
-    def __init__(self, config: Dict[str, Any]):
-        """Initialize VM Creator"""
+    # Lifecycle states from which an instance will never become RUNNING
+    FAILED_STATES = ("TERMINATING", "TERMINATED")
+    # OCI regions have at most three availability domains
+    MAX_AVAILABILITY_DOMAINS = 3
+    # Termination tries, with the retry backoff between them, before an instance is left for a later pass
+    TERMINATE_ATTEMPTS = 3
+    
+    def __init__(self, config: Dict[str, Any], region: Optional[str] = None,
+                 notifier: Optional[Notifier] = None,
+                 stop_event: Optional[threading.Event] = None,
+                 profile: Optional[Dict[str, Any]] = None,
+                 oci_client: Optional[OCIClient] = None,
+                 clock=None, rng: Optional[random.Random] = None):
+        """Initialize VM Creator (region defaults to OCI_REGION, credentials to the environment;
+        oci_client, clock (time() and sleep()) and rng (backoff jitter) are replaced by the simulator)"""
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self.clock = clock or time
+        self.random = rng or random
+        
+        # 리전별 최적화된 재시도 설정
+        if profile:
+            self.region = region or profile["oci_config"]["region"]
+        else:
+            self.region = region or os.getenv("OCI_REGION", "ap-seoul-1")
+        self.profile_name = profile["name"] if profile else None
+        self.label = f"{self.profile_name}/{self.region}" if profile else self.region
         
         # Initialize clients
-        self.oci_client = OCIClient(config)
-        self.telegram_bot = TelegramBot(config)
+        self.oci_client = oci_client or OCIClient(config, region=self.region, profile=profile)
+        self.notifier = notifier or get_notifier(config)
+        
+        # Set by the owner (or another region's worker) to stop this hunt
+        self.stop_event = stop_event or threading.Event()
         
-        # 리전별 최적화된 재시도 설정
-        self.region = os.getenv("OCI_REGION", "ap-seoul-1")
         region_configs = config.get("region_configs", {})
         region_config = region_configs.get(self.region, {})
         
@@ -31,6 +64,71 @@ class VMCreator:
         self.max_wait = default_retry_config.get("max_wait", 300)
         self.multiplier = default_retry_config.get("multiplier", 1.5)
         
+        # AD fan-out: 매 시도마다 모든 가용 도메인에 동시에 생성 요청
+        vm_config = config.get("vm_config") or {}
+        self.ad_fanout = bool(vm_config.get("ad_fanout", False))
+        self.fanout_executor = ThreadPoolExecutor(
+            max_workers=self.MAX_AVAILABILITY_DOMAINS, thread_name_prefix="ad-fanout"
+        ) if self.ad_fanout else None
+        
+        # Shape ladder: 큰 사양이 계속 용량 부족이면 한 단계씩 낮춰서 시도
+        self.shape_ladder = [
+            {"ocpus": rung["ocpus"], "memory_gb": rung["memory_gb"]}
+            for rung in vm_config.get("shape_ladder") or []
+        ]
+        self.ladder_step_after = vm_config.get("ladder_step_after", 20)
+        self.upsize_interval = vm_config.get("upsize_interval", 0)
+        self._rung = 0
+        self._capacity_failures = 0
+        self._upsize_stop = threading.Event()
+        self.apply_shape_rung(0)
+        
+        # 용량 리포트로 먼저 확인하고, 여유가 보고된 AD에서만 생성 요청
+        capacity_config = config.get("capacity_check") or {}
+        self.capacity_check = bool(capacity_config.get("enabled", False))
+        self.probe_interval = capacity_config.get("probe_interval", 10)
+        
+        # RUNNING 대기: 처음엔 빠르게, 점점 느리게 상태만 조회
+        readiness_config = config.get("readiness_config") or {}
+        self.readiness_timeout = readiness_config.get("timeout", 300)
+        self.readiness_initial_interval = readiness_config.get("initial_interval", 2)
+        self.readiness_max_interval = readiness_config.get("max_interval", 15)
+        self.readiness_multiplier = readiness_config.get("multiplier", 1.5)
+        
+        # 다음 시도 직전에 연결을 미리 열어 TLS 핸드셰이크를 임계 경로에서 제거
+        connection_config = config.get("connection_config") or {}
+        self.prewarm_lead = connection_config.get("prewarm_lead", 5)
+        
+        # 시간대별 성공 확률을 학습해 일일 호출 예산을 배분
+        self.scheduler = CapacityScheduler(config, self.region, clock=self.clock)
+        
+        # 모든 시도를 SQLite에 기록 (시간/리전 인덱스, 시간별 집계)
+        self.history = get_attempt_history(config)
+        
+        # 재시작 시 시도 횟수/백오프/생성 중 인스턴스를 이어받기 위한 체크포인트
+        self.checkpoint = get_checkpoint_store(config)
+        self.checkpoint_key = self.label
+        
+        # 시도마다 트레이스 스팬 (하위: SDK 호출, 텔레그램 전송)
+        self.tracer = get_tracer(config)
+        self.attempt_span = None
+        
+        # Retry state driven by error classification
+        self.aborted = False
+        self.last_failure = None
+        self._backoff_step = 0
+        self._ad_index = 0
+        self._last_launch_ad = None
+        self._attempt_started = self.clock.time()
+        self.attempt = 0
+        self.display_name_prefix = "AutoVM"
+        
+        # Resume state (set by start_hunt from the checkpoint)
+        self.first_attempt = 1
+        self.resume_wait = 0
+        self._in_flight: List[str] = []
+        self._in_flight_lock = threading.Lock()
+        
         # 리전 정보 로깅
         if region_config:
             self.logger.info(f"Region-optimized settings for {self.region}: "
@@ -39,155 +137,694 @@ class VMCreator:
         else:
             self.logger.warning(f"No region-specific config for {self.region}, using defaults")
         
-        self.logger.info("VM Creator initialized")
+        self.logger.info(f"VM Creator initialized (AD fan-out: {'on' if self.ad_fanout else 'off'})")
     
     def calculate_wait_time(self, attempt: int) -> int:
         """Calculate exponential backoff wait time with jitter"""
         base_wait = min(self.initial_wait * (self.multiplier ** (attempt - 1)), self.max_wait)
         # Add jitter (±20%)
-        jitter = base_wait * 0.2 * (random.random() - 0.5)
+        jitter = base_wait * 0.2 * (self.random.random() - 0.5)
         wait_time = int(base_wait + jitter)
         return max(wait_time, self.initial_wait)
     
-    def wait_for_instance_running(self, instance_id: str, timeout: int = 300) -> bool:
-        """Wait for instance to reach running state"""
+    def apply_shape_rung(self, rung: int) -> None:
+        """Launch with the given shape ladder rung from now on"""
+        if not self.shape_ladder:
+            return
+        self._rung = rung
+        self._capacity_failures = 0
+        self.oci_client.shape_override = dict(self.shape_ladder[rung])
+        self.logger.info(f"Shape ladder rung {rung + 1}/{len(self.shape_ladder)}: "
+                         f"{self.shape_ladder[rung]['ocpus']} OCPU / {self.shape_ladder[rung]['memory_gb']} GB")
+    
+    def step_down_shape(self, reason: str) -> bool:
+        """Move to the next smaller shape config; False if already at the smallest"""
+        if self._rung + 1 >= len(self.shape_ladder):
+            return False
+        self.logger.warning(f"Stepping down the shape ladder ({reason})")
+        self.apply_shape_rung(self._rung + 1)
+        return True
+    
+    def launch_plan(self, availability_domains: Optional[List[str]] = None) -> List[str]:
+        """ADs to launch in: all given (or discovered) ADs with fan-out, otherwise the current one of the rotation"""
+        availability_domains = availability_domains or self.oci_client.get_availability_domains()
+        if self.scheduler.enabled and availability_domains:
+            availability_domains = self.scheduler.rank_availability_domains(availability_domains)
+        
+        if not self.ad_fanout or len(availability_domains) <= 1:
+            # Rotate through ADs; SWITCH_AD failures advance the index
+            availability_domain = availability_domains[self._ad_index % len(availability_domains)] if availability_domains else None
+            self._last_launch_ad = availability_domain
+            return [availability_domain]
+        return list(availability_domains)
+    
+    def launch_in(self, display_name: str, availability_domain: Optional[str]) -> Dict[str, Any]:
+        """Launch in one AD and track the instance (checkpointed) before anything else happens to it"""
+        instance_details = self.oci_client.create_instance(display_name, availability_domain)
+        self.track_instance(instance_details["instance_id"])
+        return instance_details
+    
+    def launch_instance(self, display_name: str, availability_domains: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Launch an instance, fanning out across the given (or all) availability domains if enabled"""
+        targets = self.launch_plan(availability_domains)
+        if len(targets) == 1:
+            return self.launch_in(display_name, targets[0])
+        return self._launch_fanout(display_name, targets)
+    
+    def _launch_fanout(self, display_name: str, availability_domains: List[str]) -> Dict[str, Any]:
+        """Launch in every AD concurrently, keep the first success and terminate the rest"""
+        self.logger.info(f"Launching {display_name} in {len(availability_domains)} availability domains concurrently")
+        
+        futures = {
+            # Each AD's SDK calls are children of the attempt span of this thread
+            self.fanout_executor.submit(contextvars.copy_context().run, self.launch_in, display_name, ad): ad
+            for ad in availability_domains
+        }
+        outcomes = []
+        for future in as_completed(futures):
+            try:
+                outcomes.append((futures[future], future.result(), None))
+            except Exception as e:
+                outcomes.append((futures[future], None, e))
+        return self.settle_fanout(outcomes)
+    
+    def settle_fanout(self, outcomes: List[tuple]) -> Dict[str, Any]:
+        """Resolve fan-out results, given as (ad, instance details, error) in completion order.
+        
+        The first launched instance wins and the surplus ones are terminated;
+        every other AD's failure is recorded under its AD. If all ADs failed,
+        the last error is raised and left to handle_attempt_failure.
+        """
+        launched = [(ad, details) for ad, details, error in outcomes if error is None]
+        failures = [(ad, error) for ad, details, error in outcomes if error is not None]
+        if not launched:
+            for ad, error in failures[:-1]:
+                self.record_ad_failure(ad, error)
+            self._last_launch_ad, error = failures[-1]
+            raise error
+        
+        for ad, error in failures:
+            self.record_ad_failure(ad, error)
+        self._last_launch_ad, winner = launched[0]
+        self.logger.info(f"Launch succeeded first in {self._last_launch_ad}")
+        for ad, details in launched[1:]:
+            # One that cannot be terminated stays tracked; complete_launch tries it again
+            self.logger.info(f"Terminating surplus fan-out instance {details['instance_id']} in {ad}")
+            self.discard_instance(details["instance_id"])
+        return winner
+    
+    def record_ad_failure(self, availability_domain: str, error: Exception) -> None:
+        """Record a fan-out launch that failed in one AD (the attempt itself may still succeed)"""
+        failure = classify_error(error)
+        self.logger.debug(f"Launch in {availability_domain} failed: {failure}")
+        if failure.error_class == "out_of_capacity":
+            self.scheduler.record(availability_domain, "out_of_capacity")
+        if not self.history:
+            return
+        try:
+            self.history.record(
+                region=self.region,
+                outcome=failure.error_class,
+                availability_domain=availability_domain,
+                attempt=self.attempt,
+                shape_config=self.oci_client.get_shape_config(),
+                error=failure.to_dict(),
+                duration_ms=round((self.clock.time() - self._attempt_started) * 1000, 1),
+                ts=self._attempt_started,
+                tenancy=self.oci_client.tenancy
+            )
+        except Exception as e:
+            self.logger.debug(f"Failed to record launch failure in {availability_domain}: {e}")
+    
+    def readiness_poll_intervals(self):
+        """Yield the waits between readiness checks: fast at first, slower later"""
+        interval = self.readiness_initial_interval
+        while True:
+            yield interval
+            interval = min(interval * self.readiness_multiplier, self.readiness_max_interval)
+    
+    def check_readiness(self, instance_id: str) -> Optional[bool]:
+        """Poll the lifecycle state once: True if RUNNING, False if it never will be, None to keep waiting"""
+        state = self.oci_client.get_instance_state(instance_id)
+        if state == "RUNNING":
+            return True
+        if state in self.FAILED_STATES:
+            self.logger.warning(f"Instance {instance_id} is {state}, giving up on it")
+            return False
+        self.logger.debug(f"Instance {instance_id} is {state}, waiting...")
+        return None
+    
+    def wait_for_instance_running(self, instance_id: str, timeout: Optional[int] = None) -> bool:
+        """Wait for instance to reach running state, polling only its lifecycle state"""
+        timeout = timeout or self.readiness_timeout
         self.logger.info(f"Waiting for instance {instance_id} to reach RUNNING state")
         
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        intervals = self.readiness_poll_intervals()
+        start_time = self.clock.time()
+        while self.clock.time() - start_time < timeout:
             try:
-                if self.oci_client.is_instance_running(instance_id):
-                    self.logger.info(f"Instance {instance_id} is now RUNNING")
-                    return True
-                
-                self.logger.debug(f"Instance {instance_id} not ready yet, waiting...")
-                time.sleep(10)
-                
+                ready = self.check_readiness(instance_id)
+                if ready is not None:
+                    if ready:
+                        self.logger.info(f"Instance {instance_id} is now RUNNING after {self.clock.time() - start_time:.0f}s")
+                    return ready
             except Exception as e:
                 self.logger.error(f"Error checking instance status: {e}")
-                time.sleep(10)
+            
+            interval = next(intervals)
+            self.beat(interval)
+            if self.stop_event.wait(interval):
+                return False
         
         self.logger.warning(f"Instance {instance_id} did not reach RUNNING state within {timeout} seconds")
         return False
     
-    def create_vm_with_retry(self) -> Optional[Dict[str, Any]]:
-        """Main method to create VM with retry logic"""
+    def prewarm_connections(self) -> None:
+        """Refresh pooled OCI and notification connections right before a launch"""
+        try:
+            self.oci_client.prewarm_connections()
+            self.notifier.prewarm_connection()
+        except Exception as e:
+            self.logger.debug(f"Connection pre-warm failed: {e}")
+    
+    def wait_before_next_attempt(self, wait_time: float) -> bool:
+        """Wait for the next attempt, pre-warming connections just before it; True if stopped"""
+        deadline = self.clock.time() + wait_time
+        self.beat(wait_time)
+        if self.prewarm_lead and wait_time > self.prewarm_lead:
+            if self.stop_event.wait(wait_time - self.prewarm_lead):
+                return True
+            self.prewarm_connections()
+        return self.stop_event.wait(max(0, deadline - self.clock.time()))
+    
+    def probe_capacity(self) -> Optional[List[str]]:
+        """Return the ADs reporting capacity, or None if the probe itself failed"""
+        try:
+            available = self.oci_client.probe_capacity()
+        except Exception as e:
+            self.logger.warning(f"Capacity probe failed, launching without pre-check: {e}")
+            return None
+        self.scheduler.record_probe({ad: ad in available for ad in self.oci_client.get_availability_domains()})
+        return available
+    
+    def wait_for_capacity(self) -> Optional[List[str]]:
+        """Poll the cheap capacity probe until some AD reports room (None: launch anywhere)"""
+        probes = 0
+        while not self.stop_event.is_set():
+            available = self.probe_capacity()
+            probes += 1
+            if available is None or available:
+                if available:
+                    self.logger.info(f"Capacity reported in {', '.join(available)} after {probes} probe(s)")
+                return available
+            self.beat(self.probe_interval)
+            if self.stop_event.wait(self.probe_interval):
+                break
+        return None
+    
+    def record_attempt(self, attempt: int, outcome: str, availability_domain: Optional[str] = None,
+                       error: Optional[Dict[str, Any]] = None) -> None:
+        """Append the finished attempt, with its API call latencies, to the attempt history"""
+        metrics.ATTEMPTS.inc(hunt=self.label, outcome=outcome)
+        self.end_attempt_span(outcome, availability_domain, error)
+        if not self.history:
+            return
+        try:
+            self.history.record(
+                region=self.region,
+                outcome=outcome,
+                availability_domain=availability_domain,
+                attempt=attempt,
+                shape_config=self.oci_client.get_shape_config(),
+                error=error,
+                duration_ms=round((self.clock.time() - self._attempt_started) * 1000, 1),
+                api_calls=self.oci_client.drain_call_log(),
+                ts=self._attempt_started,
+                tenancy=self.oci_client.tenancy
+            )
+        except Exception as e:
+            self.logger.debug(f"Failed to record attempt {attempt}: {e}")
+    
+    def start_attempt_span(self, attempt: int) -> None:
+        """Open the trace span of an attempt; SDK calls made until it ends become its children"""
+        shape_config = self.oci_client.get_shape_config()
+        self.attempt_span = self.tracer.start_span("attempt", attributes={
+            "hunt": self.label,
+            "region": self.region,
+            "attempt": attempt,
+            "shape": shape_config.get("shape"),
+            "ocpus": shape_config.get("ocpus"),
+            "memory_gb": shape_config.get("memory_gb")
+        })
+        set_current_span(self.attempt_span)
+    
+    def end_attempt_span(self, outcome: str, availability_domain: Optional[str] = None,
+                         error: Optional[Dict[str, Any]] = None) -> None:
+        """Close the current attempt span with its outcome"""
+        span = self.attempt_span
+        if span is None:
+            return
+        self.attempt_span = None
+        set_current_span(None)
+        error = error or {}
+        span.set_attributes({
+            "availability_domain": availability_domain,
+            "outcome": outcome,
+            "error.action": error.get("action"),
+            "http.status_code": error.get("status"),
+            "oci.error_code": error.get("code"),
+            "oci.opc_request_id": error.get("opc_request_id")
+        })
+        if error:
+            span.set_error(error.get("message") or outcome)
+        span.end()
+    
+    def save_checkpoint(self, attempt: int, wait_time: float = 0) -> None:
+        """Persist the retry position and in-flight instances so a restart can resume them"""
+        if not self.checkpoint:
+            return
+        self.checkpoint.save(self.checkpoint_key, {
+            "attempt": attempt,
+            "backoff_step": self._backoff_step,
+            "ad_index": self._ad_index,
+            "rung": self._rung,
+            "capacity_failures": self._capacity_failures,
+            "next_attempt_at": self.clock.time() + wait_time,
+            "in_flight": self.in_flight()
+        })
+    
+    def in_flight(self) -> List[str]:
+        """Launched instances that are neither used nor terminated yet"""
+        with self._in_flight_lock:
+            return list(self._in_flight)
+    
+    def track_instance(self, instance_id: str) -> None:
+        """Remember a launched instance before waiting for it, so a restart neither forgets nor orphans it"""
+        with self._in_flight_lock:
+            if instance_id not in self._in_flight:
+                self._in_flight.append(instance_id)
+        self.save_checkpoint(self.attempt)
+    
+    def untrack_instance(self, instance_id: str) -> None:
+        """Stop tracking an instance that was terminated"""
+        with self._in_flight_lock:
+            if instance_id in self._in_flight:
+                self._in_flight.remove(instance_id)
+    
+    def clear_checkpoint(self) -> None:
+        """Forget the saved hunt state (the hunt has ended)"""
+        with self._in_flight_lock:
+            self._in_flight = []
+        if self.checkpoint:
+            self.checkpoint.clear(self.checkpoint_key)
+    
+    def restore_checkpoint(self) -> bool:
+        """Pick up the retry position of a previous run; False if there is nothing to resume"""
+        self.first_attempt = 1
+        self.attempt = 0
+        self.resume_wait = 0
+        self._in_flight = []
+        state = self.checkpoint.load(self.checkpoint_key) if self.checkpoint else None
+        if not state:
+            return False
+        
+        self.first_attempt = state.get("attempt", 0) + 1
+        self.attempt = self.first_attempt - 1
+        self._backoff_step = state.get("backoff_step", 0)
+        self._ad_index = state.get("ad_index", 0)
+        self._in_flight = list(state.get("in_flight") or [])
+        if self.shape_ladder and 0 < state.get("rung", 0) < len(self.shape_ladder):
+            self.apply_shape_rung(state["rung"])
+        self._capacity_failures = state.get("capacity_failures", 0)
+        self.resume_wait = max(0, int(state.get("next_attempt_at", 0) - self.clock.time()))
+        
+        self.logger.info(f"Resuming {self.region} hunt at attempt {self.first_attempt} "
+                         f"(backoff step {self._backoff_step}, {len(self._in_flight)} in-flight instance(s), "
+                         f"next attempt in {self.resume_wait}s)")
+        return True
+    
+    def pending_instances(self) -> List[str]:
+        """In-flight instances from before a restart that may still become RUNNING"""
+        pending = []
+        for instance_id in self.in_flight():
+            try:
+                state = self.oci_client.get_instance_state(instance_id)
+            except Exception as e:
+                self.logger.warning(f"Dropping in-flight instance {instance_id}: {e}")
+                state = None
+            if state is None or state in self.FAILED_STATES:
+                self.untrack_instance(instance_id)
+                continue
+            self.logger.info(f"Recovered in-flight instance {instance_id} ({state})")
+            pending.append(instance_id)
+        return pending
+    
+    def discard_instance(self, instance_id: str) -> bool:
+        """Terminate an instance that will not be used and stop tracking it.
+        
+        Failed terminations (429, 5xx) are retried with the retry backoff; if
+        they keep failing or the hunt stops, the instance stays tracked (and
+        checkpointed), so a later pass or restart retries it. Returns whether
+        it was terminated.
+        """
+        for tries in range(1, self.TERMINATE_ATTEMPTS + 1):
+            if self.oci_client.terminate_instance(instance_id):
+                self.untrack_instance(instance_id)
+                self.save_checkpoint(self.attempt, self.resume_wait)
+                return True
+            if tries == self.TERMINATE_ATTEMPTS:
+                break
+            wait_time = self.calculate_wait_time(tries)
+            self.beat(wait_time)
+            if self.stop_event.wait(wait_time):
+                break
+        self.logger.warning(f"Could not terminate {instance_id}, keeping it in the checkpoint to retry")
+        return False
+    
+    def recover_in_flight(self) -> Optional[Dict[str, Any]]:
+        """Finish or clean up instances that were provisioning when the last run stopped"""
+        for instance_id in self.pending_instances():
+            if self.wait_for_instance_running(instance_id):
+                return self.complete_launch(instance_id, self.first_attempt - 1)
+            self.logger.warning(f"Recovered instance {instance_id} is not running, terminating...")
+            self.discard_instance(instance_id)
+        return None
+    
+    def beat(self, next_within: float = 0) -> None:
+        """Report hunt-loop progress for /health; the next report is due within next_within seconds"""
+        metrics.heartbeat(self.label, next_within)
+    
+    def end_heartbeat(self) -> None:
+        """Stop health-checking this hunt (it has ended)"""
+        metrics.clear_heartbeat(self.label)
+    
+    def notify(self, send, *args) -> None:
+        """Deliver a notification, traced as a child span of the current attempt"""
+        parent = self.attempt_span
+        name = getattr(send, "__name__", "send")
+        
+        def traced_send(*send_args):
+            with self.tracer.start_span(f"notify.{name}", parent, {"hunt": self.label}) as span:
+                if send(*send_args) is False:
+                    span.set_error("send failed")
+        
+        self.dispatch(traced_send, *args)
+    
+    def dispatch(self, send, *args) -> None:
+        """Run a notification send; engines may override this to send in the background"""
+        send(*args)
+    
+    def start_hunt(self) -> bool:
+        """Announce the hunt (or its resumption from a checkpoint); False if no notification destination works"""
         self.logger.info("Starting VM creation process")
+        self.beat()
+        self.aborted = False
+        if not self.notifier.check_destinations():
+            self.logger.error("No notification destination passed its connection test")
+            return False
+        self._backoff_step = 0
+        if self.history:
+            self.history.prune()
+        
+        if self.restore_checkpoint():
+            self.notify(self.notifier.send_message,
+                        f"🔄 [{self.label}] 재시작 후 시도 #{self.first_attempt}부터 이어서 진행합니다.")
+        else:
+            # Send start notification
+            self.notify(self.notifier.send_start_notification)
+        return True
+    
+    def begin_attempt(self, attempt: int) -> str:
+        """Start one attempt (span, progress notification) and return the display name to launch"""
+        self.logger.info(f"[{self.label}] VM creation attempt {attempt}/{self.max_attempts}")
+        self.beat()
+        self.attempt = attempt
+        self._last_launch_ad = None
+        self.start_attempt_span(attempt)
+        self._attempt_started = self.clock.time()
+        self.oci_client.drain_call_log()
+        
+        # Send progress notification (every 10 attempts or first few attempts)
+        if attempt <= 5 or attempt % 10 == 0:
+            self.notify(self.notifier.send_progress_notification, attempt, self.max_attempts)
+        
+        # Generate unique display name
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        return f"{self.display_name_prefix}-{timestamp}-{attempt:04d}"
+    
+    def launch_attempt(self, attempt: int, availability_domains: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Issue the launch request for one attempt (optionally limited to some ADs)"""
+        instance_details = self.launch_instance(self.begin_attempt(attempt), availability_domains)
+        self.logger.info(f"Instance created: {instance_details['instance_id']}")
+        return instance_details
+    
+    def complete_launch(self, instance_id: str, attempt: int) -> Dict[str, Any]:
+        """Fetch final details of a RUNNING instance and announce success"""
+        # Other tracked instances (fan-out siblings, ones that failed to terminate) are surplus now
+        leaked = []
+        for surplus in self.in_flight():
+            if surplus != instance_id:
+                self.logger.info(f"Terminating surplus instance {surplus}")
+                if not self.discard_instance(surplus):
+                    leaked.append(surplus)
+        if leaked:
+            # The checkpoint is cleared below, so the user has to terminate these
+            self.notify(self.notifier.send_error_notification,
+                        f"Surplus instance(s) could not be terminated, terminate them manually: {', '.join(leaked)}")
+        
+        # Get final instance details with IP addresses
+        final_details = self.oci_client.get_instance_details(instance_id)
+        self.scheduler.record(final_details.get("availability_domain"), "success")
+        self.record_attempt(attempt, "success", final_details.get("availability_domain"))
+        self.clear_checkpoint()
+        
+        # Send success notification
+        self.notify(self.notifier.send_success_notification, final_details)
+        
+        self.logger.info(f"VM creation successful after {attempt} attempts")
+        return final_details
+    
+    def abandon_launch(self, instance_id: str) -> None:
+        """Terminate an instance that never reached RUNNING and fail the attempt"""
+        # Instance creation succeeded but didn't reach running state
+        self.logger.warning(f"Instance {instance_id} created but not running, terminating...")
+        self.discard_instance(instance_id)
+        raise Exception("Instance created but failed to reach RUNNING state")
+    
+    def handle_attempt_failure(self, attempt: int, error: Exception) -> Optional[int]:
+        """Classify a failed attempt and return the wait before the next one (None: stop retrying)"""
+        failure = classify_error(error)
+        self.last_failure = failure
+        
+        request_id = f" (opc-request-id: {failure.opc_request_id})" if failure.opc_request_id else ""
+        self.logger.error(f"Attempt {attempt} failed [{failure.error_class} -> {failure.action}]: {failure}{request_id}")
+        
+        if failure.error_class == "out_of_capacity" and self._last_launch_ad:
+            self.scheduler.record(self._last_launch_ad, "out_of_capacity")
+        self.record_attempt(attempt, failure.error_class, self._last_launch_ad, failure.to_dict())
+        
+        # Capacity or limit failures at a large size move down the shape ladder
+        if failure.error_class == "out_of_capacity" and self.shape_ladder:
+            self._capacity_failures += 1
+            if self._capacity_failures >= self.ladder_step_after:
+                self.step_down_shape(f"{self._capacity_failures} consecutive out-of-capacity failures")
+        elif failure.error_class == "limit_exceeded" and self.step_down_shape("service limit exceeded"):
+            failure.action = ErrorAction.RETRY_FAST
+        
+        if failure.action == ErrorAction.ABORT:
+            self.logger.error(f"{failure.error_class} cannot be fixed by retrying, aborting VM creation in {self.region}")
+            self.aborted = True
+            self.notify(self.notifier.send_error_notification, str(failure), attempt)
+            return None
+        
+        if failure.action == ErrorAction.BACKOFF:
+            self._backoff_step += 1
+        else:
+            self._backoff_step = 0
+        metrics.BACKOFF_STEP.set(self._backoff_step, hunt=self.label)
+        if failure.action == ErrorAction.SWITCH_AD:
+            self._ad_index += 1
+        
+        # Send error notification when throttling starts or every 50 attempts
+        if (failure.error_class == "throttled" and self._backoff_step == 1) or attempt % 50 == 0:
+            self.notify(self.notifier.send_error_notification, str(failure), attempt)
+        
+        # If this is not the last attempt, wait before retrying
+        if attempt >= self.max_attempts:
+            return None
+        
+        # Transient and capacity errors retry at the base (or scheduled) interval; throttling backs off
+        if self.scheduler.enabled and failure.action != ErrorAction.BACKOFF:
+            wait_time = self.scheduler.next_wait()
+        else:
+            wait_time = self.calculate_wait_time(max(self._backoff_step, 1))
+        if failure.retry_after:
+            wait_time = max(wait_time, int(failure.retry_after))
+        self.logger.info(f"Waiting {wait_time} seconds before next attempt...")
+        metrics.NEXT_WAIT.set(wait_time, hunt=self.label)
+        self.save_checkpoint(attempt, wait_time)
         
-        # Send start notification
-        self.telegram_bot.send_start_notification()
+        # Send retry notification for longer waits
+        if wait_time > 60:
+            self.notify(self.notifier.send_retry_notification, attempt, self.max_attempts, wait_time)
+        return wait_time
+    
+    def try_upsize(self, instance_id: str) -> bool:
+        """Try to resize a VM launched below the top rung to a larger config, largest first"""
+        for rung in range(self._rung):
+            target = self.shape_ladder[rung]
+            try:
+                self.oci_client.update_instance_shape(instance_id, target["ocpus"], target["memory_gb"])
+            except Exception as e:
+                self.logger.info(f"Upsize to {target['ocpus']} OCPU / {target['memory_gb']} GB not possible yet: {e}")
+                continue
+            
+            self._rung = rung
+            self.notify(self.notifier.send_message,
+                        f"⬆️ VM 사양 업그레이드 요청 완료: {target['ocpus']} OCPU / {target['memory_gb']} GB (재부팅됨)")
+            return True
+        return False
+    
+    def run_upsize_loop(self, instance_details: Dict[str, Any]) -> None:
+        """Keep trying to upsize a VM launched on a lower rung every upsize_interval seconds"""
+        if not self.shape_ladder or not self.upsize_interval or self._rung == 0:
+            return
         
-        # Test bot connection first
-        if not self.telegram_bot.test_connection():
-            self.logger.error("Telegram bot connection test failed")
+        instance_id = instance_details["instance_id"]
+        self.logger.info(f"Will try to upsize {instance_id} every {self.upsize_interval}s")
+        while self._rung > 0 and not self._upsize_stop.wait(self.upsize_interval):
+            self.try_upsize(instance_id)
+        
+        if self._rung == 0:
+            self.logger.info(f"Instance {instance_id} is at the top of the shape ladder")
+    
+    def stop_upsize(self) -> None:
+        """Stop a running upsize loop"""
+        self._upsize_stop.set()
+    
+    def finish_hunt_failed(self, last_error: str, attempts: int) -> None:
+        """Report that the hunt ended without a VM"""
+        if self.aborted:
+            self.logger.error(f"VM creation aborted after {attempts} attempts. Last error: {last_error}")
+        else:
+            self.logger.error(f"All {attempts} attempts failed. Last error: {last_error}")
+        self.clear_checkpoint()
+        self.notify(self.notifier.send_final_failure_notification, attempts, last_error)
+    
+    def create_vm_with_retry(self) -> Optional[Dict[str, Any]]:
+        """Main method to create VM with retry logic"""
+        if not self.start_hunt():
             return None
         
         last_error = ""
+        attempt = self.first_attempt - 1
         
-        for attempt in range(1, self.max_attempts + 1):
+        # Instances that were provisioning when the previous run stopped
+        recovered = self.recover_in_flight()
+        if recovered:
+            return recovered
+        if self.resume_wait and self.wait_before_next_attempt(self.resume_wait):
+            self.logger.info(f"Stop requested, ending VM creation in {self.region}")
+            return None
+        
+        for attempt in range(self.first_attempt, self.max_attempts + 1):
+            if self.stop_event.is_set():
+                self.logger.info(f"Stop requested, ending VM creation in {self.region}")
+                return None
+            
             try:
-                self.logger.info(f"VM creation attempt {attempt}/{self.max_attempts}")
-                
-                # Send progress notification (every 10 attempts or first few attempts)
-                if attempt <= 5 or attempt % 10 == 0:
-                    self.telegram_bot.send_progress_notification(attempt, self.max_attempts)
+                availability_domains = self.wait_for_capacity() if self.capacity_check else None
+                if self.stop_event.is_set():
+                    return None
                 
-                # Generate unique display name
-                timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-                display_name = f"AutoVM-{timestamp}-{attempt:04d}"
-                
-                # Attempt to create instance
-                instance_details = self.oci_client.create_instance(display_name)
-                instance_id = instance_details["instance_id"]
-                
-                self.logger.info(f"Instance created: {instance_id}")
+                instance_id = self.launch_attempt(attempt, availability_domains)["instance_id"]
                 
                 # Wait for instance to be running
                 if self.wait_for_instance_running(instance_id):
-                    # Get final instance details with IP addresses
-                    final_details = self.oci_client.get_instance_details(instance_id)
-                    
-                    # Send success notification
-                    self.telegram_bot.send_success_notification(final_details)
-                    
-                    self.logger.info(f"VM creation successful after {attempt} attempts")
-                    return final_details
-                else:
-                    # Instance creation succeeded but didn't reach running state
-                    self.logger.warning(f"Instance {instance_id} created but not running, terminating...")
-                    self.oci_client.terminate_instance(instance_id)
-                    raise Exception("Instance created but failed to reach RUNNING state")
+                    return self.complete_launch(instance_id, attempt)
+                self.abandon_launch(instance_id)
             
             except Exception as e:
                 last_error = str(e)
-                self.logger.error(f"Attempt {attempt} failed: {last_error}")
-                
-                # Send error notification for critical errors or every 50 attempts
-                if "rate limit" in last_error.lower() or "quota" in last_error.lower() or attempt % 50 == 0:
-                    self.telegram_bot.send_error_notification(last_error, attempt)
+                wait_time = self.handle_attempt_failure(attempt, e)
+                if wait_time is None:
+                    break
                 
-                # If this is not the last attempt, wait before retrying
-                if attempt < self.max_attempts:
-                    wait_time = self.calculate_wait_time(attempt)
-                    self.logger.info(f"Waiting {wait_time} seconds before next attempt...")
-                    
-                    # Send retry notification for longer waits
-                    if wait_time > 60:
-                        self.telegram_bot.send_retry_notification(attempt, self.max_attempts, wait_time)
-                    
-                    time.sleep(wait_time)
-        
-        # All attempts failed
-        self.logger.error(f"All {self.max_attempts} attempts failed. Last error: {last_error}")
-        self.telegram_bot.send_final_failure_notification(self.max_attempts, last_error)
+                if self.wait_before_next_attempt(wait_time):
+                    self.logger.info(f"Stop requested, ending VM creation in {self.region}")
+                    return None
+            
+            finally:
+                # Export the span of an attempt cut short by a stop or an interrupt
+                self.end_attempt_span("stopped")
+        
+        # All attempts failed (or the hunt was aborted)
+        self.finish_hunt_failed(last_error, attempt)
         return None
     
-    def run_continuous(self) -> None:
-        """Run continuous VM creation attempts"""
-        self.logger.info("Starting continuous VM creation mode")
-        
-        while True:
+    def run_continuous(self) -> Optional[Dict[str, Any]]:
+        """Run continuous VM creation attempts until success or stop"""
+        self.logger.info(f"Starting continuous VM creation mode in {self.region}")
+        try:
+            return self._run_continuous()
+        finally:
+            self.end_heartbeat()
+    
+    def _run_continuous(self) -> Optional[Dict[str, Any]]:
+        """Restart the hunt after failures until success, abort or stop"""
+        while not self.stop_event.is_set():
             try:
                 result = self.create_vm_with_retry()
                 if result:
                     self.logger.info("VM creation successful, stopping continuous mode")
+                    return result
+                elif self.stop_event.is_set():
+                    break
+                elif self.aborted:
+                    self.logger.error("VM creation aborted, not restarting")
                     break
                 else:
                     self.logger.error("VM creation failed after all attempts")
                     # Wait before potentially restarting the entire process
                     self.logger.info("Waiting 300 seconds before restarting the process...")
-                    time.sleep(300)
-                    
+                    self.beat(300)
+                    self.stop_event.wait(300)
+            
             except KeyboardInterrupt:
                 self.logger.info("Received interrupt signal, stopping...")
-                self.telegram_bot.send_message("🛑 VM 생성 프로세스가 중단되었습니다.")
+                self.notifier.send_message("🛑 VM 생성 프로세스가 중단되었습니다.")
                 break
             except Exception as e:
                 self.logger.error(f"Unexpected error in continuous mode: {e}")
-                self.telegram_bot.send_error_notification(f"Unexpected error: {e}")
+                self.notifier.send_error_notification(f"Unexpected error: {e}")
                 # Wait before retrying
-                time.sleep(60)
+                self.beat(60)
+                self.stop_event.wait(60)
+        
+        return None
     
     def create_single_vm(self) -> Optional[Dict[str, Any]]:
         """Create a single VM (for testing purposes)"""
         self.logger.info("Creating single VM for testing")
+        # Test launches are not resumed by later hunts
+        self.checkpoint = None
         
         try:
             timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
             display_name = f"TestVM-{timestamp}"
             
-            instance_details = self.oci_client.create_instance(display_name)
+            instance_details = self.launch_instance(display_name)
             instance_id = instance_details["instance_id"]
             
             if self.wait_for_instance_running(instance_id):
                 final_details = self.oci_client.get_instance_details(instance_id)
-                self.telegram_bot.send_success_notification(final_details)
+                self.notifier.send_success_notification(final_details)
                 return final_details
             else:
                 self.oci_client.terminate_instance(instance_id)
                 raise Exception("Instance failed to reach RUNNING state")
-                
+        
         except Exception as e:
             self.logger.error(f"Single VM creation failed: {e}")
-            self.telegram_bot.send_error_notification(str(e))
+            self.notifier.send_error_notification(str(e))
             return None
\ No newline at end of file
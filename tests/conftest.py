@@ -0,0 +1,25 @@
+import os
+import sys
+import pytest
+import yaml
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+# src/ modules import each other as top-level modules (as when run from src/)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from simulator import merge_config
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """config.yaml with state files under tmp_path and no history or tracing"""
+    for name in ("NOTIVM_CHECKPOINT_PATH", "NOTIVM_HISTORY_PATH", "NOTIVM_TRACE_PATH"):
+        monkeypatch.delenv(name, raising=False)
+    with open(os.path.join(ROOT, "config", "config.yaml"), 'r', encoding='utf-8') as file:
+        base = yaml.safe_load(file)
+    return merge_config(base, {
+        "checkpoint_config": {"enabled": True, "path": str(tmp_path / "checkpoint.json")},
+        "history_config": {"enabled": False},
+        "tracing_config": {"enabled": False},
+        "scheduler_config": {"stats_path": str(tmp_path / "capacity_stats.json")}
+    })
@@ -0,0 +1,32 @@
+from datetime import datetime, timezone
+from capacity_scheduler import CapacityScheduler, CapacityStats, hour_of_week
+
+REGION = "ap-seoul-1"
+# Monday 03:00 and 15:00 UTC
+QUIET = datetime(2026, 10, 5, 3, tzinfo=timezone.utc)
+BUSY = datetime(2026, 10, 5, 15, tzinfo=timezone.utc)
+
+def make_scheduler(enabled=False):
+    scheduler = CapacityScheduler({"scheduler_config": {"enabled": enabled, "neighbour_weight": 0}}, REGION)
+    scheduler.stats = CapacityStats(None)
+    return scheduler
+
+def test_outcomes_are_recorded_while_disabled():
+    scheduler = make_scheduler(enabled=False)
+    scheduler.record("AD-1", "out_of_capacity", BUSY)
+    scheduler.record("AD-1", "success", QUIET)
+    counts = scheduler.stats.counts(REGION, "AD-1")
+    assert counts["out_of_capacity"][hour_of_week(BUSY)] == 1
+    assert counts["success"][hour_of_week(QUIET)] == 1
+
+def test_probes_follow_capacity_windows():
+    scheduler = make_scheduler(enabled=True)
+    for _ in range(30):
+        scheduler.record_probe({"AD-1": True, "AD-2": False}, QUIET)
+        scheduler.record_probe({"AD-1": False, "AD-2": False}, BUSY)
+    
+    probabilities = scheduler.hourly_probabilities()
+    assert probabilities[hour_of_week(QUIET)] > 5 * probabilities[hour_of_week(BUSY)]
+    # The budget is spent where capacity shows up
+    assert scheduler.next_wait(QUIET) < scheduler.next_wait(BUSY)
+    assert scheduler.rank_availability_domains(["AD-2", "AD-1"], QUIET) == ["AD-1", "AD-2"]
@@ -0,0 +1,98 @@
+from checkpoint import CheckpointStore
+from simulator import SimulatedNotifier, SimulatedOCIClient, VirtualClock, VirtualStopEvent
+from oci_standin import Scenario
+from vm_creator import VMCreator
+
+REGION = "ap-seoul-1"
+
+def make_creator(config, clock, client=None):
+    client = client or SimulatedOCIClient(Scenario({"provisioning_seconds": 20}), clock, clock.time())
+    return VMCreator(config, region=REGION, notifier=SimulatedNotifier(config), oci_client=client, clock=clock,
+                     stop_event=VirtualStopEvent(clock, clock.time() + 86400))
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / "state" / "checkpoint.json")
+    store = CheckpointStore(path)
+    store.save("default/ap-seoul-1", {"attempt": 7, "in_flight": ["ocid1.instance.a"]})
+    
+    state = CheckpointStore(path).load("default/ap-seoul-1")
+    assert state["attempt"] == 7
+    assert state["in_flight"] == ["ocid1.instance.a"]
+    assert "saved_at" in state
+    
+    store.clear("default/ap-seoul-1")
+    assert CheckpointStore(path).load("default/ap-seoul-1") is None
+
+def test_store_ignores_a_corrupt_file(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    path.write_text("{not json", encoding='utf-8')
+    store = CheckpointStore(str(path))
+    assert store.load("default/ap-seoul-1") is None
+    store.save("default/ap-seoul-1", {"attempt": 1})
+    assert CheckpointStore(str(path)).load("default/ap-seoul-1")["attempt"] == 1
+
+def test_restart_resumes_retry_position(config):
+    clock = VirtualClock(1_790_000_000)
+    creator = make_creator(config, clock)
+    creator.attempt = 12
+    creator._backoff_step = 4
+    creator._ad_index = 2
+    creator.save_checkpoint(12, wait_time=120)
+    
+    clock.sleep(30)
+    resumed = make_creator(config, clock)
+    assert resumed.start_hunt()
+    assert resumed.first_attempt == 13
+    assert resumed.attempt == 12
+    assert resumed._ad_index == 2
+    assert resumed.resume_wait == 90
+    assert resumed.in_flight() == []
+
+def test_restart_recovers_in_flight_instances(config):
+    clock = VirtualClock(1_790_000_000)
+    client = SimulatedOCIClient(Scenario({"provisioning_seconds": 20, "capacity": {"default": True}}), clock, clock.time())
+    creator = make_creator(config, clock, client)
+    creator.begin_attempt(3)
+    launched = creator.launch_in(f"{creator.display_name_prefix}-test", "AD-1")
+    abandoned = client.create_instance("AutoVM-old", "AD-2")["instance_id"]
+    creator.track_instance(abandoned)
+    client.terminate_instance(abandoned)
+    
+    resumed = make_creator(config, clock, client)
+    resumed.restore_checkpoint()
+    assert resumed.in_flight() == [launched["instance_id"], abandoned]
+    # Terminated instances are dropped, provisioning ones are waited for and used
+    assert resumed.pending_instances() == [launched["instance_id"]]
+    assert resumed.in_flight() == [launched["instance_id"]]
+    
+    result = resumed.recover_in_flight()
+    assert result["instance_id"] == launched["instance_id"]
+    assert resumed.checkpoint.load(resumed.checkpoint_key) is None
+
+def test_failed_discard_stays_in_the_checkpoint(config):
+    clock = VirtualClock(1_790_000_000)
+    client = SimulatedOCIClient(Scenario({"capacity": {"default": True}}), clock, clock.time())
+    creator = make_creator(config, clock, client)
+    creator.begin_attempt(1)
+    instance_id = creator.launch_in("AutoVM-test", "AD-1")["instance_id"]
+    
+    client.terminate_instance = lambda instance_id: False
+    assert creator.discard_instance(instance_id) is False
+    assert clock.time() > 1_790_000_000 + creator.initial_wait
+    assert make_creator(config, clock, client).restore_checkpoint()
+    assert creator.checkpoint.load(creator.checkpoint_key)["in_flight"] == [instance_id]
+
+def test_surplus_fanout_instance_is_terminated_after_a_failed_try(config):
+    clock = VirtualClock(1_790_000_000)
+    client = SimulatedOCIClient(Scenario({"capacity": {"default": True}}), clock, clock.time())
+    creator = make_creator(config, clock, client)
+    creator.begin_attempt(1)
+    first = creator.launch_in("AutoVM-test", "AD-1")
+    surplus = creator.launch_in("AutoVM-test", "AD-2")
+    
+    results = iter([False, True])
+    terminate = client.terminate_instance
+    client.terminate_instance = lambda instance_id: next(results) and terminate(instance_id)
+    assert creator.settle_fanout([("AD-1", first, None), ("AD-2", surplus, None)]) is first
+    assert creator.in_flight() == [first["instance_id"]]
+    assert client._instances[surplus["instance_id"]].get("terminated")
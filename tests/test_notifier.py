@@ -0,0 +1,21 @@
+import json
+from notifier import Notifier
+
+def make_notifier(tmp_path, path, enabled=True):
+    return Notifier({
+        "notifier_config": {"destinations": [{"name": "log", "type": "file", "path": str(path)}]},
+        "outbox_config": {"enabled": enabled, "dir": str(tmp_path / "outbox"), "min_interval": 0}
+    })
+
+def test_inline_delivery_without_outbox(tmp_path):
+    path = tmp_path / "notifications.jsonl"
+    notifier = make_notifier(tmp_path, path, enabled=False)
+    assert notifier.outboxes == {}
+    assert notifier.send_message("hello", kind="start")
+    assert json.loads(path.read_text(encoding='utf-8'))["event"] == "start"
+
+def test_startup_check_fails_when_no_destination_works(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("", encoding='utf-8')
+    assert not make_notifier(tmp_path, blocker / "notifications.jsonl", enabled=False).check_destinations()
+    assert make_notifier(tmp_path, tmp_path / "notifications.jsonl", enabled=False).check_destinations()
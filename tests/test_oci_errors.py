@@ -0,0 +1,44 @@
+import pytest
+from oci_errors import ErrorAction, OCIServiceError, classify_error, classify_service_error
+
+class FakeServiceError(Exception):
+    """The attributes of oci.exceptions.ServiceError that the classifier reads"""
+    
+    def __init__(self, status, code, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.headers = headers or {}
+        self.request_id = "opc-1"
+
+@pytest.mark.parametrize("status, code, message, error_class, action", [
+    (500, "InternalError", "Out of host capacity.", "out_of_capacity", ErrorAction.SWITCH_AD),
+    (400, "InvalidParameter", "Invalid subnet id", "invalid_parameter", ErrorAction.RETRY_FAST),
+    (400, "InvalidParameter", "Invalid shape", "invalid_parameter", ErrorAction.ABORT),
+    (429, "TooManyRequests", "Too many requests for the user", "throttled", ErrorAction.BACKOFF),
+    (400, "LimitExceeded", "Service limits were exceeded", "limit_exceeded", ErrorAction.ABORT),
+    (404, "NotAuthorizedOrNotFound", "Authorization failed", "not_authorized", ErrorAction.ABORT),
+    (401, "Unknown", "Unauthenticated", "not_authorized", ErrorAction.ABORT),
+    (409, "IncorrectState", "Instance is terminating", "conflict", ErrorAction.BACKOFF),
+    (404, "NotFound", "Not found", "not_found", ErrorAction.ABORT),
+    (503, "ServiceUnavailable", "Service is temporarily unavailable", "service_unavailable", ErrorAction.RETRY_FAST),
+    (418, "Teapot", "Unexpected", "unknown", ErrorAction.BACKOFF),
+])
+def test_classify_service_error(status, code, message, error_class, action):
+    error = classify_service_error(FakeServiceError(status, code, message))
+    assert (error.error_class, error.action) == (error_class, action)
+    assert (error.status, error.code, error.opc_request_id) == (status, code, "opc-1")
+
+def test_classify_service_error_reads_retry_after():
+    error = classify_service_error(FakeServiceError(429, "TooManyRequests", "Too many", {"retry-after": "7"}))
+    assert error.retry_after == 7.0
+    assert classify_service_error(FakeServiceError(429, "TooManyRequests", "Too many", {"retry-after": "soon"})).retry_after is None
+
+def test_classify_error_treats_other_errors_as_transient():
+    error = classify_error(TimeoutError("read timed out"))
+    assert (error.error_class, error.action, error.status) == ("transient", ErrorAction.RETRY_FAST, None)
+    
+    classified = OCIServiceError("Out of host capacity.", status=500, error_class="out_of_capacity",
+                                 action=ErrorAction.SWITCH_AD)
+    assert classify_error(classified) is classified
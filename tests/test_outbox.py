@@ -0,0 +1,45 @@
+import json
+import time
+import outbox
+from outbox import Outbox, RetryLater
+
+def unreachable(text, parse_mode, kind):
+    raise RetryLater("destination down", retry_after=60)
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_put_does_not_wait_for_disk(tmp_path, monkeypatch):
+    write = outbox.atomic_write_json
+    
+    def slow_write(*args, **kwargs):
+        time.sleep(0.3)
+        write(*args, **kwargs)
+    
+    monkeypatch.setattr(outbox, "atomic_write_json", slow_write)
+    box = Outbox("test", unreachable, {"dir": str(tmp_path), "min_interval": 0, "coalesce_kinds": []})
+    started = time.monotonic()
+    for index in range(5):
+        box.put(f"message {index}")
+    assert time.monotonic() - started < 0.2
+    
+    # The writer thread catches up with every queued message
+    path = tmp_path / "test.json"
+    assert wait_for(lambda: path.exists() and len(json.loads(path.read_text(encoding='utf-8'))["queue"]) == 5)
+
+def test_undelivered_messages_survive_a_restart(tmp_path):
+    box = Outbox("test", unreachable, {"dir": str(tmp_path), "min_interval": 0, "digest_interval": 300})
+    box.put("started", kind="start")
+    box.put("attempt 1", kind="progress")
+    assert box.flush(0.2) is False
+    
+    delivered = []
+    restarted = Outbox("test", lambda text, parse_mode, kind: delivered.append(kind) or True,
+                       {"dir": str(tmp_path), "min_interval": 0})
+    assert restarted.flush(5)
+    assert delivered == ["start", "digest"]
@@ -0,0 +1,93 @@
+import pytest
+import rate_limiter
+from rate_limiter import RateLimiter, TokenBucket
+
+class FakeTime:
+    """Stand-in for the time module of rate_limiter: the clock only moves when told to or slept on"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    return fake
+
+def test_reserve_spends_the_burst_then_queues(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Each further caller waits for its own token: 1/rate apart
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+def test_reserve_refills_with_elapsed_time(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    for _ in range(4):
+        bucket.reserve()
+    clock.now += 2.0
+    assert bucket.reserve() == 0.0
+    assert bucket.tokens == pytest.approx(2.0)
+    clock.now += 60
+    bucket.reserve()
+    assert bucket.tokens == pytest.approx(2.0)
+
+def test_block_for_delays_every_reservation(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    bucket.block_for(5)
+    bucket.block_for(1)
+    assert bucket.reserve() == pytest.approx(5.0)
+    clock.now += 4
+    assert bucket.reserve() == pytest.approx(1.0)
+
+def test_set_rate_credits_earned_tokens_at_the_old_rate(clock):
+    bucket = TokenBucket(rate=2.0, capacity=10)
+    bucket.tokens = 0
+    clock.now += 1
+    assert bucket.set_rate(lambda rate: rate / 4) == 0.5
+    assert bucket.tokens == pytest.approx(2.0)
+
+def test_throttle_cuts_the_rate_and_success_restores_it(clock):
+    limiter = RateLimiter({"rate_limit_config": {
+        "default_rate": 4.0, "burst": 5, "decrease_factor": 0.5, "recovery_step": 0.25, "min_rate_fraction": 0.2
+    }})
+    limiter.on_throttled("ap-seoul-1", "launch_instance")
+    assert limiter.snapshot() == {"ap-seoul-1/launch_instance": 2.0}
+    
+    for _ in range(5):
+        limiter.on_throttled("ap-seoul-1", "launch_instance")
+    assert limiter.snapshot()["ap-seoul-1/launch_instance"] == pytest.approx(0.8)
+    
+    for _ in range(10):
+        limiter.on_success("ap-seoul-1", "launch_instance")
+    assert limiter.snapshot()["ap-seoul-1/launch_instance"] == 4.0
+
+def test_throttle_honours_retry_after(clock):
+    limiter = RateLimiter({"rate_limit_config": {"default_rate": 4.0, "burst": 5}})
+    limiter.on_throttled("ap-seoul-1", "get_instance", retry_after=3)
+    assert limiter._bucket("ap-seoul-1", "get_instance").reserve() == pytest.approx(3.0)
+    # Other endpoints and regions keep their own budget
+    assert limiter._bucket("ap-seoul-1", "launch_instance").reserve() == 0.0
+    assert limiter._bucket("ap-tokyo-1", "get_instance").reserve() == 0.0
+
+def test_shares_split_the_rate_between_jobs(clock):
+    limiter = RateLimiter({"rate_limit_config": {"default_rate": 4.0, "burst": 4}})
+    limiter.add_share("job:a")
+    limiter.add_share("job:b")
+    
+    # A busy job waits for its own half of the rate...
+    started = clock.now
+    for _ in range(12):
+        limiter.acquire("ap-seoul-1", "launch_instance", "job:a")
+    assert clock.now - started == pytest.approx(5.0)
+    # ...and leaves the rest of the budget to the other job
+    assert limiter.acquire("ap-seoul-1", "launch_instance", "job:b") == 0.0
+    
+    limiter.remove_share("job:b")
+    assert limiter._share_bucket("ap-seoul-1", "launch_instance", "job:a").rate == 4.0
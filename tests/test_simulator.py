@@ -0,0 +1,85 @@
+import glob
+import os
+import random
+import pytest
+import yaml
+from attempt_history import AttemptHistory
+from oci_standin import Scenario
+from simulator import (SimulatedNotifier, SimulatedOCIClient, VirtualClock, VirtualStopEvent, merge_config,
+                       replay_scenario, simulate_hunt)
+from vm_creator import VMCreator
+
+REGION = "ap-seoul-1"
+ORIGIN = 1_790_000_000
+BENCH_SCENARIOS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                                                "benchmarks", "scenarios", "*.yaml")))
+
+@pytest.fixture
+def history(tmp_path):
+    history = AttemptHistory(str(tmp_path / "attempts.db"))
+    for offset, outcome, availability_domain in [
+        (0, "out_of_capacity", "AD-1"),
+        (0, "out_of_capacity", "AD-2"),
+        (600, "success", "AD-2"),
+        (1200, "out_of_capacity", "AD-1"),
+        (1200, "out_of_capacity", "AD-2"),
+        (1800, "throttled", None),
+    ]:
+        history.record(REGION, outcome, availability_domain, ts=ORIGIN + offset)
+    history.record("ap-tokyo-1", "success", "AD-1", ts=ORIGIN)
+    return history
+
+def test_virtual_clock_waits_without_sleeping():
+    clock = VirtualClock(ORIGIN)
+    stop_event = VirtualStopEvent(clock, ORIGIN + 100)
+    assert stop_event.wait(60) is False
+    assert clock.time() == ORIGIN + 60
+    assert stop_event.wait(60) is True
+    assert clock.time() == ORIGIN + 100
+
+def test_replay_scenario_rebuilds_windows_and_storms(history):
+    spec = replay_scenario(history, REGION, hold=600)
+    assert spec["availability_domains"] == ["AD-1", "AD-2"]
+    # The AD-2 success holds until halfway to the neighbouring failures
+    assert spec["capacity"] == {"default": False, "windows": [{"start": 300.0, "end": 900.0, "ads": ["AD-2"]}]}
+    assert spec["throttle"] == {"storms": [{"start": 1500.0, "end": 2400.0}]}
+    assert spec["period"] == 2400.0
+
+def test_replay_scenario_without_history_fails(history):
+    with pytest.raises(ValueError):
+        replay_scenario(history, "eu-frankfurt-1")
+
+def test_replayed_hunt_succeeds_inside_the_window(config, history):
+    spec = replay_scenario(history, REGION, hold=600)
+    result = simulate_hunt(config, spec, REGION, horizon=3600, seed=1)
+    assert result["success"]
+    assert result["availability_domain"] == "AD-2"
+    assert 300 <= result["time_to_vm_s"] < 900
+    assert result["launch_calls"] >= result["attempts"] > 1
+
+@pytest.mark.parametrize("path", BENCH_SCENARIOS, ids=os.path.basename)
+def test_benchmark_scenarios_drive_the_simulator(config, path):
+    with open(path, 'r', encoding='utf-8') as file:
+        spec = yaml.safe_load(file)
+    result = simulate_hunt(merge_config(config, spec.get("config")), spec, REGION, horizon=600, seed=1)
+    assert result["success"]
+    assert result["time_to_vm_s"] >= min(window["start"] for window in spec["capacity"]["windows"])
+
+def test_simulate_hunt_leaves_the_global_rng_alone(config, history):
+    spec = replay_scenario(history, REGION, hold=600)
+    state = random.getstate()
+    first = simulate_hunt(config, spec, REGION, horizon=3600, seed=7)
+    assert random.getstate() == state
+    # The seed alone decides the run
+    random.seed(12345)
+    assert simulate_hunt(config, spec, REGION, horizon=3600, seed=7) == first
+
+def test_readiness_polling_stops_with_the_hunt(config):
+    clock = VirtualClock(ORIGIN)
+    client = SimulatedOCIClient(Scenario({"capacity": {"default": True}, "provisioning_seconds": 3600}), clock, ORIGIN)
+    creator = VMCreator(config, region=REGION, notifier=SimulatedNotifier(config), oci_client=client, clock=clock,
+                        stop_event=VirtualStopEvent(clock, ORIGIN + 60))
+    instance = client.create_instance("notivm-test")
+    assert creator.wait_for_instance_running(instance["instance_id"], timeout=1800) is False
+    # Stopped at the stop event, not at the readiness timeout
+    assert clock.time() == ORIGIN + 60
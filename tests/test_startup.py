@@ -0,0 +1,26 @@
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bench_startup import DEFERRED_MODULES
+
+# Generous: import main takes ~50 ms, the OCI SDK alone ~400 ms
+MAX_IMPORT_MS = 300
+
+IMPORT_MAIN = """
+import sys, json, time
+started = time.perf_counter()
+import main
+print(json.dumps({"ms": (time.perf_counter() - started) * 1000, "modules": sorted(sys.modules)}))
+"""
+
+def test_import_main_defers_hunt_modules():
+    result = subprocess.run([sys.executable, "-c", IMPORT_MAIN], cwd=os.path.join(ROOT, "src"),
+                            capture_output=True, text=True, check=True)
+    imported = json.loads(result.stdout.strip().splitlines()[-1])
+    assert [module for module in DEFERRED_MODULES if module in imported["modules"]] == []
+    assert imported["ms"] < MAX_IMPORT_MS